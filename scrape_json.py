@@ -1,18 +1,41 @@
 #!/usr/bin/env python3
 """
 Scrape Reddit posts from old.reddit.com using JSON API
+
+Each subreddit is paged through its `after` cursor as its own asyncio task.
+All tasks share one pooled keep-alive HTTP session and one global token-bucket
+rate limiter instead of sleeping after every page.
+
+Every page's posts and the subreddit's cursor (crawl_state table) are committed
+in one transaction, so an interrupted run picks up at the next unfetched page
+(--restart ignores saved cursors).
 """
-import json
-import sqlite3
+import argparse
+import asyncio
+import sys
 from datetime import datetime
-import urllib.request
-import urllib.parse
+from pathlib import Path
 import time
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+import profiling
+import schema
+from async_fetch import AsyncFetcher, crawl_listing
+from crawl_state import CrawlState
+from db import BATCH_SIZE, connect, transaction
+from profiling import PROFILER
+
 DB_PATH = "/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/reddit_posts.db"
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/605.1.15"
 
+BASE_URL = "https://old.reddit.com"
+
+# Global request budget shared by every subreddit task (requests per second)
+RATE_LIMIT = 1.0
+PAGES_PER_SUBREDDIT = 10  # 250 posts
+TARGET_NEW_POSTS = 1000
+
 SUBREDDITS = [
     "productivity",
     "getdisciplined", 
@@ -25,136 +48,160 @@ SUBREDDITS = [
     "apple",
 ]
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS posts (
-        id TEXT PRIMARY KEY,
-        title TEXT NOT NULL,
-        author TEXT,
-        subreddit TEXT,
-        url TEXT,
-        flair TEXT,
-        timestamp TEXT,
-        created_utc REAL,
-        score INTEGER,
-        num_comments INTEGER,
-        selftext TEXT,
-        scraped_at TEXT
-    )''')
-    conn.commit()
+def init_db(db_path=DB_PATH):
+    """Open the store and upgrade it to the shared schema (see scripts/schema.py)"""
+    conn = connect(db_path, 'ingest')
+    schema.migrate(conn)
     return conn
 
-def save_posts(posts, conn):
-    c = conn.cursor()
-    count = 0
-    for post in posts:
-        try:
-            c.execute('''INSERT OR REPLACE INTO posts 
-                (id, title, author, subreddit, url, flair, timestamp, score, num_comments, selftext, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                (post['id'], post['title'], post['author'], post['subreddit'],
-                 post['url'], post.get('flair', ''), post.get('timestamp', ''), 
-                 post.get('score', 0), post.get('num_comments', 0), 
-                 post.get('selftext', ''), datetime.now().isoformat()))
-            count += 1
-        except Exception as e:
-            print(f"Error saving post {post.get('id')}: {e}")
-    conn.commit()
-    return count
-
-def get_existing_ids(conn):
-    c = conn.cursor()
-    c.execute('SELECT id FROM posts')
+POST_COLUMNS = ('id', 'title', 'author', 'subreddit', 'url', 'flair', 'created_utc',
+                'score', 'num_comments', 'selftext', 'collected_at')
+
+def save_posts(posts, conn, batch_size=BATCH_SIZE):
+    """Upsert posts in batches inside one transaction; returns rows written"""
+    collected_at = datetime.now().isoformat()
+
+    def rows():
+        for post in posts:
+            try:
+                yield (post['id'], post['title'], post['author'], post['subreddit'],
+                       post['url'], post.get('flair', ''),
+                       post.get('created_utc'), post.get('score', 0), post.get('num_comments', 0),
+                       post.get('selftext', ''), collected_at)
+            except KeyError as e:
+                print(f"Error saving post {post.get('id')}: missing {e}")
+
+    def on_error(row, e):
+        print(f"Error saving post {row[0]}: {e}")
+
+    return schema.upsert(conn, 'posts', POST_COLUMNS, rows(), batch_size, on_error)
+
+def known_ids(conn, ids):
+    """Return which of ids are already stored (primary-key lookup, no full id set)"""
+    ids = list(ids)
+    if not ids:
+        return set()
+    placeholders = ','.join('?' * len(ids))
+    c = conn.execute(f'SELECT id FROM posts WHERE id IN ({placeholders})', ids)
     return set(row[0] for row in c.fetchall())
 
-def fetch_subreddit(subreddit, after=None):
-    """Fetch posts from a subreddit using the JSON API"""
-    url = f"https://old.reddit.com/r/{subreddit}/new.json?limit=25"
-    if after:
-        url += f"&after={after}"
-    
-    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
-    
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            return data
-    except Exception as e:
-        print(f"Error fetching r/{subreddit}: {e}")
-        return None
+def parse_listing(data):
+    """Split a listing into raw child dicts and the `after` cursor without building posts"""
+    listing = data.get('data', {})
+    return [child.get('data', {}) for child in listing.get('children', [])], listing.get('after', None)
+
+def parse_post(post_data, subreddit):
+    """Build a post dict from one listing child"""
+    return {
+        'id': post_data.get('id', ''),
+        'title': post_data.get('title', ''),
+        'author': post_data.get('author', ''),
+        'subreddit': subreddit,
+        'url': post_data.get('url', ''),
+        'flair': post_data.get('link_flair_text', ''),
+        'created_utc': post_data.get('created_utc', 0),
+        'score': post_data.get('score', 0),
+        'num_comments': post_data.get('num_comments', 0),
+        'selftext': post_data.get('selftext', '')
+    }
 
 def parse_posts(data, subreddit):
     """Parse posts from Reddit JSON response"""
-    posts = []
-    children = data.get('data', {}).get('children', [])
-    
-    for child in children:
-        post_data = child.get('data', {})
-        posts.append({
-            'id': post_data.get('id', ''),
-            'title': post_data.get('title', ''),
-            'author': post_data.get('author', ''),
-            'subreddit': subreddit,
-            'url': post_data.get('url', ''),
-            'flair': post_data.get('link_flair_text', ''),
-            'timestamp': datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat(),
-            'created_utc': post_data.get('created_utc', 0),
-            'score': post_data.get('score', 0),
-            'num_comments': post_data.get('num_comments', 0),
-            'selftext': post_data.get('selftext', '')
-        })
-    
-    return posts, data.get('data', {}).get('after', None)
+    children, after = parse_listing(data)
+    return [parse_post(post_data, subreddit) for post_data in children], after
 
-def main():
-    conn = init_db()
-    existing_ids = get_existing_ids(conn)
-    print(f"Existing posts: {len(existing_ids)}")
-    
+async def crawl(conn, subreddits, base_url=BASE_URL, rate=RATE_LIMIT, concurrency=None,
+                pages=PAGES_PER_SUBREDDIT, target=TARGET_NEW_POSTS, early_stop=True, restart=False):
+    """Crawl every subreddit concurrently, saving new posts as pages arrive
+
+    Each page's ids are checked against the posts table before any post dict
+    is built. new.json is newest-first, so with early_stop paging a subreddit
+    ends at the first page made up entirely of stored posts. A single stored
+    post is not enough: other crawlers write to the same table, so a post they
+    stored can sit on a page next to posts nobody has fetched yet.
+
+    A subreddit whose previous pass was interrupted resumes from its saved
+    cursor; one whose pass finished starts again from the newest page.
+    Hitting the global target leaves the remaining cursors in place.
+    """
+    fetcher = AsyncFetcher(USER_AGENT, rate=rate, concurrency=concurrency or len(subreddits))
+    state = CrawlState(conn, 'scrape_json', restart)
     total_added = 0
-    target = 1000
-    
-    # Scrape multiple pages from each subreddit
-    for subreddit in SUBREDDITS:
-        if total_added >= target:
-            break
-            
-        print(f"\n=== Scraping r/{subreddit} ===")
-        after = None
-        
-        # Fetch 10 pages per subreddit (250 posts)
-        for page in range(10):
+
+    def page_handler(subreddit):
+        def on_page(page, children, after):
+            nonlocal total_added
             if total_added >= target:
-                break
-                
-            print(f"  Page {page+1}...", end=" ")
-            data = fetch_subreddit(subreddit, after)
-            
-            if not data:
-                print("failed")
-                break
-                
-            posts, after = parse_posts(data, subreddit)
-            
-            # Filter out existing posts
-            new_posts = [p for p in posts if p['id'] not in existing_ids]
-            existing_ids.update(p['id'] for p in new_posts)
-            
+                return False
+
+            # Only build dicts for posts that are not stored yet
+            with PROFILER.stage('dedupe', rows=len(children)):
+                known = known_ids(conn, (child.get('id', '') for child in children))
+            with PROFILER.stage('parse') as stage:
+                new_posts = [parse_post(child, subreddit) for child in children
+                             if child.get('id', '') not in known]
+                stage.rows = len(new_posts)
+
+            reached_stored = early_stop and children and not new_posts
+            complete = not after or reached_stored or page + 1 >= pages
+            with PROFILER.stage('db_write', rows=len(new_posts)):
+                with transaction(conn):
+                    count = save_posts(new_posts, conn) if new_posts else 0
+                    state.advance(progress[subreddit], after,
+                                  (child.get('created_utc') for child in children), complete)
             if new_posts:
-                count = save_posts(new_posts, conn)
                 total_added += count
-                print(f"added {count} new posts (total: {total_added})")
+                print(f"  r/{subreddit} page {page+1}: added {count} new posts (total: {total_added})")
             else:
-                print("no new posts")
-            
-            if not after:
-                print("  No more pages")
-                break
-                
-            time.sleep(1)  # Rate limiting
+                print(f"  r/{subreddit} page {page+1}: no new posts")
+            if reached_stored:
+                print(f"  r/{subreddit}: reached stored posts, stopping")
+                return False
+            return total_added < target
+        return on_page
+
+    progress = {subreddit: state.start(subreddit, 'new', pages) for subreddit in subreddits}
+    for subreddit, start in progress.items():
+        if start.resumed:
+            print(f"  r/{subreddit}: resuming at page {start.pages_done + 1} (after {start.after})")
+
+    try:
+        await asyncio.gather(*(
+            crawl_listing(fetcher, f"{base_url}/r/{subreddit}/new.json", parse_listing,
+                          page_handler(subreddit), pages, params={'limit': 25},
+                          after=progress[subreddit].after, start_page=progress[subreddit].pages_done)
+            for subreddit in subreddits
+        ))
+    finally:
+        fetcher.close()
+    print(f"Rate limiter: {fetcher.limiter.summary()}")
+    return total_added
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Reddit new.json listings")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--rate', type=float, default=RATE_LIMIT,
+                        help="global request budget in requests/second")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="max in-flight requests (default: one per subreddit)")
+    parser.add_argument('--pages', type=int, default=PAGES_PER_SUBREDDIT)
+    parser.add_argument('--target', type=int, default=TARGET_NEW_POSTS)
+    parser.add_argument('--full', action='store_true',
+                        help="keep paging past already-stored posts (no early stop)")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore saved cursors and start every subreddit from the newest page")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    profiling.start_from_args(args)
+    conn = init_db(args.db)
+    start_time = time.time()
+    total_added = asyncio.run(crawl(conn, SUBREDDITS, args.base_url, args.rate,
+                                    args.concurrency, args.pages, args.target,
+                                    early_stop=not args.full, restart=args.restart))
     
-    print(f"\n=== Done! Total new posts added: {total_added} ===")
+    print(f"\n=== Done! Total new posts added: {total_added} ({time.time() - start_time:.1f}s) ===")
     
     # Print final stats
     c = conn.cursor()
@@ -162,6 +209,7 @@ def main():
     print(f"Total posts in database: {c.fetchone()[0]}")
     
     conn.close()
+    profiling.stop_from_args(args, 'scrape_json')
 
 if __name__ == "__main__":
     main()
@@ -4,45 +4,48 @@ Scrape Reddit posts from old.reddit.com using browser automation
 """
 import json
 import time
-import sqlite3
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'scripts'))
+import schema
+from db import connect
 
 # Database setup
 DB_PATH = "/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/reddit_posts.db"
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS posts (
-        id TEXT PRIMARY KEY,
-        title TEXT NOT NULL,
-        author TEXT,
-        subreddit TEXT,
-        url TEXT,
-        flair TEXT,
-        timestamp TEXT,
-        created_utc REAL,
-        score INTEGER,
-        num_comments INTEGER,
-        selftext TEXT,
-        scraped_at TEXT
-    )''')
-    conn.commit()
+    conn = connect(DB_PATH, 'ingest')
+    schema.migrate(conn)
     return conn
 
+POST_COLUMNS = ('id', 'title', 'author', 'subreddit', 'url', 'flair', 'created_utc',
+                'score', 'num_comments', 'selftext', 'collected_at')
+
+def parse_timestamp(post):
+    """Epoch seconds of the scraped ISO timestamp; None when it is missing or unparseable"""
+    try:
+        return datetime.fromisoformat(post['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
 def save_posts(posts, conn):
-    c = conn.cursor()
-    for post in posts:
-        try:
-            c.execute('''INSERT OR REPLACE INTO posts 
-                (id, title, author, subreddit, url, flair, timestamp, score, num_comments, selftext, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                (post['id'], post['title'], post['author'], post['subreddit'],
-                 post['url'], post['flair'], post['timestamp'], post['score'],
-                 post['num_comments'], post.get('selftext', ''), datetime.now().isoformat()))
-        except Exception as e:
-            print(f"Error saving post: {e}")
-    conn.commit()
+    collected_at = datetime.now().isoformat()
+
+    def rows():
+        for post in posts:
+            try:
+                yield (post['id'], post['title'], post['author'], post['subreddit'],
+                       post['url'], post['flair'], parse_timestamp(post), post['score'],
+                       post['num_comments'], post.get('selftext', ''), collected_at)
+            except KeyError as e:
+                print(f"Error saving post: missing {e}")
+
+    def on_error(row, e):
+        print(f"Error saving post {row[0]}: {e}")
+
+    schema.upsert(conn, 'posts', POST_COLUMNS, rows(), on_error=on_error)
 
 def get_existing_ids(conn):
     c = conn.cursor()
@@ -4,13 +4,29 @@ Reddit Data Analyzer for Needs Discovery
 分析帖子内容，识别用户需求
 """
 
-import sqlite3
+import argparse
 import json
-import re
 from collections import Counter, defaultdict
+from itertools import chain, groupby
 from datetime import datetime
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+from keyword_matcher import KeywordMatcher
+from topk import GroupedTopK, TopK, top_counts, top_items
+from checkpoint import (AnalysisCheckpoint, RecomputeRequired, content_digest,
+                        NEW, RESCORED, CHANGED)
+from db import connect
+from schema import select_list
+from tokenizer import BASE_STOP_WORDS, Tokenizer
+import profiling
+from profiling import PROFILER
+import columnar
+import dedup
+from keyphrases import KeyphraseModel
+from report import FORMATS as REPORT_FORMATS, SUFFIXES as REPORT_SUFFIXES, open_report, render
 
 # 配置
 DB_PATH = Path('/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/data/reddit_posts.db')
@@ -38,30 +54,65 @@ NEED_CATEGORIES = {
     'social': ['share', 'collaborate', 'team', 'family', 'friend', 'group']
 }
 
-def load_data():
+# 痛点关键词自动机（只编译一次）；关键词转小写后匹配小写文本，命中时报告原始写法
+PAIN_POINT_MATCHER = KeywordMatcher([kw.lower() for kw in PAIN_POINT_KEYWORDS])
+
+# 关键词提取（计数器以词号为键，输出结果和检查点时换回字符串）
+POST_STOP_WORDS = BASE_STOP_WORDS | {
+    'there', 'what', 'when', 'make', 'just', 'over', 'such',
+    'into', 'than', 'them', 'some', 'could', 'other', 'more'
+}
+COMMENT_STOP_WORDS = BASE_STOP_WORDS
+POST_TOKENIZER = Tokenizer(POST_STOP_WORDS)
+COMMENT_TOKENIZER = Tokenizer(COMMENT_STOP_WORDS)
+
+# 流式读取时每块的行数
+CHUNK_SIZE = 5000
+# 报告中展示的痛点帖子数 / 每个类别展示的帖子数
+REPORT_TOP_PAIN = 20
+REPORT_TOP_CATEGORY = 5
+REPORT_TOP_SUBREDDIT = 3
+# 报告中的关键短语数（至少两个词）/ 每个 subreddit 的特色短语数
+# 短语模型保留语料里每个不同的 1~3 词短语，内存随语料增长，只在整体加载的分析里计算，
+# 流式和增量分析（内存只取决于块大小、检查点要小）的报告里没有关键短语
+REPORT_TOP_KEYPHRASES = 20
+REPORT_TOP_SUBREDDIT_KEYPHRASES = 8
+# 增量分析检查点文件（位于 OUTPUT_DIR）
+STATE_FILE = 'analysis_state_needs.db'
+# 分析用到的列（读库和列式数据集都只读这些列；作者、采集时间等不必从驻留表查回）
+POST_COLUMNS = ['id', 'title', 'selftext', 'subreddit', 'score', 'num_comments']
+COMMENT_COLUMNS = ['id', 'post_id', 'body', 'score']
+TABLE_COLUMNS = {'posts': POST_COLUMNS, 'comments': COMMENT_COLUMNS}
+
+def load_data(db_path=DB_PATH):
     """加载数据"""
-    conn = sqlite3.connect(DB_PATH)
-    
-    # 加载帖子
-    posts_df = pd.read_sql_query('SELECT * FROM posts', conn)
-    
-    # 加载评论
-    comments_df = pd.read_sql_query('SELECT * FROM comments', conn)
-    
-    conn.close()
+    with PROFILER.stage('load') as stage:
+        conn = connect(db_path, 'analyze')
+        
+        # 加载帖子
+        posts_df = pd.read_sql_query(f"SELECT {select_list(conn, 'posts', POST_COLUMNS)} FROM posts", conn)
+        
+        # 加载评论
+        comments_df = pd.read_sql_query(f"SELECT {select_list(conn, 'comments', COMMENT_COLUMNS)} FROM comments",
+                                        conn)
+        
+        conn.close()
+        stage.rows = len(posts_df) + len(comments_df)
     
     return posts_df, comments_df
 
+def load_parquet(root, subreddits=None, months=None):
+    """从 columnar.py 导出的数据集加载：只读分析用到的列（内存映射），按原 rowid 排序"""
+    with PROFILER.stage('load') as stage:
+        where = columnar.partition_filter(subreddits, months)
+        posts_df = columnar.read_table(root, 'posts', POST_COLUMNS, where)
+        comments_df = columnar.read_table(root, 'comments', COMMENT_COLUMNS, where)
+        stage.rows = len(posts_df) + len(comments_df)
+    return posts_df, comments_df
+
 def detect_pain_points(text):
     """检测痛点"""
-    text_lower = text.lower()
-    pain_points = []
-    
-    for keyword in PAIN_POINT_KEYWORDS:
-        if keyword in text_lower:
-            pain_points.append(keyword)
-    
-    return pain_points
+    return [PAIN_POINT_KEYWORDS[i] for i in PAIN_POINT_MATCHER.match_indexes(text.lower())]
 
 def categorize_needs(text):
     """分类需求"""
@@ -76,8 +127,10 @@ def categorize_needs(text):
     
     return categories if categories else ['other']
 
-def analyze_posts(posts_df):
-    """分析帖子"""
+def analyze_posts(posts_df, keep=None):
+    """分析帖子（keep 为 dedup_mask() 的结果时近似重复的帖子只计一次）"""
+    if keep is not None:
+        posts_df = posts_df[keep]
     results = {
         'total_posts': len(posts_df),
         'pain_point_posts': [],
@@ -93,7 +146,8 @@ def analyze_posts(posts_df):
         text = f"{row['title']} {row['selftext']}"
         
         # 检测痛点
-        pain_points = detect_pain_points(text)
+        with PROFILER.stage('detect', 1):
+            pain_points = detect_pain_points(text)
         if pain_points:
             pain_count += 1
             results['pain_point_posts'].append({
@@ -106,7 +160,8 @@ def analyze_posts(posts_df):
             })
         
         # 分类需求
-        categories = categorize_needs(text)
+        with PROFILER.stage('categorize', 1):
+            categories = categorize_needs(text)
         for cat in categories:
             results['needs_by_category'][cat].append({
                 'id': row['id'],
@@ -115,15 +170,17 @@ def analyze_posts(posts_df):
             })
         
         # 提取关键词
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        stop_words = {'this', 'that', 'with', 'have', 'from', 'they', 'would', 
-                      'there', 'what', 'when', 'make', 'just', 'over', 'such',
-                      'into', 'than', 'them', 'some', 'could', 'other', 'more'}
-        words = [w for w in words if w not in stop_words]
-        keyword_counter.update(words)
+        with PROFILER.stage('tokenize', 1):
+            keyword_counter.update(POST_TOKENIZER.ids(text))
     
-    results['top_keywords'] = keyword_counter.most_common(50)
+    POST_TOKENIZER.finish_ids(keyword_counter)
+    results['top_keywords'] = top_counts(POST_TOKENIZER.counts(keyword_counter), 50)
+    with PROFILER.stage('keyphrases', len(posts_df)):
+        model = KeyphraseModel.from_texts(_text_column(posts_df, ['title', 'selftext']).tolist(),
+                                          posts_df['subreddit'].tolist())
+    results.update(keyphrase_results(model))
     results['pain_point_count'] = pain_count
+    results['category_counts'] = {cat: len(posts) for cat, posts in results['needs_by_category'].items()}
     
     # 统计每个subreddit
     for subreddit in posts_df['subreddit'].unique():
@@ -133,6 +190,8 @@ def analyze_posts(posts_df):
             'avg_score': sub_posts['score'].mean(),
             'avg_comments': sub_posts['num_comments'].mean()
         }
+    if keep is not None:
+        results['duplicates'] = len(keep) - int(keep.sum())
     
     return results
 
@@ -148,7 +207,8 @@ def analyze_comments(comments_df):
     
     for _, row in comments_df.iterrows():
         if row['body']:
-            pain_points = detect_pain_points(row['body'])
+            with PROFILER.stage('detect', 1):
+                pain_points = detect_pain_points(row['body'])
             if pain_points:
                 results['pain_point_comments'].append({
                     'id': row['id'],
@@ -158,60 +218,631 @@ def analyze_comments(comments_df):
                     'pain_points': pain_points
                 })
             
-            words = re.findall(r'\b[a-z]{4,}\b', row['body'].lower())
-            stop_words = {'this', 'that', 'with', 'have', 'from', 'they', 'would'}
-            words = [w for w in words if w not in stop_words]
-            keyword_counter.update(words)
+            with PROFILER.stage('tokenize', 1):
+                keyword_counter.update(COMMENT_TOKENIZER.ids(row['body']))
     
-    results['top_words'] = keyword_counter.most_common(30)
+    COMMENT_TOKENIZER.finish_ids(keyword_counter)
+    results['top_words'] = top_counts(COMMENT_TOKENIZER.counts(keyword_counter), 30)
     
     return results
 
-def generate_needs_report(posts_analysis, comments_analysis, posts_df):
-    """生成需求报告"""
-    report = []
-    report.append("# Reddit需求分析报告\n")
-    report.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
-    report.append(f"数据来源: Reddit 14个Subreddits\n")
-    report.append(f"分析帖子数: {posts_analysis['total_posts']}\n")
-    report.append(f"痛点帖子数: {posts_analysis['pain_point_count']}\n")
-    report.append(f"分析评论数: {comments_analysis['total_comments']}\n")
-    
-    report.append("\n## 📊 数据概览\n")
-    report.append("| Subreddit | 帖子数 | 平均得分 | 平均评论数 |\n")
-    report.append("|-----------|--------|----------|------------|\n")
-    for sub, stats in posts_analysis['subreddit_stats'].items():
-        report.append(f"| r/{sub} | {stats['total']} | {stats['avg_score']:.1f} | {stats['avg_comments']:.1f} |\n")
-    
-    report.append("\n## 🔥 Top 20 关键词\n")
-    report.append("| 排名 | 关键词 | 出现次数 |\n")
-    report.append("|------|--------|----------|\n")
-    for i, (word, count) in enumerate(posts_analysis['top_keywords'][:20], 1):
-        report.append(f"| {i} | {word} | {count} |\n")
-    
-    report.append("\n## 🎯 识别到的需求（按类别）\n")
-    
-    for category, posts in sorted(posts_analysis['needs_by_category'].items(), key=lambda x: len(x[1]), reverse=True):
-        report.append(f"\n### {category.upper()}\n")
-        report.append(f"发现 {len(posts)} 条相关帖子\n\n")
-        
-        # 按得分排序，取Top 5
-        top_posts = sorted(posts, key=lambda x: x['score'], reverse=True)[:5]
-        for post in top_posts:
-            report.append(f"- [{post['title']}](https://reddit.com/{post['id']}) (Score: {post['score']})\n")
-    
-    report.append("\n## 💡 痛点帖子Top 20\n")
-    pain_posts = sorted(posts_analysis['pain_point_posts'], 
-                       key=lambda x: x['score'], reverse=True)[:20]
-    for post in pain_posts:
-        report.append(f"\n### [{post['title'][:80]}...](https://reddit.com/{post['id']})\n")
-        report.append(f"Subreddit: r/{post['subreddit']} | Score: {post['score']}\n")
-        report.append(f"痛点: {', '.join(post['pain_points'][:3])}\n")
-    
-    return ''.join(report)
+# ---------- 列式分析引擎 ----------
+# 与 analyze_posts/analyze_comments 结果完全一致，但按整列批量计算，避免 iterrows()
+
+# 类别关键词去重后的列表，以及 关键词 × 类别 的从属矩阵
+CATEGORY_NAMES = list(NEED_CATEGORIES) + ['other']
+CATEGORY_KEYWORDS = list(dict.fromkeys(kw for kws in NEED_CATEGORIES.values() for kw in kws))
+CATEGORY_MEMBERSHIP = sp.csr_matrix(
+    np.array([[kw in NEED_CATEGORIES[cat] for cat in NEED_CATEGORIES] for kw in CATEGORY_KEYWORDS],
+             dtype=np.int32)
+)
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
+
+def _text_column(df, columns):
+    """按 f"{a} {b}" 的规则拼接文本列"""
+    text = df[columns[0]].map(str)
+    for column in columns[1:]:
+        text = text + ' ' + df[column].map(str)
+    return text
+
+def keyword_indicator(lower_texts, matcher):
+    """关键词指示矩阵：行=文本，列=matcher的关键词，命中为1（CSR稀疏矩阵）
+
+    每条文本只经过一次自动机扫描，直接产出CSR的列下标。
+    """
+    rows = [matcher.match_indexes(text) for text in lower_texts.tolist()]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    indices = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(indptr[-1]))
+    return sp.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(rows), len(matcher.keywords))
+    )
+
+def category_indicator(lower_texts):
+    """类别指示矩阵：行=文本，列=CATEGORY_NAMES，无类别的行落入 other"""
+    hits = (keyword_indicator(lower_texts, CATEGORY_MATCHER) @ CATEGORY_MEMBERSHIP) > 0
+    other = np.asarray(hits.sum(axis=1)).ravel() == 0
+    matrix = sp.hstack([hits, sp.csr_matrix(other.reshape(-1, 1))], format='csr')
+    matrix.sort_indices()
+    return matrix
+
+def _row_labels(matrix, labels):
+    """CSR矩阵每一行命中的标签列表"""
+    indptr, indices = matrix.indptr, matrix.indices
+    return [[labels[j] for j in indices[indptr[i]:indptr[i + 1]]] for i in range(matrix.shape[0])]
+
+def keyphrase_results(model):
+    """关键短语结果：语料 TF-IDF 最高的短语（至少两个词）和各 subreddit 的特色短语"""
+    with PROFILER.stage('keyphrases'):
+        return {
+            'keyphrases': model.top_phrases(REPORT_TOP_KEYPHRASES, min_words=2),
+            'subreddit_keyphrases': model.distinctive(REPORT_TOP_SUBREDDIT_KEYPHRASES)
+        }
+
+def dedup_mask(frames, threshold=dedup.THRESHOLD):
+    """近似重复检测（dedup.py）：每个簇只保留最早一条帖子的掩码
+
+    frames 为帖子 DataFrame，或按顺序产出其分块的迭代器（流式模式，只遍历一次）。
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    with PROFILER.stage('near_dedup') as stage:
+        texts = chain.from_iterable(_text_column(frame, ['title', 'selftext']).tolist() for frame in frames)
+        keep = dedup.unique_mask(texts, threshold)
+        stage.rows = len(keep)
+    return keep
+
+def analyze_posts_vectorized(posts_df, keep=None):
+    """分析帖子（列式；keep 同 analyze_posts）"""
+    results = _analyze_posts_frame(posts_df if keep is None else posts_df[keep], keyphrases=True)
+    results['top_keywords'] = top_counts(POST_TOKENIZER.counts(results.pop('keyword_counter')), 50)
+    results.update(keyphrase_results(results.pop('keyphrase_model')))
+    if keep is not None:
+        results['duplicates'] = len(keep) - int(keep.sum())
+    return results
+
+def _analyze_posts_frame(posts_df, keyphrases=False):
+    """列式分析一个帖子DataFrame，保留完整的词频Counter以便分块合并；keyphrases=True 时另有短语模型"""
+    lower = _text_column(posts_df, ['title', 'selftext']).str.lower()
+    ids = posts_df['id'].tolist()
+    titles = posts_df['title'].tolist()
+    subreddits = posts_df['subreddit'].tolist()
+    scores = posts_df['score'].tolist()
+
+    with PROFILER.stage('detect', len(posts_df)):
+        pain = keyword_indicator(lower, PAIN_POINT_MATCHER)
+        pain_rows = np.flatnonzero(np.diff(pain.indptr))
+        pain_points = _row_labels(pain[pain_rows], PAIN_POINT_KEYWORDS)
+    with PROFILER.stage('categorize', len(posts_df)):
+        categories = category_indicator(lower)
+        row_categories = _row_labels(categories, CATEGORY_NAMES)
+    pain_point_posts = [{
+        'id': ids[i],
+        'subreddit': subreddits[i],
+        'title': titles[i],
+        'score': scores[i],
+        'pain_points': points,
+        'categories': row_categories[i]
+    } for i, points in zip(pain_rows.tolist(), pain_points)]
+
+    # 类别按首次出现的行排序，与逐行 append 的字典插入顺序一致
+    by_column = categories.tocsc()
+    by_column.sort_indices()
+    needs_by_category = defaultdict(list)
+    columns = [j for j in range(len(CATEGORY_NAMES)) if by_column.indptr[j + 1] > by_column.indptr[j]]
+    columns.sort(key=lambda j: by_column.indices[by_column.indptr[j]])
+    for j in columns:
+        rows = by_column.indices[by_column.indptr[j]:by_column.indptr[j + 1]].tolist()
+        needs_by_category[CATEGORY_NAMES[j]] = [
+            {'id': ids[i], 'title': titles[i], 'score': scores[i]} for i in rows
+        ]
+
+    stats = posts_df.groupby('subreddit', sort=False, dropna=False).agg(
+        total=('subreddit', 'size'),
+        avg_score=('score', 'mean'),
+        avg_comments=('num_comments', 'mean')
+    )
+    with PROFILER.stage('tokenize', len(posts_df)):
+        keyword_counter = POST_TOKENIZER.count_ids(lower.tolist())
+    results = {
+        'total_posts': len(posts_df),
+        'pain_point_posts': pain_point_posts,
+        'needs_by_category': needs_by_category,
+        'category_counts': {cat: len(posts) for cat, posts in needs_by_category.items()},
+        'keyword_counter': keyword_counter,
+        'subreddit_stats': stats.to_dict('index'),
+        'pain_point_count': len(pain_point_posts)
+    }
+    if keyphrases:
+        with PROFILER.stage('keyphrases', len(posts_df)):
+            results['keyphrase_model'] = KeyphraseModel.from_texts(lower.tolist(), subreddits)
+    return results
+
+def analyze_comments_vectorized(comments_df):
+    """分析评论（列式）"""
+    results = _analyze_comments_frame(comments_df)
+    results['top_words'] = top_counts(COMMENT_TOKENIZER.counts(results.pop('word_counter')), 30)
+    return results
+
+def _analyze_comments_frame(comments_df):
+    """列式分析一个评论DataFrame，保留完整的词频Counter以便分块合并"""
+    bodies = comments_df['body']
+    comments = comments_df[bodies.notna() & (bodies.str.len() > 0)]
+    lower = comments['body'].str.lower()
+
+    with PROFILER.stage('detect', len(comments)):
+        pain = keyword_indicator(lower, PAIN_POINT_MATCHER)
+        pain_rows = np.flatnonzero(np.diff(pain.indptr))
+        pain_points = _row_labels(pain[pain_rows], PAIN_POINT_KEYWORDS)
+    with PROFILER.stage('tokenize', len(comments)):
+        word_counts = COMMENT_TOKENIZER.count_ids(lower.tolist())
+    ids = comments['id'].tolist()
+    post_ids = comments['post_id'].tolist()
+    bodies = comments['body'].str.slice(0, 500).tolist()
+    scores = comments['score'].tolist()
+
+    return {
+        'total_comments': len(comments_df),
+        'pain_point_comments': [{
+            'id': ids[i],
+            'post_id': post_ids[i],
+            'body': bodies[i],
+            'score': scores[i],
+            'pain_points': points
+        } for i, points in zip(pain_rows.tolist(), pain_points)],
+        'word_counter': word_counts
+    }
+
+# ---------- 流式分析 ----------
+# 按块读取、逐块列式分析后合并；只保留计数器和报告需要的 Top K，内存与总行数无关
+
+class PostsAccumulator:
+    """帖子分析结果的分块合并"""
+
+    def __init__(self, pain_top_k=REPORT_TOP_PAIN, category_top_k=REPORT_TOP_CATEGORY,
+                 subreddit_top_k=REPORT_TOP_SUBREDDIT):
+        self.total = 0
+        self.pain_count = 0
+        self.pain_posts = TopK(pain_top_k)
+        self.category_posts = GroupedTopK(category_top_k)
+        self.subreddit_pain_posts = GroupedTopK(subreddit_top_k)
+        self.category_counts = Counter()
+        self.keyword_counter = Counter()
+        # subreddit -> [帖子数, 得分和, 有得分的帖子数, 评论数和, 有评论数的帖子数]；
+        # 均值与 pandas mean() 一样跳过空值
+        self.subreddit_sums = {}
+        self._seq = 0
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def update(self, posts_df):
+        part = _analyze_posts_frame(posts_df)
+        self.total += part['total_posts']
+        self.pain_count += part['pain_point_count']
+        for post in part['pain_point_posts']:
+            seq = self._next_seq()
+            self.pain_posts.push(post['score'], seq, post)
+            self.subreddit_pain_posts.push(post['subreddit'], post['score'], seq, post)
+        for cat, posts in part['needs_by_category'].items():
+            for post in posts:
+                self.category_posts.push(cat, post['score'], self._next_seq(), post)
+        self.category_counts.update(part['category_counts'])
+        self.keyword_counter.update(part['keyword_counter'])
+
+        sums = posts_df.groupby('subreddit', sort=False, dropna=False).agg(
+            total=('subreddit', 'size'),
+            score=('score', 'sum'),
+            scored=('score', 'count'),
+            comments=('num_comments', 'sum'),
+            commented=('num_comments', 'count')
+        )
+        for sub, row in zip(sums.index.tolist(), sums.itertuples(index=False)):
+            acc = self.subreddit_sums.setdefault(sub, [0, 0, 0, 0, 0])
+            acc[0] += int(row.total)
+            acc[1] += int(row.score)
+            acc[2] += int(row.scored)
+            acc[3] += int(row.comments)
+            acc[4] += int(row.commented)
+        return self
+
+    def rescore(self, posts_df, old_scores, old_comments):
+        """文本未变、只有得分/评论数变化的帖子：更新均值和 Top K
+
+        返回 False 表示无法精确更新（需要全量重算）。
+        """
+        for sub, score, comments, old_score, old_comment in zip(
+                posts_df['subreddit'].tolist(), posts_df['score'].tolist(),
+                posts_df['num_comments'].tolist(), old_scores, old_comments):
+            acc = self.subreddit_sums[sub]
+            _add_value(acc, 1, old_score, -1)
+            _add_value(acc, 1, score, 1)
+            _add_value(acc, 3, old_comment, -1)
+            _add_value(acc, 3, comments, 1)
+
+        part = _analyze_posts_frame(posts_df)
+        exact = True
+        for post in part['pain_point_posts']:
+            seq = self._next_seq()
+            match = lambda old, i=post['id']: old['id'] == i
+            exact &= self.pain_posts.rescore(match, post['score'], seq, post)
+            exact &= self.subreddit_pain_posts.rescore(post['subreddit'], match, post['score'], seq, post)
+        for cat, posts in part['needs_by_category'].items():
+            for post in posts:
+                exact &= self.category_posts.rescore(cat, lambda old, i=post['id']: old['id'] == i,
+                                                     post['score'], self._next_seq(), post)
+        return exact
+
+    def to_state(self):
+        """序列化为可JSON保存的检查点状态"""
+        return {
+            'total': self.total,
+            'pain_count': self.pain_count,
+            'pain_posts': self.pain_posts.to_state(),
+            'category_posts': self.category_posts.to_state(),
+            'subreddit_pain_posts': self.subreddit_pain_posts.to_state(),
+            'category_counts': dict(self.category_counts),
+            'keyword_counter': dict(POST_TOKENIZER.counts(self.keyword_counter)),
+            'subreddit_sums': [[sub] + sums for sub, sums in self.subreddit_sums.items()],
+            'seq': self._seq
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if 'subreddit_pain_posts' not in state or any(len(row) != 6 for row in state['subreddit_sums']):
+            raise RecomputeRequired('old checkpoint format')
+        acc = cls()
+        acc.total = state['total']
+        acc.pain_count = state['pain_count']
+        acc.pain_posts = TopK.from_state(state['pain_posts'])
+        acc.category_posts = GroupedTopK.from_state(state['category_posts'])
+        acc.subreddit_pain_posts = GroupedTopK.from_state(state['subreddit_pain_posts'])
+        acc.category_counts = Counter(state['category_counts'])
+        acc.keyword_counter = POST_TOKENIZER.id_counts(state['keyword_counter'])
+        acc.subreddit_sums = {row[0]: row[1:] for row in state['subreddit_sums']}
+        acc._seq = state['seq']
+        return acc
+
+    def result(self):
+        return {
+            'total_posts': self.total,
+            'pain_point_posts': self.pain_posts.items(),
+            'needs_by_category': self.category_posts.items(),
+            'subreddit_pain_posts': self.subreddit_pain_posts.items(),
+            'category_counts': dict(self.category_counts),
+            'top_keywords': top_counts(POST_TOKENIZER.counts(self.keyword_counter), 50),
+            'subreddit_stats': {
+                sub: {'total': total, 'avg_score': _mean(score, scored), 'avg_comments': _mean(comments, commented)}
+                for sub, (total, score, scored, comments, commented) in self.subreddit_sums.items()
+            },
+            'pain_point_count': self.pain_count
+        }
+
+def _add_value(acc, i, value, sign):
+    """把可能为空的值计入 acc[i]（和）与 acc[i + 1]（非空个数），sign = -1 时扣除"""
+    if not pd.isna(value):
+        acc[i] += sign * value
+        acc[i + 1] += sign
+
+def _mean(total, count):
+    """非空值的均值；全为空时与 pandas 一样为 NaN"""
+    return total / count if count else float('nan')
+
+class CommentsAccumulator:
+    """评论分析结果的分块合并"""
+
+    def __init__(self, pain_top_k=REPORT_TOP_PAIN):
+        self.total = 0
+        self.pain_comments = TopK(pain_top_k)
+        self.word_counter = Counter()
+        self._seq = 0
+
+    def update(self, comments_df):
+        part = _analyze_comments_frame(comments_df)
+        self.total += part['total_comments']
+        for comment in part['pain_point_comments']:
+            self._seq += 1
+            self.pain_comments.push(comment['score'], self._seq, comment)
+        self.word_counter.update(part['word_counter'])
+        return self
+
+    def rescore(self, comments_df):
+        """文本未变、只有得分变化的评论。返回 False 表示无法精确更新"""
+        exact = True
+        for comment in _analyze_comments_frame(comments_df)['pain_point_comments']:
+            self._seq += 1
+            exact &= self.pain_comments.rescore(lambda old, i=comment['id']: old['id'] == i,
+                                                comment['score'], self._seq, comment)
+        return exact
+
+    def to_state(self):
+        """序列化为可JSON保存的检查点状态"""
+        return {
+            'total': self.total,
+            'pain_comments': self.pain_comments.to_state(),
+            'word_counter': dict(COMMENT_TOKENIZER.counts(self.word_counter)),
+            'seq': self._seq
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls()
+        acc.total = state['total']
+        acc.pain_comments = TopK.from_state(state['pain_comments'])
+        acc.word_counter = COMMENT_TOKENIZER.id_counts(state['word_counter'])
+        acc._seq = state['seq']
+        return acc
+
+    def result(self):
+        return {
+            'total_comments': self.total,
+            'pain_point_comments': self.pain_comments.items(),
+            'top_words': top_counts(COMMENT_TOKENIZER.counts(self.word_counter), 30)
+        }
+
+def iter_frames(conn, table, chunk_size=CHUNK_SIZE, min_rowid=0):
+    """流式读取：每次只从游标取 chunk_size 行构造DataFrame（带 _rowid 列）"""
+    columns = select_list(conn, table, TABLE_COLUMNS[table])
+    frames = pd.read_sql_query(f'SELECT rowid AS _rowid, {columns} FROM {table} WHERE rowid >= ? ORDER BY rowid',
+                               conn, params=(min_rowid,), chunksize=chunk_size)
+    while True:
+        with PROFILER.stage('load') as stage:
+            frame = next(frames, None)
+            stage.rows = 0 if frame is None else len(frame)
+        if frame is None:
+            return
+        yield frame
+
+def analyze_stream(db_path=DB_PATH, chunk_size=CHUNK_SIZE, dedup_threshold=None):
+    """流式分析帖子和评论
+
+    dedup_threshold 不为 None 时先扫描一遍帖子算出去重掩码，第二遍只分析每个近似重复簇的第一条。
+    """
+    conn = connect(db_path, 'analyze')
+    keep = None
+    if dedup_threshold is not None:
+        keep = dedup_mask(iter_frames(conn, 'posts', chunk_size), dedup_threshold)
+    posts = PostsAccumulator()
+    offset = 0
+    for chunk in iter_frames(conn, 'posts', chunk_size):
+        if keep is not None:
+            offset += len(chunk)
+            chunk = chunk[keep[offset - len(chunk):offset]]
+        if len(chunk):
+            posts.update(chunk)
+    comments = CommentsAccumulator()
+    for chunk in iter_frames(conn, 'comments', chunk_size):
+        comments.update(chunk)
+    conn.close()
+    posts_analysis = posts.result()
+    if keep is not None:
+        posts_analysis['duplicates'] = len(keep) - int(keep.sum())
+    return posts_analysis, comments.result()
+
+# ---------- 增量分析 ----------
+# 检查点保存累加状态和已处理的最高 rowid；再次运行时只读取其后的行
+
+def _merge_table(conn, checkpoint, table, acc, chunk_size, digest, rescore):
+    """把检查点之后新增/变化的行按 rowid 顺序合并进 acc"""
+    # 从高水位那一行开始读：INSERT OR REPLACE 替换最后一行时会复用同一个 rowid
+    for chunk in iter_frames(conn, table, chunk_size, checkpoint.high_water(table)):
+        records = list(zip(chunk['id'].tolist(), digest(chunk), _nullable(chunk['score']),
+                           _nullable(chunk['num_comments']) if 'num_comments' in chunk else [None] * len(chunk)))
+        kinds = checkpoint.classify(table, records)
+        # 连续同类的行成段处理，保持 rowid 顺序
+        position = 0
+        for kind, group in groupby(kinds, key=lambda k: k[0]):
+            group = list(group)
+            rows = chunk.iloc[position:position + len(group)]
+            position += len(group)
+            if kind == NEW:
+                acc.update(rows)
+            elif kind == RESCORED:
+                if not rescore(acc, rows, group):
+                    raise RecomputeRequired(f'{table} rescore')
+            elif kind == CHANGED:
+                raise RecomputeRequired(f'{table} changed')
+        checkpoint.record(table, records, int(chunk['_rowid'].max()))
+
+    total = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    if total != checkpoint.seen_count(table):
+        raise RecomputeRequired(f'{table} deleted rows')
+
+def _nullable(column):
+    """列转为列表，空值为 None（检查点库里存为 NULL，读回来与 NaN 比较会被当作得分变化）"""
+    return [None if pd.isna(value) else value for value in column.tolist()]
+
+def _post_digests(posts_df):
+    return [content_digest(*r) for r in zip(posts_df['title'].tolist(), posts_df['selftext'].tolist(),
+                                            posts_df['subreddit'].tolist())]
+
+def _comment_digests(comments_df):
+    return [content_digest(*r) for r in zip(comments_df['body'].tolist(), comments_df['post_id'].tolist())]
+
+def _apply_increment(conn, checkpoint, chunk_size):
+    state = checkpoint.get('posts')
+    posts = PostsAccumulator.from_state(state) if state else PostsAccumulator()
+    _merge_table(conn, checkpoint, 'posts', posts, chunk_size, _post_digests,
+                 lambda acc, rows, group: acc.rescore(rows, [g[1] for g in group], [g[2] for g in group]))
+
+    state = checkpoint.get('comments')
+    comments = CommentsAccumulator.from_state(state) if state else CommentsAccumulator()
+    _merge_table(conn, checkpoint, 'comments', comments, chunk_size, _comment_digests,
+                 lambda acc, rows, group: acc.rescore(rows))
+    return posts, comments
+
+def analyze_incremental(db_path=DB_PATH, state_path=None, chunk_size=CHUNK_SIZE):
+    """增量分析：只处理上次检查点之后新增或变化的行，结果与全量计算一致"""
+    state_path = state_path or OUTPUT_DIR / STATE_FILE
+    conn = connect(db_path, 'analyze')
+    checkpoint = AnalysisCheckpoint(state_path, Path(db_path).resolve())
+    try:
+        try:
+            posts, comments = _apply_increment(conn, checkpoint, chunk_size)
+        except RecomputeRequired as e:
+            print(f"   ⚠️ 无法增量合并 ({e})，全量重算")
+            checkpoint.rollback()
+            checkpoint.reset()
+            posts, comments = _apply_increment(conn, checkpoint, chunk_size)
+        checkpoint.set('posts', posts.to_state())
+        checkpoint.set('comments', comments.to_state())
+        checkpoint.commit()
+    finally:
+        checkpoint.close()
+        conn.close()
+    return posts.result(), comments.result()
+
+# 报告模板（见 report.py）；md 的前几节与原来拼接字符串生成的报告内容相同，
+# 但 subreddit 概览按名称排序，计数相同的关键词、类别按名称排序（原报告按首次出现）
+REPORT_TEMPLATES = {
+    'md': {
+        'summary': "# Reddit需求分析报告\n生成时间: {generated}\n数据来源: Reddit 14个Subreddits\n"
+                   "分析帖子数: {total_posts}\n痛点帖子数: {pain_point_count}\n分析评论数: {total_comments}\n",
+        'subreddits': "\n## 📊 数据概览\n| Subreddit | 帖子数 | 平均得分 | 平均评论数 |\n"
+                      "|-----------|--------|----------|------------|\n",
+        'subreddit': "| r/{subreddit} | {total} | {avg_score:.1f} | {avg_comments:.1f} |\n",
+        'keywords': "\n## 🔥 Top {top} 关键词\n| 排名 | 关键词 | 出现次数 |\n|------|--------|----------|\n",
+        'keyword': "| {rank} | {word} | {count} |\n",
+        'categories': "\n## 🎯 识别到的需求（按类别）\n",
+        'category': "\n### {category!u}\n发现 {count} 条相关帖子\n\n{posts}",
+        'category.posts': "- [{title}](https://reddit.com/{id}) (Score: {score})\n",
+        'pain_posts': "\n## 💡 痛点帖子Top {top}\n",
+        'pain_post': "\n### [{title:.80}...](https://reddit.com/{id})\n"
+                     "Subreddit: r/{subreddit} | Score: {score}\n痛点: {pain_points}\n",
+        'subreddit_pain': "\n## 🏷️ 各 Subreddit 痛点帖子Top {top}\n",
+        'subreddit_pain_posts': "\n### r/{subreddit}\n{posts}",
+        'subreddit_pain_posts.posts': "- [{title:.80}](https://reddit.com/{id}) (Score: {score})\n",
+        'keyphrases': "\n## 🔑 Top {top} 关键短语（TF-IDF）\n| 排名 | 短语 | 得分 |\n|------|------|------|\n",
+        'keyphrase': "| {rank} | {phrase} | {score:.1f} |\n",
+        'subreddit_keyphrases': "\n## 🧭 各 Subreddit 特色短语\n",
+        'subreddit_keyphrase': "- r/{subreddit}: {phrases}\n",
+    },
+    'html': {
+        'summary': "<h1>Reddit需求分析报告</h1>\n<p>生成时间: {generated}<br>数据来源: Reddit 14个Subreddits<br>"
+                   "分析帖子数: {total_posts}<br>痛点帖子数: {pain_point_count}<br>分析评论数: {total_comments}</p>\n",
+        'subreddits': "<h2>📊 数据概览</h2>\n<table>\n"
+                      "<tr><th>Subreddit</th><th>帖子数</th><th>平均得分</th><th>平均评论数</th></tr>\n",
+        'subreddit': "<tr><td>r/{subreddit}</td><td>{total}</td><td>{avg_score:.1f}</td><td>{avg_comments:.1f}</td></tr>\n",
+        'keywords': "</table>\n<h2>🔥 Top {top} 关键词</h2>\n<table>\n"
+                    "<tr><th>排名</th><th>关键词</th><th>出现次数</th></tr>\n",
+        'keyword': "<tr><td>{rank}</td><td>{word}</td><td>{count}</td></tr>\n",
+        'categories': "</table>\n<h2>🎯 识别到的需求（按类别）</h2>\n",
+        'category': "<h3>{category!u}</h3>\n<p>发现 {count} 条相关帖子</p>\n<ul>\n{posts}</ul>\n",
+        'category.posts': '<li><a href="https://reddit.com/{id}">{title}</a> (Score: {score})</li>\n',
+        'pain_posts': "<h2>💡 痛点帖子Top {top}</h2>\n",
+        'pain_post': '<h3><a href="https://reddit.com/{id}">{title:.80}...</a></h3>\n'
+                     "<p>Subreddit: r/{subreddit} | Score: {score}<br>痛点: {pain_points}</p>\n",
+        'subreddit_pain': "<h2>🏷️ 各 Subreddit 痛点帖子Top {top}</h2>\n",
+        'subreddit_pain_posts': "<h3>r/{subreddit}</h3>\n<ul>\n{posts}</ul>\n",
+        'subreddit_pain_posts.posts': '<li><a href="https://reddit.com/{id}">{title:.80}</a> (Score: {score})</li>\n',
+        'keyphrases': "<h2>🔑 Top {top} 关键短语（TF-IDF）</h2>\n<table>\n<tr><th>排名</th><th>短语</th><th>得分</th></tr>\n",
+        'keyphrase': "<tr><td>{rank}</td><td>{phrase}</td><td>{score:.1f}</td></tr>\n",
+        'subreddit_keyphrases': "</table>\n<h2>🧭 各 Subreddit 特色短语</h2>\n",
+        'subreddit_keyphrase': "<p>r/{subreddit}: {phrases}</p>\n",
+    },
+}
+# 报告中展示的关键词数
+REPORT_TOP_KEYWORDS = 20
+
+def _subreddit_pain_posts(posts_analysis):
+    """{subreddit: Top K 痛点帖子}：流式/增量分析时已按 subreddit 维护了有界堆，
+    全量分析时在完整的痛点帖子列表上过一遍得到"""
+    grouped = posts_analysis.get('subreddit_pain_posts')
+    if grouped is not None:
+        return grouped
+    top = GroupedTopK(REPORT_TOP_SUBREDDIT)
+    for seq, post in enumerate(posts_analysis['pain_point_posts']):
+        top.push(post['subreddit'], post['score'], seq, post)
+    return top.items()
+
+def write_needs_report(posts_analysis, comments_analysis, report):
+    """把分析结果按块写入 report（report.py 的 md / html / json 报告）
+
+    各类别、痛点帖子和各 subreddit 的高分帖子都用有界堆取前 K 条，不排序全部帖子。
+    """
+    report.row('summary', generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+               total_posts=posts_analysis['total_posts'], pain_point_count=posts_analysis['pain_point_count'],
+               total_comments=comments_analysis['total_comments'])
+
+    report.heading('subreddits')
+    # 顺序只取决于内容：增量分析里被替换的帖子换了 rowid，按首次出现排序会与全量重算不一致
+    for sub, stats in sorted(posts_analysis['subreddit_stats'].items(), key=lambda x: str(x[0])):
+        report.row('subreddit', subreddit=sub, total=stats['total'], avg_score=stats['avg_score'],
+                   avg_comments=stats['avg_comments'])
+
+    report.heading('keywords', top=REPORT_TOP_KEYWORDS)
+    for rank, (word, count) in enumerate(posts_analysis['top_keywords'][:REPORT_TOP_KEYWORDS], 1):
+        report.row('keyword', rank=rank, word=word, count=count)
+
+    report.heading('categories')
+    for category, count in sorted(posts_analysis['category_counts'].items(), key=lambda x: (-x[1], x[0])):
+        posts = top_items(posts_analysis['needs_by_category'][category], REPORT_TOP_CATEGORY,
+                          key=lambda x: x['score'])
+        report.row('category', category=category, count=count,
+                   posts=[{'id': p['id'], 'title': p['title'], 'score': p['score']} for p in posts])
+
+    report.heading('pain_posts', top=REPORT_TOP_PAIN)
+    for post in top_items(posts_analysis['pain_point_posts'], REPORT_TOP_PAIN, key=lambda x: x['score']):
+        report.row('pain_post', id=post['id'], title=post['title'], subreddit=post['subreddit'],
+                   score=post['score'], pain_points=post['pain_points'][:3])
+
+    report.heading('subreddit_pain', top=REPORT_TOP_SUBREDDIT)
+    for sub, posts in sorted(_subreddit_pain_posts(posts_analysis).items(), key=lambda x: str(x[0])):
+        report.row('subreddit_pain_posts', subreddit=sub,
+                   posts=[{'id': p['id'], 'title': p['title'], 'score': p['score']} for p in posts])
+
+    if 'keyphrases' in posts_analysis:
+        report.heading('keyphrases', top=REPORT_TOP_KEYPHRASES)
+        for rank, (phrase, score) in enumerate(posts_analysis['keyphrases'], 1):
+            report.row('keyphrase', rank=rank, phrase=phrase, score=score)
+        report.heading('subreddit_keyphrases')
+        for sub, phrases in sorted(posts_analysis['subreddit_keyphrases'].items(), key=lambda x: str(x[0])):
+            report.row('subreddit_keyphrase', subreddit=sub, phrases=[phrase for phrase, _ in phrases])
+
+def generate_needs_report(posts_analysis, comments_analysis, posts_df=None, fmt='md'):
+    """生成需求报告文本"""
+    return render(lambda report: write_needs_report(posts_analysis, comments_analysis, report),
+                  fmt, REPORT_TEMPLATES, 'Reddit需求分析报告')
+
+# 分析引擎：columnar 为列式批量计算，rowwise 为逐行 iterrows() 实现
+ENGINES = {
+    'columnar': (analyze_posts_vectorized, analyze_comments_vectorized),
+    'rowwise': (analyze_posts, analyze_comments)
+}
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Reddit需求分析')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='columnar',
+                        help='分析引擎（默认 columnar）')
+    parser.add_argument('--db', default=str(DB_PATH), help='SQLite数据库路径')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式分析：分块读取，内存占用只取决于块大小（报告不含关键短语）')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='流式读取的块大小')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量分析：只处理上次检查点之后新增或变化的行（报告不含关键短语）')
+    parser.add_argument('--state', help='检查点文件路径（默认 OUTPUT_DIR/%s）' % STATE_FILE)
+    parser.add_argument('--parquet', metavar='DIR',
+                        help='从 columnar.py 导出的 Parquet 数据集读取（代替 --db）')
+    parser.add_argument('--subreddit', action='append',
+                        help='配合 --parquet 只读取这些 subreddit 的分区（可重复）')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='md', help='报告格式（默认 md）')
+    parser.add_argument('--dedup', nargs='?', type=float, const=dedup.THRESHOLD, metavar='THRESHOLD',
+                        help='近似重复的帖子（MinHash 估计的相似度 >= THRESHOLD，默认 %s）只计一次'
+                             % dedup.THRESHOLD)
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.dedup is not None and args.incremental:
+        parser.error('--dedup 不能与 --incremental 同时使用')
+    if (args.parquet or args.subreddit) and (args.stream or args.incremental):
+        parser.error('--parquet / --subreddit 不能与 --stream / --incremental 同时使用（后两者读取 --db）')
+    if args.subreddit and not args.parquet:
+        parser.error('--subreddit 需要配合 --parquet')
+    profiling.start_from_args(args)
+    analyze_posts_fn, analyze_comments_fn = ENGINES[args.engine]
+
     print("=" * 60)
     print("Reddit Data Analyzer - Needs Discovery Project")
     print("=" * 60)
@@ -219,49 +850,74 @@ def main():
     # 确保输出目录存在
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    # 加载数据
-    print("\n📊 加载数据...")
-    posts_df, comments_df = load_data()
-    print(f"   帖子数: {len(posts_df)}")
-    print(f"   评论数: {len(comments_df)}")
-    
-    # 分析帖子
-    print("\n🔍 分析帖子...")
-    posts_analysis = analyze_posts(posts_df)
-    
-    # 分析评论
-    print("🔍 分析评论...")
-    comments_analysis = analyze_comments(comments_df)
+    if args.incremental or args.stream:
+        print("\n🔍 增量分析..." if args.incremental else "\n🔍 流式分析...")
+        posts_df = None
+        if args.incremental:
+            posts_analysis, comments_analysis = analyze_incremental(args.db, args.state, args.chunk_size)
+        else:
+            posts_analysis, comments_analysis = analyze_stream(args.db, args.chunk_size, args.dedup)
+        print(f"   帖子数: {posts_analysis['total_posts']}")
+        print(f"   评论数: {comments_analysis['total_comments']}")
+    else:
+        # 加载数据
+        print("\n📊 加载数据...")
+        if args.parquet:
+            posts_df, comments_df = load_parquet(args.parquet, args.subreddit)
+        else:
+            posts_df, comments_df = load_data(args.db)
+        print(f"   帖子数: {len(posts_df)}")
+        print(f"   评论数: {len(comments_df)}")
+        
+        keep = None
+        if args.dedup is not None:
+            print("\n🧹 近似重复检测...")
+            keep = dedup_mask(posts_df, args.dedup)
+
+        # 分析帖子
+        print("\n🔍 分析帖子...")
+        posts_analysis = analyze_posts_fn(posts_df, keep)
+        
+        # 分析评论
+        print("🔍 分析评论...")
+        comments_analysis = analyze_comments_fn(comments_df)
+    if 'duplicates' in posts_analysis:
+        print(f"   近似重复: 跳过 {posts_analysis['duplicates']} 条帖子")
     
     # 生成报告
     print("📝 生成报告...")
-    report = generate_needs_report(posts_analysis, comments_analysis, posts_df)
-    
-    # 保存报告
-    report_path = OUTPUT_DIR / 'needs_analysis_report.md'
-    with open(report_path, 'w') as f:
-        f.write(report)
-    
-    # 保存JSON格式的详细数据
-    json_path = OUTPUT_DIR / 'analysis_results.json'
-    with open(json_path, 'w') as f:
-        json.dump({
-            'posts_analysis': {
-                'total_posts': posts_analysis['total_posts'],
-                'pain_point_count': posts_analysis['pain_point_count'],
-                'top_keywords': posts_analysis['top_keywords'],
-                'subreddit_stats': posts_analysis['subreddit_stats']
-            },
-            'comments_analysis': {
-                'total_comments': comments_analysis['total_comments'],
-                'top_words': comments_analysis['top_words']
+    with PROFILER.stage('report'):
+        # 保存报告（逐块写入文件）
+        report_path = OUTPUT_DIR / f'needs_analysis_report{REPORT_SUFFIXES[args.format]}'
+        with open_report(report_path, args.format, REPORT_TEMPLATES, 'Reddit需求分析报告') as report:
+            write_needs_report(posts_analysis, comments_analysis, report)
+        
+        # 保存JSON格式的详细数据
+        json_path = OUTPUT_DIR / 'analysis_results.json'
+        with open(json_path, 'w') as f:
+            results = {
+                'posts_analysis': {
+                    'total_posts': posts_analysis['total_posts'],
+                    'pain_point_count': posts_analysis['pain_point_count'],
+                    'top_keywords': posts_analysis['top_keywords'],
+                    'subreddit_stats': posts_analysis['subreddit_stats']
+                },
+                'comments_analysis': {
+                    'total_comments': comments_analysis['total_comments'],
+                    'top_words': comments_analysis['top_words']
+                }
             }
-        }, f, indent=2)
+            if 'keyphrases' in posts_analysis:
+                results['posts_analysis']['top_keyphrases'] = posts_analysis['keyphrases']
+            if 'duplicates' in posts_analysis:
+                results['posts_analysis']['duplicate_posts'] = posts_analysis['duplicates']
+            json.dump(results, f, indent=2)
     
     print("\n" + "=" * 60)
     print(f"✅ 分析完成!")
     print(f"📁 报告保存在: {report_path}")
     print("=" * 60)
+    profiling.stop_from_args(args, 'analyze_needs')
 
 if __name__ == '__main__':
     main()
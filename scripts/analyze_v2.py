@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 """Reddit需求分析器"""
 
+import argparse
+import os
 import sqlite3
-import re
+import sys
 import json
-from collections import Counter, defaultdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import compress
 from datetime import datetime
 from pathlib import Path
 
+from keyword_matcher import KeywordMatcher
+from topk import TopK, top_counts, top_items
+from checkpoint import (AnalysisCheckpoint, RecomputeRequired, content_digest,
+                        NEW, RESCORED, CHANGED)
+from db import connect
+from schema import select_list
+from tokenizer import BASE_STOP_WORDS, Tokenizer
+import profiling
+from profiling import PROFILER
+import fts
+import columnar
+import dedup
+from report import FORMATS as REPORT_FORMATS, SUFFIXES as REPORT_SUFFIXES, open_report, render
+
 DB_PATH = '/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/data/reddit_posts.db'
 OUTPUT_DIR = Path('/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/reports')
 
@@ -31,20 +50,73 @@ NEED_CATEGORIES = {
     'utilities': ['simple', 'clean', 'minimal', 'fast', 'offline', 'widget', 'shortcut', 'quick']
 }
 
-def load_data():
+# 痛点关键词自动机（只编译一次）；关键词转小写后匹配小写文本，命中时报告原始写法
+PAIN_MATCHER = KeywordMatcher([kw.lower() for kw in PAIN_KEYWORDS])
+
+STOP_WORDS = BASE_STOP_WORDS | {'there', 'what', 'when', 'make', 'just', 'over', 'some', 'could'}
+# 关键词分词器：计数器以词号为键，输出结果和检查点时换回字符串
+TOKENIZER = Tokenizer(STOP_WORDS)
+
+# 流式读取时每次从游标取的行数
+CHUNK_SIZE = 5000
+# 报告中展示的痛点帖子数
+REPORT_TOP_PAIN = 15
+# 多进程模式下每个进程平均分到的 rowid 分片数
+SHARDS_PER_WORKER = 4
+# 增量分析检查点文件（位于 OUTPUT_DIR）
+STATE_FILE = 'analysis_state_v2.db'
+# 分析用到的帖子列（读库和列式数据集都只读这些列；作者、采集时间等不必从驻留表查回）
+POST_COLUMNS = ['id', 'subreddit', 'title', 'score', 'selftext']
+
+def load_data(db_path=DB_PATH):
     """加载数据"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM posts")
-    posts = [dict(row) for row in c.fetchall()]
-    conn.close()
+    with PROFILER.stage('load') as stage:
+        conn = connect(db_path, 'analyze')
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute(f"SELECT {select_list(conn, 'posts', POST_COLUMNS)} FROM posts")
+        posts = [dict(row) for row in c.fetchall()]
+        conn.close()
+        stage.rows = len(posts)
+    return posts
+
+def load_parquet(root, subreddits=None, months=None):
+    """从 columnar.py 导出的数据集加载帖子：只读分析用到的列，按原 rowid 排序"""
+    with PROFILER.stage('load') as stage:
+        table = columnar.read_arrow(root, 'posts', POST_COLUMNS,
+                                    columnar.partition_filter(subreddits, months))
+        posts = table.select(POST_COLUMNS).to_pylist()
+        stage.rows = len(posts)
     return posts
 
+def iter_post_chunks(conn, chunk_size=CHUNK_SIZE, min_rowid=0, max_rowid=None):
+    """流式读取帖子：游标每次只取 chunk_size 行，按块产出（每行带 rowid）"""
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row
+    # 统一结构里 rowid 是 row_id 的别名，不写 AS 时结果列名为 row_id
+    columns = 'rowid AS rowid, ' + select_list(conn, 'posts', POST_COLUMNS)
+    if max_rowid is None:
+        c.execute(f"SELECT {columns} FROM posts WHERE rowid >= ? ORDER BY rowid", (min_rowid,))
+    else:
+        c.execute(f"SELECT {columns} FROM posts WHERE rowid BETWEEN ? AND ? ORDER BY rowid",
+                  (min_rowid, max_rowid))
+    while True:
+        with PROFILER.stage('load') as stage:
+            rows = c.fetchmany(chunk_size)
+            chunk = [dict(row) for row in rows]
+            stage.rows = len(chunk)
+        if not chunk:
+            break
+        yield chunk
+
+def iter_posts(conn, chunk_size=CHUNK_SIZE):
+    """流式读取帖子，逐条产出"""
+    for chunk in iter_post_chunks(conn, chunk_size):
+        yield from chunk
+
 def detect_pain_points(text):
     """检测痛点"""
-    text_lower = text.lower()
-    return [kw for kw in PAIN_KEYWORDS if kw in text_lower]
+    return [PAIN_KEYWORDS[i] for i in PAIN_MATCHER.match_indexes(text.lower())]
 
 def categorize_needs(text):
     """分类需求"""
@@ -55,106 +127,444 @@ def categorize_needs(text):
             found.append(category)
     return found if found else ['other']
 
-def analyze(posts):
-    """分析帖子"""
-    pain_posts = []
-    keyword_counter = Counter()
-    category_counts = defaultdict(list)
-    
-    for post in posts:
-        text = f"{post['title']} {post.get('selftext', '')}"
-        
+def post_text(post):
+    """分析用的文本：标题 + 正文（正文为 NULL 时按空串，与全文索引的 coalesce 一致）"""
+    return f"{post['title']} {post.get('selftext') or ''}"
+
+class NeedsAccumulator:
+    """增量分析状态：逐条喂入帖子，计数器随之累加
+
+    pain_top_k 为 None 时保留全部痛点帖子；流式模式下只保留报告需要的 Top K，
+    此时内存只与 K 和词表大小有关，与帖子总数无关。
+    """
+
+    def __init__(self, pain_top_k=None):
+        self.total = 0
+        self.pain_count = 0
+        self.pain_posts = TopK(pain_top_k)
+        self.keyword_counter = Counter()
+        self.category_counts = Counter()
+        # 处理顺序序号，同分的痛点帖子按它排序
+        self.seq = 0
+
+    @staticmethod
+    def _pain_item(post, pains, categories):
+        return {
+            'id': post['id'],
+            'subreddit': post['subreddit'],
+            'title': post['title'],
+            'score': post['score'],
+            'pains': pains,
+            'categories': categories
+        }
+
+    def add(self, post):
+        text = post_text(post)
+        self.seq += 1
+        self.total += 1
+
         # 痛点检测
-        pains = detect_pains = detect_pain_points(text)
-        if detect_pain_points:
-            pain_posts.append({
-                'id': post['id'],
-                'subreddit': post['subreddit'],
-                'title': post['title'],
-                'score': post['score'],
-                'pains': pains,
-                'categories': categorize_needs(text)
-            })
-        
+        with PROFILER.stage('detect', 1):
+            pains = detect_pain_points(text)
+        with PROFILER.stage('categorize', 1):
+            categories = categorize_needs(text)
+        if pains:
+            self.pain_count += 1
+            self.pain_posts.push(post['score'], self.seq, self._pain_item(post, pains, categories))
+
         # 类别统计
-        for cat in categorize_needs(text):
-            category_counts[cat].append(post)
-        
-        # 关键词提取
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        stop_words = {'this', 'that', 'with', 'have', 'from', 'they', 'would', 'there', 'what', 'when', 'make', 'just', 'over', 'some', 'could'}
-        words = [w for w in words if w not in stop_words]
-        keyword_counter.update(words)
-    
+        self.category_counts.update(categories)
+
+        # 关键词提取（停用词在输出时统一去掉）
+        with PROFILER.stage('tokenize', 1):
+            self.keyword_counter.update(TOKENIZER.ids(text))
+
+    def rescore(self, post):
+        """文本未变、只有得分变化的帖子：只需更新痛点 Top K
+
+        返回 False 表示无法精确更新（需要全量重算）。
+        """
+        text = post_text(post)
+        pains = detect_pain_points(text)
+        if not pains:
+            return True
+        self.seq += 1
+        item = self._pain_item(post, pains, categorize_needs(text))
+        return self.pain_posts.rescore(lambda old: old['id'] == post['id'],
+                                       post['score'], self.seq, item)
+
+    def update(self, posts):
+        for post in posts:
+            self.add(post)
+        return self
+
+    def merge(self, other):
+        """合并排在本状态之后的一段帖子（如下一个 rowid 分片）的分析状态"""
+        self.total += other.total
+        self.pain_count += other.pain_count
+        for score, seq, item in other.pain_posts.entries():
+            self.pain_posts.push(score, self.seq + seq, item)
+        self.seq += other.seq
+        self.keyword_counter.update(other.keyword_counter)
+        self.category_counts.update(other.category_counts)
+        return self
+
+    def _keyword_counts(self):
+        """去掉停用词后以字符串为键的关键词计数"""
+        return TOKENIZER.counts(TOKENIZER.finish_ids(self.keyword_counter))
+
+    def to_state(self):
+        """序列化为可JSON保存的检查点状态（词号只在本进程有效，换回字符串）"""
+        return {
+            'total': self.total,
+            'pain_count': self.pain_count,
+            'pain_posts': self.pain_posts.to_state(),
+            'keyword_counter': dict(self._keyword_counts()),
+            'category_counts': dict(self.category_counts),
+            'seq': self.seq
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls()
+        acc.total = state['total']
+        acc.pain_count = state['pain_count']
+        acc.pain_posts = TopK.from_state(state['pain_posts'])
+        acc.keyword_counter = TOKENIZER.id_counts(state['keyword_counter'])
+        acc.category_counts = Counter(state['category_counts'])
+        acc.seq = state['seq']
+        return acc
+
+    def result(self):
+        # 同频/同数按名称排序，结果与累加顺序无关
+        categories = top_counts(self.category_counts, len(self.category_counts))
+        return {
+            'total': self.total,
+            'pain_posts': self.pain_posts.items(),
+            'pain_count': self.pain_count,
+            'keywords': top_counts(self._keyword_counts(), 30),
+            'categories': dict(categories)
+        }
+
+def dedup_mask(posts, threshold=dedup.THRESHOLD):
+    """近似重复检测（dedup.py）：每个簇只保留最早一条帖子的掩码；posts 可以是生成器，只遍历一次"""
+    with PROFILER.stage('near_dedup') as stage:
+        keep = dedup.unique_mask(map(post_text, posts), threshold)
+        stage.rows = len(keep)
+    return keep
+
+def analyze(posts, pain_top_k=None, keep=None):
+    """分析帖子（posts 可以是列表，也可以是 iter_posts() 的生成器）
+
+    keep 为 dedup_mask() 的结果时跳过近似重复的帖子，每个簇只计一次，
+    结果里另有 duplicates（跳过的帖子数）。
+    """
+    if keep is None:
+        return NeedsAccumulator(pain_top_k).update(posts).result()
+    result = NeedsAccumulator(pain_top_k).update(compress(posts, keep)).result()
+    result['duplicates'] = len(keep) - int(keep.sum())
+    return result
+
+def analyze_fts(db_path=DB_PATH, pain_top_k=None):
+    """用 FTS5 索引分析：痛点帖子和类别计数来自索引查询，关键词词频来自 fts5vocab，
+    只按 rowid 读取痛点帖子本身，不扫描全表。结果与 analyze() 一致
+
+    索引由 fts.py 建立；posts 还没有索引时抛出 fts.MissingIndex
+    """
+    conn = connect(db_path, 'analyze')
+    if not fts.has_fts(conn, 'posts', words=True):
+        conn.close()
+        raise fts.MissingIndex('posts')
+    total = conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    # rowid -> 命中的痛点关键词下标
+    pain_hits = {}
+    with PROFILER.stage('detect') as stage:
+        for index, keyword in enumerate(PAIN_KEYWORDS):
+            for rowid in fts.match_rowids(conn, 'posts', [keyword]):
+                pain_hits.setdefault(rowid, []).append(index)
+        stage.rows = len(pain_hits)
+
+    category_counts = Counter()
+    post_categories = {}
+    with PROFILER.stage('categorize') as stage:
+        for category, keywords in NEED_CATEGORIES.items():
+            rowids = fts.match_rowids(conn, 'posts', keywords)
+            category_counts[category] = len(rowids)
+            for rowid in rowids:
+                post_categories.setdefault(rowid, []).append(category)
+        category_counts['other'] = total - len(post_categories)
+        category_counts = +category_counts
+        stage.rows = len(post_categories)
+
+    # 同分时按 rowid 排序，与按 rowid 顺序逐条累加的结果一致
+    pain_posts = TopK(pain_top_k)
+    columns = select_list(conn, 'posts', ['id', 'subreddit', 'title', 'score'])
+    rowids = sorted(pain_hits)
+    for start in range(0, len(rowids), 500):
+        batch = rowids[start:start + 500]
+        placeholders = ','.join('?' * len(batch))
+        for rowid, post_id, subreddit, title, score in conn.execute(
+                f"SELECT rowid, {columns} FROM posts WHERE rowid IN ({placeholders})", batch):
+            post = {'id': post_id, 'subreddit': subreddit, 'title': title, 'score': score}
+            pains = [PAIN_KEYWORDS[i] for i in pain_hits[rowid]]
+            categories = post_categories.get(rowid, ['other'])
+            pain_posts.push(score, rowid, NeedsAccumulator._pain_item(post, pains, categories))
+
+    with PROFILER.stage('tokenize') as stage:
+        keyword_counter = Counter(fts.word_counts(conn, 'posts'))
+        for word in STOP_WORDS:
+            keyword_counter.pop(word, None)
+        stage.rows = len(keyword_counter)
+    conn.close()
+
     return {
-        'total': len(posts),
-        'pain_posts': pain_posts,
-        'pain_count': len(pain_posts),
-        'keywords': keyword_counter.most_common(30),
-        'categories': dict(category_counts)
+        'total': total,
+        'pain_posts': pain_posts.items(),
+        'pain_count': len(pain_hits),
+        'keywords': top_counts(keyword_counter, 30),
+        'categories': dict(top_counts(category_counts, len(category_counts)))
     }
 
-def generate_report(analysis):
-    """生成报告"""
-    report = []
-    report.append("# Reddit需求分析报告\n")
-    report.append(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n")
-    report.append(f"**数据统计**: {analysis['total']} 条帖子，{analysis['pain_count']} 条痛点帖子\n\n")
-    
-    report.append("## 🔥 Top 20 关键词\n\n")
-    for i, (word, count) in enumerate(analysis['keywords'][:20], 1):
-        report.append(f"{i}. **{word}** - {count} 次\n")
-    
-    report.append("\n## 📊 需求类别分布\n\n")
-    sorted_cats = sorted(analysis['categories'].items(), key=lambda x: len(x[1]), reverse=True)
-    for cat, posts in sorted_cats:
-        report.append(f"- **{cat.title()}**: {len(posts)} 条\n")
-    
-    report.append("\n## 💡 Top 15 痛点需求\n\n")
-    sorted_pain = sorted(analysis['pain_posts'], key=lambda x: x['score'], reverse=True)[:15]
-    for post in sorted_pain:
-        report.append(f"### [{post['title']}](https://reddit.com/{post['id']})\n")
-        report.append(f"- Sub: r/{post['subreddit']} | Score: {post['score']}\n")
-        report.append(f"- 痛点: {', '.join(post['pains'][:3])}\n")
-        report.append(f"- 类别: {', '.join(post['categories'])}\n\n")
-    
-    return ''.join(report)
+def _analyze_shard(task):
+    """工作进程：分析一个 rowid 区间"""
+    db_path, min_rowid, max_rowid, chunk_size = task
+    conn = connect(db_path, 'analyze')
+    acc = NeedsAccumulator(REPORT_TOP_PAIN)
+    for chunk in iter_post_chunks(conn, chunk_size, min_rowid, max_rowid):
+        acc.update(chunk)
+    conn.close()
+    # 词号只在工作进程内有效，以字符串键的状态返回
+    return acc.to_state()
+
+def shard_ranges(db_path, shards):
+    """把 posts 表按 rowid 切成 shards 个连续区间"""
+    conn = connect(db_path, 'analyze')
+    lo, hi = conn.execute("SELECT MIN(rowid), MAX(rowid) FROM posts").fetchone()
+    conn.close()
+    if lo is None:
+        return []
+    step = max(1, -(-(hi - lo + 1) // shards))
+    return [(start, min(start + step - 1, hi)) for start in range(lo, hi + 1, step)]
+
+def analyze_parallel(db_path=DB_PATH, workers=os.cpu_count(), chunk_size=CHUNK_SIZE):
+    """多进程分析：按 rowid 分片并行处理，再按分片顺序确定性地归并
+
+    结果与串行分析完全一致。
+    """
+    # 分片数多于进程数，让快的进程多领几片
+    ranges = shard_ranges(db_path, workers * SHARDS_PER_WORKER)
+    tasks = [(str(db_path), lo, hi, chunk_size) for lo, hi in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() 按提交顺序返回结果，归并顺序固定
+        shards = map(NeedsAccumulator.from_state, pool.map(_analyze_shard, tasks))
+        acc = reduce(NeedsAccumulator.merge, shards, NeedsAccumulator(REPORT_TOP_PAIN))
+    return acc.result()
+
+def post_digest(post):
+    """影响分析结果的文本字段摘要（得分单独比较）"""
+    return content_digest(post['title'], post.get('selftext', ''), post['subreddit'])
+
+def _apply_increment(conn, checkpoint, chunk_size):
+    """把检查点之后新增/变化的行合并进累加状态"""
+    state = checkpoint.get('accumulator')
+    acc = NeedsAccumulator.from_state(state) if state else NeedsAccumulator(REPORT_TOP_PAIN)
+
+    # 从高水位那一行开始读：INSERT OR REPLACE 替换最后一行时会复用同一个 rowid
+    for chunk in iter_post_chunks(conn, chunk_size, checkpoint.high_water('posts')):
+        records = [(post['id'], post_digest(post), post['score'], None) for post in chunk]
+        for post, (kind, _, _) in zip(chunk, checkpoint.classify('posts', records)):
+            if kind == NEW:
+                acc.add(post)
+            elif kind == RESCORED:
+                if not acc.rescore(post):
+                    raise RecomputeRequired(post['id'])
+            elif kind == CHANGED:
+                raise RecomputeRequired(post['id'])
+        checkpoint.record('posts', records, chunk[-1]['rowid'])
+
+    # 有行被删除
+    total = conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    if total != checkpoint.seen_count('posts'):
+        raise RecomputeRequired('deleted rows')
+    return acc
+
+def analyze_incremental(db_path=DB_PATH, state_path=None, chunk_size=CHUNK_SIZE):
+    """增量分析：只处理上次检查点之后新增或变化的行，结果与全量计算一致"""
+    state_path = state_path or OUTPUT_DIR / STATE_FILE
+    conn = connect(db_path, 'analyze')
+    checkpoint = AnalysisCheckpoint(state_path, Path(db_path).resolve())
+    try:
+        try:
+            acc = _apply_increment(conn, checkpoint, chunk_size)
+        except RecomputeRequired as e:
+            print(f"   ⚠️ 无法增量合并 ({e})，全量重算")
+            checkpoint.rollback()
+            checkpoint.reset()
+            acc = _apply_increment(conn, checkpoint, chunk_size)
+        checkpoint.set('accumulator', acc.to_state())
+        checkpoint.commit()
+    finally:
+        checkpoint.close()
+        conn.close()
+    return acc.result()
+
+# 报告模板（见 report.py）；md 的内容与原来拼接字符串生成的报告相同，
+# 但计数相同的关键词、类别按名称排序（原报告按首次出现）
+REPORT_TEMPLATES = {
+    'md': {
+        'summary': "# Reddit需求分析报告\n**生成时间**: {generated}\n\n"
+                   "**数据统计**: {total} 条帖子，{pain_count} 条痛点帖子\n\n",
+        'keywords': "## 🔥 Top {top} 关键词\n\n",
+        'keyword': "{rank}. **{word}** - {count} 次\n",
+        'categories': "\n## 📊 需求类别分布\n\n",
+        'category': "- **{category!t}**: {count} 条\n",
+        'pain_posts': "\n## 💡 Top {top} 痛点需求\n\n",
+        'pain_post': "### [{title}](https://reddit.com/{id})\n"
+                     "- Sub: r/{subreddit} | Score: {score}\n"
+                     "- 痛点: {pains}\n"
+                     "- 类别: {categories}\n\n",
+    },
+    'html': {
+        'summary': "<h1>Reddit需求分析报告</h1>\n<p><b>生成时间</b>: {generated}</p>\n"
+                   "<p><b>数据统计</b>: {total} 条帖子，{pain_count} 条痛点帖子</p>\n",
+        'keywords': "<h2>🔥 Top {top} 关键词</h2>\n<ol>\n",
+        'keyword': "<li><b>{word}</b> - {count} 次</li>\n",
+        'categories': "</ol>\n<h2>📊 需求类别分布</h2>\n<ul>\n",
+        'category': "<li><b>{category!t}</b>: {count} 条</li>\n",
+        'pain_posts': "</ul>\n<h2>💡 Top {top} 痛点需求</h2>\n",
+        'pain_post': '<h3><a href="https://reddit.com/{id}">{title}</a></h3>\n<ul>\n'
+                     "<li>Sub: r/{subreddit} | Score: {score}</li>\n"
+                     "<li>痛点: {pains}</li>\n"
+                     "<li>类别: {categories}</li>\n</ul>\n",
+    },
+}
+# 报告中展示的关键词数
+REPORT_TOP_KEYWORDS = 20
+
+def write_report(analysis, report):
+    """把分析结果按块写入 report（report.py 的 md / html / json 报告）
+
+    痛点帖子用 top_items() 取前 REPORT_TOP_PAIN 条（有界堆，不排序全部痛点帖子），
+    分析时已用 pain_top_k 截断的结果只有 K 条。
+    """
+    report.row('summary', generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+               total=analysis['total'], pain_count=analysis['pain_count'])
+
+    report.heading('keywords', top=REPORT_TOP_KEYWORDS)
+    for rank, (word, count) in enumerate(analysis['keywords'][:REPORT_TOP_KEYWORDS], 1):
+        report.row('keyword', rank=rank, word=word, count=count)
+
+    report.heading('categories')
+    # 类别只有几个，直接排序；同数按名称，与分块/多进程合并的顺序无关
+    for category, count in sorted(analysis['categories'].items(), key=lambda x: (-x[1], x[0])):
+        report.row('category', category=category, count=count)
+
+    report.heading('pain_posts', top=REPORT_TOP_PAIN)
+    for post in top_items(analysis['pain_posts'], REPORT_TOP_PAIN, key=lambda x: x['score']):
+        report.row('pain_post', id=post['id'], title=post['title'], subreddit=post['subreddit'],
+                   score=post['score'], pains=post['pains'][:3], categories=post['categories'])
+
+def generate_report(analysis, fmt='md'):
+    """生成报告文本"""
+    return render(lambda report: write_report(analysis, report), fmt, REPORT_TEMPLATES, 'Reddit需求分析报告')
 
 def main():
+    parser = argparse.ArgumentParser(description='Reddit需求分析器 v2')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite数据库路径')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式分析：分块读取，内存占用只取决于块大小')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='流式读取的块大小')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量分析：只处理上次检查点之后新增或变化的行')
+    parser.add_argument('--state', help='检查点文件路径（默认 OUTPUT_DIR/%s）' % STATE_FILE)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='多进程分析的进程数（0 为单进程）')
+    parser.add_argument('--fts', action='store_true',
+                        help='用FTS5全文索引查询痛点和类别（索引需先用 scripts/fts.py 建立）')
+    parser.add_argument('--parquet', metavar='DIR',
+                        help='从 columnar.py 导出的 Parquet 数据集读取帖子（代替 --db）')
+    parser.add_argument('--subreddit', action='append',
+                        help='配合 --parquet 只读取这些 subreddit 的分区（可重复）')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='md', help='报告格式（默认 md）')
+    parser.add_argument('--dedup', nargs='?', type=float, const=dedup.THRESHOLD, metavar='THRESHOLD',
+                        help='近似重复的帖子（MinHash 估计的相似度 >= THRESHOLD，默认 %s）只计一次'
+                             % dedup.THRESHOLD)
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.dedup is not None and (args.fts or args.workers or args.incremental):
+        parser.error('--dedup 不能与 --fts / --workers / --incremental 同时使用')
+    profiling.start_from_args(args)
+
     print("=" * 60)
     print("Reddit需求分析器 v2")
     print("=" * 60)
     
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    print("\n📊 加载数据...")
-    posts = load_data()
-    print(f"   帖子数: {len(posts)}")
-    
-    print("\n🔍 分析中...")
-    analysis = analyze(posts)
+    if args.fts:
+        print("\n🔍 全文索引分析中...")
+        try:
+            analysis = analyze_fts(args.db, REPORT_TOP_PAIN)
+        except fts.MissingIndex:
+            print(f"   ❌ posts 还没有全文索引，先运行: python scripts/fts.py --db {args.db}")
+            sys.exit(1)
+        print(f"   帖子数: {analysis['total']}")
+    elif args.workers:
+        print(f"\n🔍 多进程分析中 ({args.workers} 个进程)...")
+        analysis = analyze_parallel(args.db, args.workers, args.chunk_size)
+        print(f"   帖子数: {analysis['total']}")
+    elif args.incremental:
+        print("\n🔍 增量分析中...")
+        analysis = analyze_incremental(args.db, args.state, args.chunk_size)
+        print(f"   帖子数: {analysis['total']}")
+    elif args.stream:
+        print("\n🔍 流式分析中...")
+        conn = connect(args.db, 'analyze')
+        # 去重需要先完整扫描一遍算出掩码，第二遍只分析保留的帖子
+        keep = None if args.dedup is None else dedup_mask(iter_posts(conn, args.chunk_size), args.dedup)
+        analysis = analyze(iter_posts(conn, args.chunk_size), pain_top_k=REPORT_TOP_PAIN, keep=keep)
+        conn.close()
+        print(f"   帖子数: {analysis['total']}")
+    else:
+        print("\n📊 加载数据...")
+        posts = load_parquet(args.parquet, args.subreddit) if args.parquet else load_data(args.db)
+        print(f"   帖子数: {len(posts)}")
+        
+        keep = None
+        if args.dedup is not None:
+            print("\n🧹 近似重复检测...")
+            keep = dedup_mask(posts, args.dedup)
+
+        print("\n🔍 分析中...")
+        analysis = analyze(posts, pain_top_k=REPORT_TOP_PAIN, keep=keep)
+    if 'duplicates' in analysis:
+        print(f"   近似重复: 跳过 {analysis['duplicates']} 条")
     
     print("\n📝 生成报告...")
-    report = generate_report(analysis)
-    
-    # 保存报告
-    report_path = OUTPUT_DIR / 'needs_analysis_report.md'
-    with open(report_path, 'w') as f:
-        f.write(report)
-    
-    # 保存JSON
-    json_path = OUTPUT_DIR / 'analysis_results.json'
-    with open(json_path, 'w') as f:
-        json.dump({
-            'total_posts': analysis['total'],
-            'pain_point_posts': analysis['pain_count'],
-            'top_keywords': analysis['keywords'][:20],
-            'category_counts': {k: len(v) for k, v in analysis['categories'].items()}
-        }, f, indent=2)
+    with PROFILER.stage('report'):
+        # 保存报告（逐块写入文件）
+        report_path = OUTPUT_DIR / f'needs_analysis_report{REPORT_SUFFIXES[args.format]}'
+        with open_report(report_path, args.format, REPORT_TEMPLATES, 'Reddit需求分析报告') as report:
+            write_report(analysis, report)
+        
+        # 保存JSON
+        json_path = OUTPUT_DIR / 'analysis_results.json'
+        with open(json_path, 'w') as f:
+            results = {
+                'total_posts': analysis['total'],
+                'pain_point_posts': analysis['pain_count'],
+                'top_keywords': analysis['keywords'][:20],
+                'category_counts': analysis['categories']
+            }
+            if 'duplicates' in analysis:
+                results['duplicate_posts'] = analysis['duplicates']
+            json.dump(results, f, indent=2)
     
     print(f"\n✅ 完成!")
     print(f"📁 报告: {report_path}")
     print(f"📁 数据: {json_path}")
+    profiling.stop_from_args(args, 'analyze_v2')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+asyncio 并发抓取引擎
+每个 subreddit 的翻页是一个独立任务，所有任务共享：
+  - 一个带连接池的 requests.Session（keep-alive 复用连接）
+  - 一个全局限流器（令牌桶 + 限流响应头 + 退避重试，见 rate_limit.py）
+阻塞的 HTTP 请求放在有界线程池中执行，总耗时趋近于限流下限而不是所有延迟之和
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from profiling import PROFILER
+from rate_limit import RateLimiter, RateLimitError
+
+
+class AsyncFetcher:
+    """共享连接池和限流器的并发 JSON 抓取器"""
+
+    def __init__(self, user_agent, rate=1.0, burst=1, concurrency=8, timeout=10, max_retries=5):
+        self.limiter = RateLimiter(rate, burst, max_retries=max_retries,
+                                   retry_exceptions=(requests.ConnectionError, requests.Timeout))
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    async def _get(self, url, params):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, lambda: self.session.get(url, params=params, timeout=self.timeout))
+
+    async def get_json(self, url, params=None):
+        """GET 并解析 JSON；429/5xx 按限流器重试，重试用尽后打印错误并返回 None"""
+        try:
+            response = await self.limiter.call_async(lambda: self._get(url, params))
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, RateLimitError, ValueError) as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+
+async def crawl_listing(fetcher, url, parse, on_page, max_pages, params=None, after=None, start_page=0):
+    """按 after 游标翻页抓取一个列表
+
+    parse(data) -> (items, after)；on_page(page, items, after) 返回 False 时停止翻页，
+    after 为下一页的游标（最后一页为 None）。
+    从断点继续时传入上次的 after 和已完成的页数 start_page，页数上限仍按 max_pages 计。
+    返回本次实际抓取的页数。
+    """
+    pages = start_page
+    while pages < max_pages:
+        page_params = dict(params or {})
+        if after:
+            page_params['after'] = after
+        with PROFILER.stage('fetch', rows=1):
+            data = await fetcher.get_json(url, page_params)
+        if not data:
+            break
+        items, after = parse(data)
+        pages += 1
+        if on_page(pages - 1, items, after) is False or not after:
+            break
+    return pages - start_page
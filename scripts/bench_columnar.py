@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+列式数据集基准测试
+把 reddit_posts.db 放大若干倍，导出为分区 Parquet，对比加载帖子的耗时：
+  - json.load 整个 JSON 转储（posts_all.json 的格式）
+  - pd.read_sql_query 读出全部列（analyze_needs.load_data）
+  - sqlite3.Row 转 dict（analyze_v2.load_data）
+  - Parquet 只读分析用到的列（内存映射）
+以及只取一个 subreddit 时 SQL WHERE 与分区裁剪的对比，并校验分析结果一致
+用法: python scripts/bench_columnar.py --scale 1000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import analyze_needs
+import analyze_v2
+import columnar
+import schema
+from bench_workers import DEFAULT_DB, build_scaled_db
+from db import connect
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def dump_json(db_path, path):
+    """与 posts_all.json 相同的格式：整表转成带缩进的 JSON 数组"""
+    conn = connect(db_path, 'analyze')
+    conn.row_factory = lambda c, row: dict(zip([d[0] for d in c.description], row))
+    posts = conn.execute(f"SELECT {schema.select_list(conn, 'posts')} FROM posts").fetchall()
+    conn.close()
+    with open(path, 'w') as f:
+        json.dump(posts, f, indent=2)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_sql(db_path, columns=None, subreddit=None):
+    conn = connect(db_path, 'analyze')
+    sql, params = f"SELECT {schema.select_list(conn, 'posts', columns)} FROM posts", ()
+    if subreddit:
+        sql, params = f"{sql} WHERE {schema.subreddit_condition(conn, 'posts')}", (subreddit,)
+    df = pd.read_sql_query(sql, conn, params=params)
+    conn.close()
+    return df
+
+
+def size_mb(path):
+    path = Path(path)
+    files = path.rglob('*') if path.is_dir() else [path]
+    return sum(f.stat().st_size for f in files if f.is_file()) / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列式数据集加载基准')
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--scale', type=int, default=1000, help='语料放大倍数')
+    parser.add_argument('--subreddit', default='ADHD')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / 'scaled.db'
+        total = build_scaled_db(args.db, db_path, args.scale)
+        print(f"语料: {total} 条帖子")
+
+        _, export_time = timed(lambda: columnar.export_db(db_path, tmp / 'corpus'))
+        _, dump_time = timed(lambda: dump_json(db_path, tmp / 'posts.json'))
+        print(f"导出 Parquet {export_time:6.2f}s ({size_mb(tmp / 'corpus'):.0f}MB) | "
+              f"JSON {dump_time:6.2f}s ({size_mb(tmp / 'posts.json'):.0f}MB) | "
+              f"SQLite {size_mb(db_path):.0f}MB")
+
+        print("\n加载全部帖子:")
+        cases = [
+            ('json.load', lambda: load_json(tmp / 'posts.json')),
+            ('read_sql_query *', lambda: read_sql(db_path)),
+            ('sqlite3.Row dicts', lambda: analyze_v2.load_data(db_path)),
+            ('parquet 4 列', lambda: columnar.read_table(tmp / 'corpus', 'posts',
+                                                         ['title', 'selftext', 'score', 'subreddit'])),
+            ('parquet -> v2 dicts', lambda: analyze_v2.load_parquet(tmp / 'corpus')),
+        ]
+        baseline = None
+        for name, load in cases:
+            _, elapsed = timed(load)
+            baseline = baseline or elapsed
+            print(f"  {name:<22} {elapsed:7.2f}s  {baseline / elapsed:6.1f}x")
+
+        print(f"\n只加载 r/{args.subreddit}:")
+        sql_df, sql_time = timed(lambda: read_sql(
+            db_path, ['title', 'selftext', 'score', 'subreddit'], args.subreddit))
+        pq_df, pq_time = timed(lambda: columnar.read_table(
+            tmp / 'corpus', 'posts', ['title', 'selftext', 'score', 'subreddit'],
+            columnar.partition_filter([args.subreddit])))
+        assert len(sql_df) == len(pq_df)
+        print(f"  {'read_sql_query WHERE':<22} {sql_time:7.2f}s")
+        print(f"  {'parquet 分区裁剪':<22} {pq_time:7.2f}s  {sql_time / pq_time:6.1f}x  ({len(pq_df)} 行)")
+
+        # 结果校验：列式数据集按原 rowid 排序，分析结果与直接读库完全一致
+        expected = analyze_v2.analyze(analyze_v2.load_data(db_path))
+        assert analyze_v2.analyze(analyze_v2.load_parquet(tmp / 'corpus')) == expected
+        posts_df = columnar.read_table(tmp / 'corpus', 'posts', analyze_needs.POST_COLUMNS)
+        assert analyze_needs.analyze_posts_vectorized(posts_df) == \
+            analyze_needs.analyze_posts_vectorized(read_sql(db_path))
+        print("\n分析结果一致 ✓")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+评论树抓取基准测试（本地桩服务器，praw 指向桩服务器的 OAuth 接口）
+对比旧的逐个帖子抓取 + sleep(0.5) 与 collect_all_comments() 的有界线程池，
+并验证 flatten_comments() 能展开超深的回复链
+用法: python scripts/bench_comments.py --posts 40 --latency 0.3 --rate 10
+"""
+
+import argparse
+import sys
+import time
+from types import SimpleNamespace
+
+import crawl_reddit
+from rate_limit import RateLimiter
+from stub_reddit import StubReddit
+
+SUBREDDIT = 'productivity'
+
+
+def sequential(client, posts, sleep):
+    """旧方式：逐个帖子抓取，每个之后 sleep"""
+    comments = []
+    for post in posts:
+        comments.extend(crawl_reddit.collect_comments(client, post['id'], post['subreddit']))
+        time.sleep(sleep)
+    return comments
+
+
+def deep_chain(depth):
+    """一条 depth 层的回复链（只有 flatten_comments 用到的属性）"""
+    node = None
+    for level in reversed(range(depth)):
+        node = SimpleNamespace(id=f'c{level}', author='user', body='me too', created_utc=0.0,
+                               score=1, parent_id=f't1_c{level - 1}', replies=[node] if node else [])
+    return [node]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='评论树并发抓取基准')
+    parser.add_argument('--posts', type=int, default=40, help='抓取评论的帖子数')
+    parser.add_argument('--latency', type=float, default=0.3, help='桩服务器每个请求的延迟（秒）')
+    parser.add_argument('--rate', type=float, default=10.0, help='共享速率预算（请求/秒）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--depth', type=int, default=20000, help='深层回复链的层数')
+    args = parser.parse_args()
+
+    with StubReddit([SUBREDDIT], posts_per_sub=args.posts, latency=args.latency) as stub:
+        client = crawl_reddit.get_reddit_client(stub.url)
+        posts, _ = crawl_reddit.collect_posts(client, SUBREDDIT, limit=args.posts)
+        print(f"{len(posts)} 个帖子, 延迟 {args.latency}s, 速率预算 {args.rate}/s "
+              f"(下限 {len(posts) / args.rate:.1f}s)")
+
+        start = time.perf_counter()
+        expected = sequential(client, posts, 0.5)
+        print(f"{'串行 + sleep(0.5)':<18} {time.perf_counter() - start:7.2f}s  {len(expected)} 条评论")
+
+        for workers in args.workers:
+            crawl_reddit.LIMITER = RateLimiter(args.rate)
+            start = time.perf_counter()
+            comments = crawl_reddit.collect_all_comments(
+                posts, lambda: crawl_reddit.get_reddit_client(stub.url), workers=workers)
+            elapsed = time.perf_counter() - start
+            assert [c['id'] for c in comments] == [c['id'] for c in expected]
+            print(f"{workers:<3}个线程{'':<10} {elapsed:7.2f}s  {len(comments)} 条评论  "
+                  f"({crawl_reddit.LIMITER.summary()})")
+
+    flat = crawl_reddit.flatten_comments(deep_chain(args.depth), 'p', SUBREDDIT, 20, '')
+    assert len(flat) == args.depth and flat[-1]['id'] == f'c{args.depth - 1}'
+    print(f"{args.depth} 层回复链展开为 {len(flat)} 条（递归上限 {sys.getrecursionlimit()}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+抓取与分析同时访问同一个库的基准测试
+写进程模拟 scrape_json 每页保存一次（25行 + 提交），读进程反复运行 analyze_v2，
+分别使用默认连接（回滚日志）和 db.connect 的 ingest/analyze 配置（WAL），
+统计双方吞吐量和 "database is locked" 错误
+用法: python scripts/bench_concurrent_db.py --seconds 10 --scale 20
+"""
+
+import argparse
+import multiprocessing as mp
+import queue
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import analyze_v2
+import db
+import scrape_json
+from bench_workers import DEFAULT_DB, build_scaled_db
+
+PAGE_SIZE = 25
+
+
+def open_conn(path, profile, wal):
+    if wal:
+        return db.connect(path, profile)
+    return sqlite3.connect(path)
+
+
+def is_locked(error):
+    """只把锁冲突算作 locked，其他 OperationalError（表结构不符等）照常抛出"""
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+def writer(path, wal, seconds, result):
+    """每页 25 条帖子，一页一次提交"""
+    conn = open_conn(path, 'ingest', wal)
+    pages = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        posts = [{
+            'id': f'w{pages:06d}_{i}', 'title': f'New post {pages} {i}: any app for this?',
+            'author': 'writer', 'subreddit': 'productivity', 'url': '', 'score': i,
+            'num_comments': 0, 'selftext': 'I wish there was a tool',
+        } for i in range(PAGE_SIZE)]
+        try:
+            scrape_json.save_posts(posts, conn)
+            pages += 1
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            errors += 1
+    conn.close()
+    result.put(('writer', pages, errors))
+
+
+def reader(path, wal, seconds, result):
+    """反复全量分析"""
+    runs = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            conn = open_conn(path, 'analyze', wal)
+            analyze_v2.analyze(analyze_v2.iter_posts(conn))
+            conn.close()
+            runs += 1
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            errors += 1
+    result.put(('reader', runs, errors))
+
+
+def run(path, wal, seconds):
+    result = mp.Queue()
+    procs = [mp.Process(target=target, args=(path, wal, seconds, result))
+             for target in (writer, reader)]
+    for proc in procs:
+        proc.start()
+    stats = {}
+    while len(stats) < len(procs):
+        try:
+            name, count, errors = result.get(timeout=1)
+            stats[name] = (count, errors)
+        except queue.Empty:
+            # 子进程出错退出时不会交结果，不再等待
+            if any(proc.exitcode for proc in procs):
+                for proc in procs:
+                    proc.terminate()
+                raise RuntimeError('基准进程出错退出')
+    for proc in procs:
+        proc.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取 + 分析并发访问基准')
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--scale', type=int, default=20, help='语料放大倍数')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for wal in (False, True):
+            path = Path(tmp) / f"{'wal' if wal else 'rollback'}.db"
+            total = build_scaled_db(args.db, path, args.scale)
+            # 写进程用 save_posts 写统一结构，旧版库先迁移；build_scaled_db 留下的是 WAL，对照组改回回滚日志
+            conn = scrape_json.init_db(path)
+            if not wal:
+                conn.execute('PRAGMA journal_mode = DELETE')
+            conn.close()
+            stats = run(path, wal, args.seconds)
+            pages, write_errors = stats['writer']
+            runs, read_errors = stats['reader']
+            label = 'WAL + ingest/analyze' if wal else '默认回滚日志'
+            print(f"{label:<20} 语料 {total} 条 | 写入 {pages / args.seconds:7.1f} 页/s "
+                  f"(locked {write_errors}) | 分析 {runs} 次 (locked {read_errors})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+抓取引擎基准测试（本地桩服务器，不访问外网）
+对比逐页串行抓取 + 固定 sleep 与 asyncio 并发抓取 + 全局令牌桶
+用法: python scripts/bench_crawl.py --rate 10 --latency 0.3 --pages 10
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scrape_json
+from stub_reddit import StubReddit
+
+
+def sequential_crawl(conn, base_url, pages, sleep):
+    """旧的抓取方式：逐个 subreddit、逐页请求，每页之后 sleep"""
+    total = 0
+    for subreddit in scrape_json.SUBREDDITS:
+        after = None
+        for _ in range(pages):
+            url = f"{base_url}/r/{subreddit}/new.json?limit=25"
+            if after:
+                url += f"&after={after}"
+            req = urllib.request.Request(url, headers={'User-Agent': scrape_json.USER_AGENT})
+            with urllib.request.urlopen(req, timeout=10) as response:
+                data = json.loads(response.read().decode())
+            posts, after = scrape_json.parse_posts(data, subreddit)
+            total += scrape_json.save_posts(posts, conn)
+            if not after:
+                break
+            time.sleep(sleep)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取引擎基准测试')
+    parser.add_argument('--rate', type=float, default=10.0, help='全局限流（请求/秒）')
+    parser.add_argument('--latency', type=float, default=0.3, help='桩服务器每个请求的延迟（秒）')
+    parser.add_argument('--pages', type=int, default=10, help='每个 subreddit 的页数')
+    args = parser.parse_args()
+
+    subreddits = scrape_json.SUBREDDITS
+    requests_total = len(subreddits) * args.pages
+    print(f"{len(subreddits)} 个 subreddit × {args.pages} 页 = {requests_total} 个请求, "
+          f"延迟 {args.latency}s, 限流 {args.rate}/s (下限 {(requests_total - 1) / args.rate:.1f}s)")
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubReddit(subreddits, posts_per_sub=25 * args.pages, latency=args.latency) as stub:
+        conn = scrape_json.init_db(Path(tmp) / 'sequential.db')
+        start = time.perf_counter()
+        saved = sequential_crawl(conn, stub.url, args.pages, 1 / args.rate)
+        print(f"串行 + sleep:   {time.perf_counter() - start:7.2f}s  {saved} 条")
+        conn.close()
+
+        stub.stats.update(requests=0, connections=0)
+        conn = scrape_json.init_db(Path(tmp) / 'async.db')
+        start = time.perf_counter()
+        saved = asyncio.run(scrape_json.crawl(conn, subreddits, stub.url, args.rate,
+                                              pages=args.pages, target=float('inf')))
+        print(f"asyncio 并发:   {time.perf_counter() - start:7.2f}s  {saved} 条  "
+              f"请求 {stub.stats['requests']} 次 / TCP连接 {stub.stats['connections']} 个")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
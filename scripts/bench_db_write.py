@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+批量写入基准测试
+生成一次模拟抓取（默认 10万帖子 + 100万评论，crawl_reddit 的格式），
+分别用旧的逐行 INSERT 循环和 db.py 的批量写入保存，校验两边数据一致并输出耗时
+用法: python scripts/bench_db_write.py --posts 100000 --comments 1000000 --batch-sizes 500 5000 50000
+"""
+
+import argparse
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+
+import crawl_reddit
+import schema
+from db import transaction
+
+
+def make_crawl(num_posts, num_comments):
+    """生成 crawl_reddit.collect_posts/collect_comments 格式的帖子和评论"""
+    collected_at = '2024-01-01T00:00:00'
+    posts = [{
+        'id': f'p{i:07d}',
+        'subreddit': crawl_reddit.SUBREDDITS[i % len(crawl_reddit.SUBREDDITS)],
+        'title': f'Is there an app that tracks my habits offline? #{i}',
+        'selftext': 'I wish there was a simple tool for this. ' * (i % 8),
+        'author': f'user{i % 5000}',
+        'created_utc': 1_700_000_000.0 + i,
+        'ups': i % 300,
+        'downs': 0,
+        'score': i % 300,
+        'num_comments': i % 40,
+        'is_self': True,
+        'flair': '',
+        'url': f'https://reddit.com/p{i:07d}',
+        'collected_at': collected_at,
+    } for i in range(num_posts)]
+    comments = [{
+        'id': f'c{i:08d}',
+        'post_id': posts[i % num_posts]['id'],
+        'subreddit': posts[i % num_posts]['subreddit'],
+        'author': f'user{i % 7000}',
+        'body': f'Same problem here, I would pay for a fix. {i}',
+        'created_utc': 1_700_000_000.0 + i,
+        'score': i % 25,
+        'parent_id': f't3_{posts[i % num_posts]["id"]}',
+        'is_top_level': i % 3 == 0,
+        'collected_at': collected_at,
+    } for i in range(num_comments)]
+    return posts, comments
+
+
+def save_rowwise(conn, posts, comments, autocommit=False):
+    """旧的保存方式：每行单独写一次（autocommit 时每行提交一次）"""
+    def save():
+        for table, columns, rows in (('posts', crawl_reddit.POST_COLUMNS, posts),
+                                     ('comments', crawl_reddit.COMMENT_COLUMNS, comments)):
+            for row in rows:
+                schema.upsert(conn, table, columns, [tuple(row[col] for col in columns)])
+
+    if autocommit:
+        save()
+    else:
+        with transaction(conn):
+            save()
+
+
+def table_digest(conn):
+    """posts 和 comments 全部内容的摘要"""
+    h = hashlib.blake2b(digest_size=16)
+    for table in ('posts', 'comments'):
+        for row in conn.execute(f"SELECT {schema.select_list(conn, table)} FROM {table} ORDER BY id"):
+            h.update(repr(row).encode())
+    return h.hexdigest()
+
+
+def timed(label, db_path, save):
+    conn = crawl_reddit.init_database(db_path)
+    start = time.perf_counter()
+    save(conn)
+    elapsed = time.perf_counter() - start
+    digest = table_digest(conn)
+    conn.close()
+    print(f"{label:<24} {elapsed:8.2f}s")
+    return elapsed, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='逐行写入 vs 批量写入')
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=1_000_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--autocommit', action='store_true',
+                        help='逐行路径每行提交一次（抓取中途每页保存时的情形，很慢）')
+    args = parser.parse_args()
+
+    posts, comments = make_crawl(args.posts, args.comments)
+    print(f"{len(posts)} 条帖子 + {len(comments)} 条评论")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def rowwise(conn):
+            save_rowwise(conn, posts, comments, args.autocommit)
+
+        base, expected = timed('逐行 execute', Path(tmp) / 'rowwise.db', rowwise)
+        for batch_size in args.batch_sizes:
+            elapsed, digest = timed(
+                f'executemany batch={batch_size}', Path(tmp) / f'bulk_{batch_size}.db',
+                lambda conn: crawl_reddit.save_to_db(conn, posts, comments, batch_size))
+            assert digest == expected, f"batch={batch_size} 写入结果与逐行不一致"
+            print(f"{'':<24} 加速比 {base / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
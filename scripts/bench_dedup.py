@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+近似重复检测基准测试
+合成语料（synthetic.py）里按比例插入转帖：复制之前一条带正文的帖子，
+标题后加 " (r/xxx)"、正文随机替换一个词。对比：
+  - 两两比较：所有帖子对算精确的 shingle Jaccard 相似度（只在小样本上跑，按 N² 外推）
+  - MinHash + LSH（dedup.py）：各规模下的签名/聚类耗时
+并检查 LSH 的结果：
+  - 召回：精确相似度达到阈值（以及高出阈值 MARGIN）的转帖，有多少与原帖分在同一簇；
+    签名估计的标准差约 0.03，刚过阈值的转帖有一部分会漏掉
+  - 误合并：被去掉的帖子与其簇代表的精确相似度低于阈值的条数（簇内的传递合并也算在内）
+用法: python scripts/bench_dedup.py --posts 1000000 --pairwise 2000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+import dedup
+from synthetic import CorpusGenerator
+
+# 转帖占全部帖子的比例
+REPOST_RATE = 0.1
+# 单独统计召回的“明显重复”：精确相似度高出阈值的幅度
+MARGIN = 0.05
+
+
+def make_corpus(total, seed=0, repost_rate=REPOST_RATE):
+    """(texts, reposts)：reposts 为 [(转帖下标, 原帖下标)]"""
+    generator = CorpusGenerator(seed)
+    rng = random.Random(seed)
+    texts, with_body, reposts = [], [], []
+    for n in range(total):
+        if with_body and rng.random() < repost_rate:
+            source = rng.choice(with_body)
+            title, body = texts[source]
+            words = body.split()
+            words[rng.randrange(len(words))] = generator.words[rng.randrange(len(generator.words))]
+            reposts.append((n, source))
+            texts.append((f"{title} (r/{rng.choice(['apps', 'ios', 'productivity'])})", ' '.join(words)))
+            continue
+        post, _ = generator.post(n)
+        if len(post['selftext'].split()) >= 20:
+            with_body.append(n)
+        texts.append((post['title'], post['selftext']))
+    return [f"{title} {body}" for title, body in texts], reposts
+
+
+def shingles(text, size=dedup.SHINGLE_SIZE):
+    words = dedup.TOKEN_RE.findall(text.lower())
+    return frozenset(tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1)))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def pairwise(texts, threshold):
+    """两两比较：精确相似度达到阈值的帖子对数"""
+    sets = [shingles(text) for text in texts]
+    pairs = 0
+    for i in range(len(sets)):
+        for j in range(i):
+            if jaccard(sets[i], sets[j]) >= threshold:
+                pairs += 1
+    return pairs
+
+
+def check(texts, reposts, labels, threshold):
+    """([(阈值, 应找到的转帖数, 找到的)], 误合并数)"""
+    recall = []
+    similarities = [(jaccard(shingles(texts[repost]), shingles(texts[source])), labels[repost] == labels[source])
+                    for repost, source in reposts]
+    for cutoff in (threshold, threshold + MARGIN):
+        hits = [same for similarity, same in similarities if similarity >= cutoff]
+        recall.append((cutoff, len(hits), sum(hits)))
+    removed = np.flatnonzero(labels != np.arange(len(labels)))
+    wrong = sum(jaccard(shingles(texts[i]), shingles(texts[labels[i]])) < threshold for i in removed.tolist())
+    return recall, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description='近似重复检测基准')
+    parser.add_argument('--posts', type=int, default=1000000, help='最大规模（从 1/100 起每次乘 10）')
+    parser.add_argument('--pairwise', type=int, default=2000, help='两两比较的样本帖子数')
+    parser.add_argument('--threshold', type=float, default=dedup.THRESHOLD)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bands, rows = dedup.lsh_params(args.threshold)
+    print(f"阈值 {args.threshold}  签名 {dedup.NUM_PERM} 个哈希，LSH {bands} 段 × {rows} 行")
+
+    texts, _ = make_corpus(args.pairwise, args.seed)
+    start = time.perf_counter()
+    pairs = pairwise(texts, args.threshold)
+    elapsed = time.perf_counter() - start
+    print(f"两两比较 {args.pairwise:>9} 条  {elapsed:8.2f}s  相似对 {pairs}"
+          f"  （外推到 {args.posts} 条约 {elapsed * (args.posts / args.pairwise) ** 2 / 3600:.0f} 小时）")
+
+    sizes = [n for n in (args.posts // 100, args.posts // 10, args.posts) if n >= args.pairwise] or [args.posts]
+    for total in sizes:
+        texts, reposts = make_corpus(total, args.seed)
+        start = time.perf_counter()
+        signatures, empty = dedup.MinHasher().signatures(texts)
+        signed = time.perf_counter()
+        labels = dedup.cluster(signatures, empty, args.threshold)
+        done = time.perf_counter()
+        removed = int((labels != np.arange(total)).sum())
+        print(f"MinHash+LSH {total:>9} 条  签名 {signed - start:7.2f}s  聚类 {done - signed:6.2f}s"
+              f"  每条 {(done - start) / total * 1e6:5.1f}µs  去掉 {removed} 条")
+        if total == sizes[0]:
+            recall, wrong = check(texts, reposts, labels, args.threshold)
+            for cutoff, expected, found in recall:
+                print(f"  相似度 >= {cutoff:.2f} 的转帖召回 {found}/{expected} = {found / max(expected, 1):.1%}")
+            print(f"  误合并 {wrong}/{removed} 条（与簇代表的精确相似度低于阈值）")
+
+
+if __name__ == '__main__':
+    main()
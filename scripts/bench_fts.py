@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+FTS5 全文索引基准测试
+把 reddit_posts.db 放大若干倍，对比：
+  - 临时查询 "r/<sub> 里哪些帖子提到 'wish there was'"：全表读取 + Python 子串匹配 vs FTS 索引
+  - analyze_v2 全量扫描 vs --fts 模式（校验结果一致）
+用法: python scripts/bench_fts.py --scale 50
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import analyze_v2
+import fts
+import schema
+from bench_workers import DEFAULT_DB, build_scaled_db
+from db import connect
+
+
+def scan_search(conn, phrase, subreddit):
+    """不用索引：读出全部帖子再在 Python 里匹配"""
+    phrase = phrase.lower()
+    columns = schema.select_list(conn, 'posts', ['subreddit', 'title', 'selftext'])
+    return [row[0] for row in conn.execute(f"SELECT rowid, {columns} FROM posts")
+            if row[1] == subreddit and phrase in f"{row[2]} {row[3]}".lower()]
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FTS5 全文索引基准')
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--scale', type=int, default=50, help='语料放大倍数')
+    parser.add_argument('--phrase', default='wish there was')
+    parser.add_argument('--subreddit', default='ADHD')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'scaled.db'
+        total = build_scaled_db(args.db, db_path, args.scale)
+        print(f"语料: {total} 条帖子")
+
+        conn = connect(db_path, 'ingest')
+        _, build_time = timed(lambda: fts.ensure_fts(conn, 'posts'))
+        conn.close()
+        print(f"建立索引 {build_time:8.2f}s")
+
+        conn = connect(db_path, 'analyze')
+        expected, scan_time = timed(lambda: scan_search(conn, args.phrase, args.subreddit), 3)
+        found, fts_time = timed(lambda: [row[0] for row in fts.search(
+            conn, 'posts', [args.phrase], schema.subreddit_condition(conn, 'posts'), (args.subreddit,), 'rowid')], 3)
+        assert found == expected
+        print(f"查询 '{args.phrase}' in r/{args.subreddit}（{len(found)} 条）: "
+              f"全表 {scan_time * 1000:8.1f}ms | FTS {fts_time * 1000:6.1f}ms")
+        conn.close()
+
+        serial, scan_time = timed(lambda: analyze_v2.analyze(analyze_v2.load_data(db_path)))
+        indexed, fts_time = timed(lambda: analyze_v2.analyze_fts(db_path))
+        assert indexed == serial, "--fts 结果与全量扫描不一致"
+        print(f"analyze_v2 全量 {scan_time:8.2f}s | --fts {fts_time:6.2f}s  加速比 {scan_time / fts_time:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
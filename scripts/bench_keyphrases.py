@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+关键短语基准测试
+在 N 条合成帖子（synthetic.py）上对比：
+  - CountVectorizer(ngram_range=(1, 3)) 拟合 帖子 × 短语 矩阵，再按列求 doc_freq / term_freq
+  - KeyphraseModel.from_texts()（numpy 错位生成 n-gram 键）
+两者用同样的预处理、分词规则和停用词，每个短语的 doc_freq / term_freq 必须一致。
+另外给出打分耗时
+用法: python scripts/bench_keyphrases.py --posts 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+import keyphrases
+from keyphrases import KeyphraseModel
+from synthetic import CorpusGenerator
+
+
+def make_corpus(total, seed=0):
+    generator = CorpusGenerator(seed)
+    texts, groups = [], []
+    for n in range(total):
+        post, _ = generator.post(n)
+        texts.append(f"{post['title']} {post['selftext']}")
+        groups.append(post['subreddit'])
+    return texts, groups
+
+
+def count_vectorizer(texts):
+    """{短语: (doc_freq, term_freq)}"""
+    vectorizer = CountVectorizer(ngram_range=keyphrases.NGRAM_RANGE, preprocessor=keyphrases.normalize,
+                                 token_pattern=keyphrases.TOKEN_RE.pattern,
+                                 stop_words=list(keyphrases.STOP_WORDS))
+    counts = vectorizer.fit_transform(texts).tocsc()
+    doc_freq = np.diff(counts.indptr)
+    term_freq = np.asarray(counts.sum(axis=0)).ravel()
+    return dict(zip(vectorizer.get_feature_names_out(), zip(doc_freq.tolist(), term_freq.tolist())))
+
+
+def model_counts(model):
+    return {model.phrase(i): (int(model.doc_freq[i]), int(model.term_freq[i])) for i in range(len(model.keys))}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='关键短语基准')
+    parser.add_argument('--posts', type=int, default=20000, help='合成帖子数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    texts, groups = make_corpus(args.posts, args.seed)
+    print(f"帖子: {args.posts} 条")
+
+    expected, elapsed = timed(count_vectorizer, texts)
+    print(f"  {'CountVectorizer 拟合':<24} {elapsed:7.2f}s  短语 {len(expected)}")
+    model, elapsed = timed(KeyphraseModel.from_texts, texts, groups)
+    print(f"  {'KeyphraseModel 拟合':<24} {elapsed:7.2f}s  短语 {len(model.keys)}")
+    assert model_counts(model) == expected, "短语计数与 CountVectorizer 不一致"
+
+    _, elapsed = timed(lambda m: (m.top_phrases(20, min_words=2), m.distinctive()), model)
+    print(f"  {'打分（全局 + 各 subreddit）':<24} {elapsed:7.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+痛点关键词匹配基准测试
+对比逐关键词 `in` 扫描与 Aho-Corasick 单次扫描
+用法: python scripts/bench_keyword_matcher.py --posts 1000000 --keywords 500
+"""
+
+import argparse
+import itertools
+import re
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+from keyword_matcher import KeywordMatcher, ahocorasick
+from analyze_v2 import PAIN_KEYWORDS
+
+DEFAULT_DB = Path(__file__).resolve().parent.parent / 'reddit_posts.db'
+
+
+def load_texts(db_path):
+    """读取 title + selftext 并转小写"""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT title, selftext FROM posts").fetchall()
+    conn.close()
+    return [f"{title} {selftext or ''}".lower() for title, selftext in rows]
+
+
+def build_lexicon(texts, size):
+    """以 PAIN_KEYWORDS 为基础，用语料中的高频二元词组补足到 size 个"""
+    lexicon = [kw.lower() for kw in PAIN_KEYWORDS]
+    bigrams = Counter()
+    for text in texts:
+        words = re.findall(r'[a-z]+', text)
+        bigrams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    seen = set(lexicon)
+    for phrase, _ in bigrams.most_common():
+        if len(lexicon) >= size:
+            break
+        if phrase not in seen:
+            seen.add(phrase)
+            lexicon.append(phrase)
+    return lexicon[:size]
+
+
+def naive_match(lexicon, text):
+    return [kw for kw in lexicon if kw in text]
+
+
+def run(label, func, texts, n_posts):
+    start = time.perf_counter()
+    hits = 0
+    for text in itertools.islice(itertools.cycle(texts), n_posts):
+        hits += len(func(text))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:8.2f}s  {n_posts / elapsed:10.0f} posts/s  hits={hits}")
+    return elapsed, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--keywords', type=int, default=500)
+    args = parser.parse_args()
+
+    texts = load_texts(args.db)
+    lexicon = build_lexicon(texts, args.keywords)
+    print(f"语料: {len(texts)} 条 -> 放大到 {args.posts} 条, 关键词: {len(lexicon)} 个")
+
+    start = time.perf_counter()
+    matchers = {'aho-corasick/py': KeywordMatcher(lexicon, native=False, scan_threshold=0)}
+    if ahocorasick is not None:
+        matchers['aho-corasick/C'] = KeywordMatcher(lexicon)
+    print(f"自动机构建: {time.perf_counter() - start:.3f}s")
+
+    for text in texts:
+        expected = naive_match(lexicon, text)
+        for matcher in matchers.values():
+            assert matcher.match(text) == expected
+
+    naive_time, naive_hits = run('naive `in`', lambda t: naive_match(lexicon, t), texts, args.posts)
+    for label, matcher in matchers.items():
+        ac_time, ac_hits = run(label, matcher.match, texts, args.posts)
+        assert naive_hits == ac_hits
+        print(f"{'':<16} 加速比: {naive_time / ac_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
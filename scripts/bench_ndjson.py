@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+NDJSON 流式导出/导入基准测试
+把 reddit_posts.db 放大若干倍，对比 posts_all.json 式的整体 json.dump/json.load
+与 ndjson.py 的分块流式读写（未压缩 / gzip）：耗时与 Python 堆内存峰值，
+以及按索引随机读取单条记录和批量导回 SQLite 的耗时
+用法: python scripts/bench_ndjson.py --scale 200
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import ndjson
+import schema
+from bench_workers import DEFAULT_DB, build_scaled_db
+from db import connect
+
+
+def measure(func):
+    """返回 (结果, 耗时, 堆内存峰值MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def dump_monolithic(db_path, path):
+    """posts_all.json 的做法：整表读成列表后一次 json.dump"""
+    conn = connect(db_path, 'analyze')
+    conn.row_factory = sqlite3.Row
+    posts = [dict(row) for row in conn.execute(f"SELECT {schema.select_list(conn, 'posts')} FROM posts")]
+    conn.close()
+    with open(path, 'w') as f:
+        json.dump(posts, f, indent=2)
+    return len(posts)
+
+
+def load_monolithic(path):
+    with open(path) as f:
+        return sum(1 for _ in json.load(f))
+
+
+def export_stream(db_path, path):
+    conn = connect(db_path, 'analyze')
+    count = ndjson.export_table(conn, 'posts', path)
+    conn.close()
+    return count
+
+
+def import_stream(db_path, path, table_sql):
+    conn = connect(db_path, 'ingest')
+    if table_sql:
+        conn.execute(table_sql)
+    else:
+        schema.migrate(conn)
+    count = ndjson.import_records(conn, 'posts', path)
+    conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NDJSON 流式导出/导入基准')
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--scale', type=int, default=200, help='语料放大倍数')
+    parser.add_argument('--seeks', type=int, default=200, help='随机读取单条记录的次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / 'scaled.db'
+        total = build_scaled_db(args.db, db_path, args.scale)
+        conn = sqlite3.connect(db_path)
+        table_sql = None
+        if not schema.interned(conn, 'posts'):
+            table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'posts'").fetchone()[0]
+        conn.close()
+        print(f"语料: {total} 条帖子\n")
+
+        def row(name, elapsed, peak, path=None):
+            size = f"{path.stat().st_size / 1024 ** 2:7.0f}MB" if path else ''
+            print(f"  {name:<26} {elapsed:7.2f}s  峰值 {peak:8.1f}MB {size}")
+
+        print("导出:")
+        mono = tmp / 'posts_all.json'
+        _, elapsed, peak = measure(lambda: dump_monolithic(db_path, mono))
+        row('json.dump 整体', elapsed, peak, mono)
+        files = {'ndjson': tmp / 'posts.ndjson', 'ndjson.gz': tmp / 'posts.ndjson.gz'}
+        for name, path in files.items():
+            count, elapsed, peak = measure(lambda: export_stream(db_path, path))
+            assert count == total
+            row(f'{name} 流式', elapsed, peak, path)
+
+        print("\n读取全部记录:")
+        count, elapsed, peak = measure(lambda: load_monolithic(mono))
+        row('json.load 整体', elapsed, peak)
+        for name, path in files.items():
+            count, elapsed, peak = measure(lambda: sum(1 for _ in ndjson.read_records(path)))
+            assert count == total
+            row(f'{name} 流式', elapsed, peak)
+
+        print(f"\n按索引随机读取单条记录 ({args.seeks} 次):")
+        expected = {}
+        with open(files['ndjson']) as f:
+            wanted = set(random.Random(0).sample(range(total), args.seeks))
+            for n, line in enumerate(f):
+                if n in wanted:
+                    expected[n] = json.loads(line)
+        for name, path in files.items():
+            start = time.perf_counter()
+            for n, record in expected.items():
+                assert ndjson.read_record(path, n) == record
+            print(f"  {name:<26} {(time.perf_counter() - start) / args.seeks * 1000:7.2f}ms/条")
+
+        print("\n导回 SQLite（批量 upsert）:")
+        for name, path in files.items():
+            target = tmp / f'import_{name}.db'
+            count, elapsed, peak = measure(lambda: import_stream(target, path, table_sql))
+            assert count == total
+            row(name, elapsed, peak)
+        src = sqlite3.connect(db_path)
+        back = sqlite3.connect(tmp / 'import_ndjson.gz.db')
+        assert src.execute(f"SELECT {schema.select_list(src, 'posts')} FROM posts ORDER BY rowid").fetchall() == \
+            back.execute(f"SELECT {schema.select_list(back, 'posts')} FROM posts ORDER BY rowid").fetchall()
+        print("\n导回的数据与原库一致 ✓")
+
+
+if __name__ == '__main__':
+    main()
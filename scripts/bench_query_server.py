@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+查询服务基准测试
+在合成语料（synthetic.py）上启动 QueryServer，客户端线程用长连接（HTTP/1.1 keep-alive）请求：
+  - 单次查询：各接口未命中缓存时的延迟，对比库里有全文索引和趋势汇总表（fts.py / trends.py）
+    与只有帖子表两种情况
+  - 吞吐：--clients 个线程轮流请求一组常用查询（各 subreddit 的痛点帖子、类别计数、搜索、趋势），
+    对比不缓存（ttl=0，每次都查库）和缓存
+  - 新数据可见：服务运行时抓取器写入一条新帖子，到搜索接口返回它的时间（不超过 check_interval）
+用法: python scripts/bench_query_server.py --posts 200000 --clients 8 --requests 2000
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+import fts
+import trends
+from crawl_reddit import SUBREDDITS, init_database, save_to_db
+from query_server import QueryServer
+from synthetic import generate
+
+# 单次查询的重复次数（取中位数）
+REPEAT = 5
+
+
+def workload():
+    """吞吐测试轮流请求的查询"""
+    paths = [f'/api/pain?{urlencode({"subreddit": sub})}' for sub in SUBREDDITS]
+    paths += [f'/api/categories?{urlencode({"subreddit": sub})}' for sub in SUBREDDITS[:5]]
+    paths += ['/api/pain', '/api/categories', '/api/search?q=dark+mode', '/api/search?q=too+expensive',
+              '/api/trends?period=week', '/api/trends?period=day']
+    return paths
+
+
+class Client:
+    """一条长连接"""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port)
+
+    def get(self, path):
+        self.conn.request('GET', path)
+        response = self.conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f'{path}: {response.status} {body[:200]!r}')
+        return json.loads(body)
+
+    def close(self):
+        self.conn.close()
+
+
+def single_ms(db_path, path):
+    """未命中缓存时一次查询的延迟（毫秒，中位数）"""
+    times = []
+    with QueryServer(db_path, ttl=0) as server:
+        client = Client(server.url)
+        client.get(path)
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            client.get(path)
+            times.append(time.perf_counter() - start)
+        client.close()
+    return statistics.median(times) * 1000
+
+
+def throughput(db_path, ttl, clients, requests):
+    """(每秒请求数, 延迟 p50 毫秒, p99 毫秒)"""
+    paths = workload()
+    latencies = [[] for _ in range(clients)]
+
+    def run(server, index):
+        client = Client(server.url)
+        for n in range(requests // clients):
+            start = time.perf_counter()
+            client.get(paths[(index + n) % len(paths)])
+            latencies[index].append(time.perf_counter() - start)
+        client.close()
+
+    with QueryServer(db_path, ttl=ttl, pool_size=clients) as server:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run, args=(server, i)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    ordered = sorted(t for per_client in latencies for t in per_client)
+    return len(ordered) / elapsed, ordered[len(ordered) // 2] * 1000, ordered[int(len(ordered) * 0.99)] * 1000
+
+
+def freshness(db_path, check_interval):
+    """写入新帖子到搜索接口返回它的秒数"""
+    path = '/api/search?q=zzqfreshnessprobe'
+    with QueryServer(db_path, check_interval=check_interval) as server:
+        client = Client(server.url)
+        assert client.get(path) == [], "探针帖子已存在"
+        writer = init_database(db_path)
+        save_to_db(writer, [{'id': 'probe', 'subreddit': SUBREDDITS[0], 'title': 'zzqfreshnessprobe',
+                             'selftext': '', 'author': 'probe', 'created_utc': int(time.time()), 'ups': 1,
+                             'downs': 0, 'score': 1, 'num_comments': 0, 'is_self': 1, 'flair': None,
+                             'url': '', 'collected_at': None}], [])
+        writer.close()
+        start = time.perf_counter()
+        while not client.get(path):
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        client.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查询服务基准')
+    parser.add_argument('--posts', type=int, default=200000, help='合成帖子数')
+    parser.add_argument('--clients', type=int, default=8, help='并发客户端线程数')
+    parser.add_argument('--requests', type=int, default=2000, help='吞吐测试的总请求数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, indexed = Path(tmp) / 'plain.db', Path(tmp) / 'indexed.db'
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(str(plain), args.posts, args.seed, comments_per_post=0)
+        shutil.copy(plain, indexed)
+        conn = init_database(indexed)
+        fts.ensure_fts(conn, 'posts')
+        trends.ensure_rollups(conn)
+        conn.close()
+        print(f"帖子: {args.posts} 条")
+
+        print("单次查询（未命中缓存）:                 有索引/汇总    只有帖子表")
+        subreddit = urlencode({'subreddit': SUBREDDITS[0]})
+        for label, path in (('痛点帖子 全部', '/api/pain'), ('痛点帖子 单个 subreddit', f'/api/pain?{subreddit}'),
+                            ('类别计数 全部', '/api/categories'), ('类别计数 单个 subreddit', f'/api/categories?{subreddit}'),
+                            ('搜索', '/api/search?q=dark+mode'), ('趋势 按周', '/api/trends?period=week')):
+            line = f"  {label:<24} {single_ms(indexed, path):10.1f}ms"
+            if not path.startswith('/api/trends'):
+                line += f"  {single_ms(plain, path):10.1f}ms"
+            print(line)
+
+        print(f"吞吐（{args.clients} 个客户端，{len(workload())} 种查询轮流，{args.requests} 次请求）:")
+        for label, ttl in (('不缓存', 0), ('缓存', 60.0)):
+            qps, p50, p99 = throughput(indexed, ttl, args.clients, args.requests)
+            print(f"  {label:<8} {qps:8.0f} 请求/秒  p50 {p50:7.2f}ms  p99 {p99:7.2f}ms")
+
+        print(f"  新帖子写入到可查询: {freshness(indexed, 1.0):.2f}s（check_interval=1s）")
+
+
+if __name__ == '__main__':
+    main()
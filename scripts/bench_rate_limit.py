@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+限流器基准测试（本地桩服务器模拟 Reddit 的固定窗口限流，超额返回 429）
+对比：
+  - 旧方式：逐页请求 + 固定 sleep，失败即放弃该 subreddit 剩余页面
+  - RateLimiter：令牌桶 + X-Ratelimit-Remaining/Retry-After + 退避重试
+输出吞吐量、丢失页数、429次数以及等待/请求耗时
+用法: python scripts/bench_rate_limit.py --limit 10 --window 1 --pages 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scrape_json
+from rate_limit import RateLimiter, RateLimitError
+from stub_reddit import StubReddit
+
+
+def crawl_fixed_sleep(session, base_url, subreddits, pages, sleep):
+    """旧的抓取方式：每页之后固定 sleep，请求失败就打印并放弃该 subreddit"""
+    fetched = 0
+    for subreddit in subreddits:
+        after = None
+        for _ in range(pages):
+            params = {'limit': 25}
+            if after:
+                params['after'] = after
+            try:
+                response = session.get(f"{base_url}/r/{subreddit}/new.json", params=params, timeout=10)
+                response.raise_for_status()
+            except requests.RequestException:
+                break
+            _, after = scrape_json.parse_posts(response.json(), subreddit)
+            fetched += 1
+            if not after:
+                break
+            time.sleep(sleep)
+    return fetched
+
+
+def crawl_limited(session, base_url, subreddits, pages, limiter):
+    """同样的串行抓取，节奏和重试交给 RateLimiter"""
+    fetched = 0
+    for subreddit in subreddits:
+        after = None
+        for _ in range(pages):
+            params = {'limit': 25}
+            if after:
+                params['after'] = after
+            try:
+                response = limiter.call(lambda: session.get(
+                    f"{base_url}/r/{subreddit}/new.json", params=params, timeout=10))
+                response.raise_for_status()
+            except (requests.RequestException, RateLimitError):
+                break
+            _, after = scrape_json.parse_posts(response.json(), subreddit)
+            fetched += 1
+            if not after:
+                break
+    return fetched
+
+
+def run(label, stub, expected, crawl):
+    """运行一种抓取方式并打印一行结果"""
+    for key in stub.stats:
+        stub.stats[key] = 0
+    start = time.perf_counter()
+    fetched, limiter = crawl()
+    elapsed = time.perf_counter() - start
+    line = (f"{label:<28} {elapsed:7.2f}s  {fetched / elapsed:6.2f} 页/s  "
+            f"丢失 {expected - fetched:3d} 页  429 {stub.stats['throttled']:3d} 次")
+    if limiter is not None:
+        line += (f"  等待 {limiter.stats['wait_seconds']:.1f}s"
+                 f" / 请求 {limiter.stats['fetch_seconds']:.1f}s")
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='限流器基准测试')
+    parser.add_argument('--limit', type=int, default=10, help='桩服务器每个窗口允许的请求数')
+    parser.add_argument('--window', type=float, default=1.0, help='限流窗口（秒）')
+    parser.add_argument('--latency', type=float, default=0.02, help='桩服务器每个请求的延迟（秒）')
+    parser.add_argument('--subreddits', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=10, help='每个 subreddit 的页数')
+    parser.add_argument('--sleeps', type=float, nargs='+', default=[0.05, 0.5],
+                        help='旧方式的固定 sleep（秒）')
+    args = parser.parse_args()
+
+    subreddits = scrape_json.SUBREDDITS[:args.subreddits]
+    expected = len(subreddits) * args.pages
+    server_rate = args.limit / args.window
+    print(f"{len(subreddits)} 个 subreddit × {args.pages} 页 = {expected} 页, "
+          f"服务端限流 {args.limit} 次/{args.window}s (上限 {server_rate:.1f} 页/s)")
+
+    with tempfile.TemporaryDirectory() as tmp, requests.Session() as session, \
+            StubReddit(subreddits, posts_per_sub=25 * args.pages, latency=args.latency,
+                       rate_limit=(args.limit, args.window)) as stub:
+        session.headers['User-Agent'] = scrape_json.USER_AGENT
+
+        for sleep in args.sleeps:
+            run(f"固定 sleep {sleep}s", stub, expected,
+                lambda: (crawl_fixed_sleep(session, stub.url, subreddits, args.pages, sleep), None))
+
+        for rate in (server_rate, server_rate * 2):
+            limiter = RateLimiter(rate, backoff=0.2)
+            run(f"RateLimiter {rate:g}/s", stub, expected,
+                lambda: (crawl_limited(session, stub.url, subreddits, args.pages, limiter), limiter))
+
+        summaries = []
+
+        def crawl_async():
+            conn = scrape_json.init_db(Path(tmp) / 'async.db')
+            fetched = []
+            original = scrape_json.parse_listing
+
+            def counting_parse(data):
+                fetched.append(data)
+                return original(data)
+
+            scrape_json.parse_listing = counting_parse
+            log = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(log):
+                    asyncio.run(scrape_json.crawl(conn, subreddits, stub.url, server_rate * 2,
+                                                  pages=args.pages, target=float('inf')))
+            finally:
+                scrape_json.parse_listing = original
+                conn.close()
+            summaries.append(log.getvalue().strip().splitlines()[-1])
+            return len(fetched), None
+
+        run(f"scrape_json.crawl {server_rate * 2:g}/s", stub, expected, crawl_async)
+        print(f"  {summaries[0]}（并发任务的等待时间累加）")
+
+
+if __name__ == '__main__':
+    main()
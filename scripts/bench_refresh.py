@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+每日增量刷新基准测试（本地桩服务器）
+先完整抓取一次，再在每个 subreddit 发布少量新帖，比较：
+  - 提前停止（默认）：遇到整页都已入库即停止翻页
+  - --full：照常翻完所有页
+并对比旧的全量 id 集合与按主键查询的内存占用
+用法: python scripts/bench_refresh.py --new-posts 30 --table-size 500000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scrape_json
+from stub_reddit import StubReddit
+
+
+def crawl(conn, stub, subreddits, pages, early_stop):
+    """静默运行 scrape_json.crawl，返回 (新增帖子数, 请求数, 耗时)"""
+    stub.stats['requests'] = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        added = asyncio.run(scrape_json.crawl(conn, subreddits, stub.url, rate=200, pages=pages,
+                                              target=float('inf'), early_stop=early_stop))
+    return added, stub.stats['requests'], time.perf_counter() - start
+
+
+def id_lookup_memory(table_size):
+    """旧的 get_existing_ids() 集合与 known_ids() 一页查询的内存峰值"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE posts (id TEXT PRIMARY KEY)')
+    conn.executemany('INSERT INTO posts VALUES (?)', ((f'id{i:08d}',) for i in range(table_size)))
+    page = [f'id{i:08d}' for i in range(table_size - 10, table_size + 15)]
+
+    tracemalloc.start()
+    existing = set(row[0] for row in conn.execute('SELECT id FROM posts'))
+    new = [i for i in page if i not in existing]
+    full_set = tracemalloc.get_traced_memory()[1]
+    del existing
+    tracemalloc.reset_peak()
+    known = scrape_json.known_ids(conn, page)
+    lookup = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert new == [i for i in page if i not in known]
+    return full_set, lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量刷新基准测试')
+    parser.add_argument('--subreddits', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--new-posts', type=int, default=30, help='每个 subreddit 新发布的帖子数')
+    parser.add_argument('--table-size', type=int, default=500_000, help='内存对比用的表行数')
+    args = parser.parse_args()
+
+    subreddits = scrape_json.SUBREDDITS[:args.subreddits]
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubReddit(subreddits, posts_per_sub=25 * args.pages) as stub:
+        for early_stop in (False, True):
+            conn = scrape_json.init_db(Path(tmp) / f'early_{early_stop}.db')
+            added, requests, _ = crawl(conn, stub, subreddits, args.pages, early_stop)
+            print(f"首次抓取{'（提前停止）' if early_stop else '（--full）'}: "
+                  f"{added} 条, {requests} 个请求")
+            conn.close()
+
+        for sub in subreddits:
+            stub.publish(sub, args.new_posts)
+        print(f"每个 subreddit 新发布 {args.new_posts} 条")
+
+        for early_stop in (False, True):
+            conn = scrape_json.init_db(Path(tmp) / f'early_{early_stop}.db')
+            added, requests, elapsed = crawl(conn, stub, subreddits, args.pages, early_stop)
+            label = '提前停止' if early_stop else '--full'
+            print(f"刷新 {label:<8} {elapsed:6.2f}s  新增 {added} 条  请求 {requests} 个")
+            conn.close()
+
+    full_set, lookup = id_lookup_memory(args.table_size)
+    print(f"{args.table_size} 行时的内存峰值: 全量 id 集合 {full_set / 1024 ** 2:.1f}MB, "
+          f"按主键查询一页 {lookup / 1024:.1f}KB")
+
+
+if __name__ == '__main__':
+    main()
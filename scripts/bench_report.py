@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+报告生成基准测试
+在 N 条合成痛点帖子（随机得分，分布在 14 个 subreddit、7 个类别）上对比：
+  - 取 Top K：sorted(...)[:k]（原写法）与 top_items() 有界堆，结果必须一致
+  - 整份报告：列表拼接后一次写出（原写法）与 open_report() 逐块写入文件，
+    另外给出流式分析路径（有界堆累加器，报告只看到 K 条记录）的耗时
+并用 tracemalloc 统计各自的内存峰值（不含输入数据本身）
+用法: python scripts/bench_report.py --posts 1000000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import analyze_needs
+from report import open_report
+from topk import GroupedTopK, TopK, top_items
+
+SUBREDDITS = ['sub%02d' % i for i in range(14)]
+
+
+def make_analysis(posts, seed):
+    """与 analyze_posts_vectorized() 结构相同的全量分析结果"""
+    rng = random.Random(seed)
+    categories = analyze_needs.CATEGORY_NAMES
+    pain_point_posts = []
+    needs_by_category = {cat: [] for cat in categories}
+    for i in range(posts):
+        post = {'id': f'p{i}', 'subreddit': rng.choice(SUBREDDITS), 'title': f'Post {i} I wish there was an app',
+                'score': int(rng.paretovariate(1.2)), 'pain_points': ['wish there was'],
+                'categories': [rng.choice(categories)]}
+        pain_point_posts.append(post)
+        needs_by_category[post['categories'][0]].append(
+            {'id': post['id'], 'title': post['title'], 'score': post['score']})
+    return {
+        'total_posts': posts,
+        'pain_point_posts': pain_point_posts,
+        'needs_by_category': needs_by_category,
+        'category_counts': {cat: len(items) for cat, items in needs_by_category.items()},
+        'top_keywords': [(f'word{i}', posts - i) for i in range(50)],
+        'subreddit_stats': {sub: {'total': 1, 'avg_score': 1.0, 'avg_comments': 1.0} for sub in SUBREDDITS},
+        'pain_point_count': posts,
+    }
+
+
+def bounded_analysis(analysis):
+    """流式分析累加器的结果：各列表已是有界堆里的 Top K"""
+    pain = TopK(analyze_needs.REPORT_TOP_PAIN)
+    by_subreddit = GroupedTopK(analyze_needs.REPORT_TOP_SUBREDDIT)
+    for seq, post in enumerate(analysis['pain_point_posts']):
+        pain.push(post['score'], seq, post)
+        by_subreddit.push(post['subreddit'], post['score'], seq, post)
+    categories = GroupedTopK(analyze_needs.REPORT_TOP_CATEGORY)
+    for cat, items in analysis['needs_by_category'].items():
+        for seq, post in enumerate(items):
+            categories.push(cat, post['score'], seq, post)
+    return dict(analysis, pain_point_posts=pain.items(), needs_by_category=categories.items(),
+                subreddit_pain_posts=by_subreddit.items())
+
+
+def sorted_tops(analysis):
+    """原写法：每个列表全量排序后截取"""
+    tops = [sorted(items, key=lambda x: x['score'], reverse=True)[:analyze_needs.REPORT_TOP_CATEGORY]
+            for items in analysis['needs_by_category'].values()]
+    tops.append(sorted(analysis['pain_point_posts'], key=lambda x: x['score'],
+                       reverse=True)[:analyze_needs.REPORT_TOP_PAIN])
+    return tops
+
+
+def heap_tops(analysis):
+    tops = [top_items(items, analyze_needs.REPORT_TOP_CATEGORY, key=lambda x: x['score'])
+            for items in analysis['needs_by_category'].values()]
+    tops.append(top_items(analysis['pain_point_posts'], analyze_needs.REPORT_TOP_PAIN, key=lambda x: x['score']))
+    return tops
+
+
+def joined_report(analysis, path):
+    """原写法：拼好整份报告再写文件"""
+    text = analyze_needs.generate_needs_report(analysis, {'total_comments': 0})
+    path.write_text(text)
+
+
+def streamed_report(analysis, path):
+    with open_report(path, 'md', analyze_needs.REPORT_TEMPLATES) as report:
+        analyze_needs.write_needs_report(analysis, {'total_comments': 0}, report)
+
+
+def measure(func, *args):
+    """返回 (结果, 耗时, 内存峰值)；tracemalloc 会拖慢执行，计时和内存分两次跑"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='报告生成基准')
+    parser.add_argument('--posts', type=int, default=1000000, help='合成痛点帖子数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    analysis = make_analysis(args.posts, args.seed)
+    print(f"痛点帖子: {args.posts} 条")
+
+    expected, elapsed, peak = measure(sorted_tops, analysis)
+    print(f"  {'Top K: sorted()[:k]':<28} {elapsed:7.3f}s  峰值 {peak / 1024 ** 2:7.1f}MB")
+    result, elapsed, peak = measure(heap_tops, analysis)
+    assert result == expected, "top_items 与 sorted 结果不一致"
+    print(f"  {'Top K: top_items 有界堆':<28} {elapsed:7.3f}s  峰值 {peak / 1024 ** 2:7.1f}MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        joined, streamed, bounded = Path(tmp) / 'joined.md', Path(tmp) / 'streamed.md', Path(tmp) / 'bounded.md'
+        _, elapsed, peak = measure(joined_report, analysis, joined)
+        print(f"  {'报告: 拼接字符串后写出':<28} {elapsed:7.3f}s  峰值 {peak / 1024 ** 2:7.1f}MB")
+        _, elapsed, peak = measure(streamed_report, analysis, streamed)
+        print(f"  {'报告: 逐块写入文件':<28} {elapsed:7.3f}s  峰值 {peak / 1024 ** 2:7.1f}MB")
+        small = bounded_analysis(analysis)
+        _, elapsed, peak = measure(streamed_report, small, bounded)
+        print(f"  {'报告: 流式分析结果(K 条)':<28} {elapsed * 1000:6.2f}ms  峰值 {peak / 1024:7.1f}KB")
+        # 生成时间精确到分钟，三份报告同一分钟内生成时内容一致
+        assert joined.read_text() == streamed.read_text() == bounded.read_text(), "报告内容不一致"
+
+
+if __name__ == '__main__':
+    main()
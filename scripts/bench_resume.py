@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+抓取断点续传基准测试（本地桩服务器）
+scrape_json 抓取到一半时模拟进程被杀（第 N 页写库时抛出异常），然后：
+  - 续传：再次运行，从 crawl_state 里的游标继续
+  - 从头（提前停止）：--restart，第一页的帖子都已入库，马上停止，被杀时没翻到的页永远补不上
+  - 从头（--full）：--restart --full，重新翻完所有页
+对比重启后的请求数、耗时和缺失的帖子数（与一次跑完的库相比）
+用法: python scripts/bench_resume.py --subreddits 6 --pages 10 --kill-after 25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scrape_json
+from stub_reddit import StubReddit
+
+
+class Killed(Exception):
+    """模拟进程在写库时被杀"""
+
+
+def crawl(db_path, stub, subreddits, pages, restart=False, early_stop=True, kill_after=None):
+    """静默运行 scrape_json.crawl，返回 (新增帖子数, 请求数, 耗时)；被“杀掉”时新增帖子数为 None"""
+    save_posts = scrape_json.save_posts
+    saved = 0
+
+    def dying(posts, conn, *args):
+        nonlocal saved
+        saved += 1
+        if saved > kill_after:
+            raise Killed
+        return save_posts(posts, conn, *args)
+
+    if kill_after is not None:
+        scrape_json.save_posts = dying
+    stub.stats['requests'] = 0
+    conn = scrape_json.init_db(db_path)
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            added = asyncio.run(scrape_json.crawl(conn, subreddits, stub.url, rate=500, pages=pages,
+                                                  target=float('inf'), early_stop=early_stop,
+                                                  restart=restart))
+    except Killed:
+        added = None
+    finally:
+        scrape_json.save_posts = save_posts
+        conn.close()
+    return added, stub.stats['requests'], time.perf_counter() - start
+
+
+def post_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    ids = {row[0] for row in conn.execute('SELECT id FROM posts')}
+    conn.close()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取断点续传基准测试')
+    parser.add_argument('--subreddits', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--kill-after', type=int, default=25, help='第几次写库时模拟进程被杀')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩服务器每个请求的延迟（秒）')
+    args = parser.parse_args()
+
+    subreddits = scrape_json.SUBREDDITS[:args.subreddits]
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubReddit(subreddits, posts_per_sub=25 * args.pages, latency=args.latency) as stub:
+        tmp = Path(tmp)
+        _, requests, elapsed = crawl(tmp / 'full.db', stub, subreddits, args.pages)
+        print(f"一次跑完:   {elapsed:6.2f}s  请求 {requests} 个")
+
+        _, requests, _ = crawl(tmp / 'killed.db', stub, subreddits, args.pages, kill_after=args.kill_after)
+        print(f"被杀前:     已请求 {requests} 个，写入 {len(post_ids(tmp / 'killed.db'))} 条")
+        expected = post_ids(tmp / 'full.db')
+
+        cases = [('续传', False, True), ('从头（提前停止）', True, True), ('从头（--full）', True, False)]
+        for name, restart, early_stop in cases:
+            db_path = tmp / f'{name}.db'
+            shutil.copy(tmp / 'killed.db', db_path)
+            added, requests, elapsed = crawl(db_path, stub, subreddits, args.pages, restart, early_stop)
+            missing = len(expected - post_ids(db_path))
+            print(f"重启 {name:<12} {elapsed:6.2f}s  请求 {requests:4d} 个  新增 {added} 条  缺失 {missing} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+统一库结构基准测试
+用 synthetic.py 生成同一份语料，分别写入：
+  - 旧版 crawl_reddit 表结构（TEXT subreddit/author、REAL 时间、ISO 字符串 collected_at）
+  - schema.py 的统一结构（schema.upsert 驻留 subreddit/author、转换时间后写入）
+再把旧版库原地迁移，对比写库耗时、迁移耗时、VACUUM 后的文件大小（按表/索引拆分，
+并汇总为帖子和评论的行数据、驻留表、索引三部分），分析器常用查询在旧库和迁移后库上的耗时
+（统一结构按 subreddit_id 查询，结果必须一致），以及两个分析器 load_data 的耗时
+用法: python scripts/bench_schema.py --posts 100000
+"""
+
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import analyze_needs
+import analyze_v2
+import schema
+import synthetic
+from crawl_reddit import save_to_db
+from db import connect
+
+# 迁移前 crawl_reddit.init_database 建的表和索引
+LEGACY_SCHEMA = '''
+    CREATE TABLE posts (
+        id TEXT PRIMARY KEY, subreddit TEXT, title TEXT, selftext TEXT, author TEXT,
+        created_utc REAL, ups INTEGER, downs INTEGER, score INTEGER, num_comments INTEGER,
+        is_self BOOLEAN, flair TEXT, url TEXT, collected_at TEXT
+    );
+    CREATE TABLE comments (
+        id TEXT PRIMARY KEY, post_id TEXT, subreddit TEXT, author TEXT, body TEXT,
+        created_utc REAL, score INTEGER, parent_id TEXT, is_top_level BOOLEAN, collected_at TEXT
+    );
+    CREATE INDEX idx_subreddit ON posts(subreddit);
+    CREATE INDEX idx_created ON posts(created_utc DESC);
+    CREATE INDEX idx_post_comments ON comments(post_id);
+'''
+
+# 统一结构里 subreddit 的名字和 id
+NAME = '(SELECT name FROM subreddits WHERE id = subreddit_id)'
+SUB_ID = '(SELECT id FROM subreddits WHERE name = :sub)'
+
+# (名称, 旧版 SQL, 统一结构 SQL)；:sub / :since 为参数
+QUERIES = [
+    ('按 subreddit 统计',
+     'SELECT subreddit, COUNT(*), AVG(score) FROM posts GROUP BY subreddit ORDER BY subreddit',
+     f'SELECT {NAME} AS sub, COUNT(*), AVG(score) FROM posts GROUP BY subreddit_id ORDER BY sub'),
+    ('subreddit 内高分帖子',
+     'SELECT id, title, score FROM posts WHERE subreddit = :sub ORDER BY score DESC, id LIMIT 50',
+     f'SELECT id, title, score FROM posts WHERE subreddit_id = {SUB_ID} ORDER BY score DESC, id LIMIT 50'),
+    ('subreddit 时间段汇总',
+     'SELECT COUNT(*), SUM(score) FROM posts WHERE subreddit = :sub AND created_utc >= :since',
+     f'SELECT COUNT(*), SUM(score) FROM posts WHERE subreddit_id = {SUB_ID} AND created_utc >= :since'),
+    ('全部 subreddit 时间段汇总',
+     'SELECT subreddit, COUNT(*), SUM(score) FROM posts WHERE created_utc >= :since '
+     'GROUP BY subreddit ORDER BY subreddit',
+     f'SELECT {NAME} AS sub, COUNT(*), SUM(score) FROM posts WHERE created_utc >= :since '
+     'GROUP BY subreddit_id ORDER BY sub'),
+    ('评论按 subreddit 统计',
+     'SELECT subreddit, COUNT(*), MAX(score) FROM comments GROUP BY subreddit ORDER BY subreddit',
+     f'SELECT {NAME} AS sub, COUNT(*), MAX(score) FROM comments GROUP BY subreddit_id ORDER BY sub'),
+    ('帖子总数', 'SELECT COUNT(*) FROM posts', 'SELECT COUNT(*) FROM posts'),
+]
+
+
+def write_corpus(conn, posts, seed, now):
+    """把同一份合成语料写进 conn（crawl_reddit.save_to_db），返回写库耗时"""
+    elapsed = 0.0
+    for chunk in synthetic.CorpusGenerator(seed, now=now).chunks(posts):
+        start = time.perf_counter()
+        save_to_db(conn, *chunk)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def build_legacy(path, posts, seed, now):
+    conn = connect(path, 'ingest')
+    conn.executescript(LEGACY_SCHEMA)
+    elapsed = write_corpus(conn, posts, seed, now)
+    conn.close()
+    return elapsed
+
+
+def build_unified(path, posts, seed, now):
+    conn = connect(path, 'ingest')
+    schema.migrate(conn)
+    elapsed = write_corpus(conn, posts, seed, now)
+    conn.close()
+    return elapsed
+
+
+def vacuum(path):
+    conn = sqlite3.connect(path)
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def object_sizes(path):
+    """{表/索引名: 字节数}（dbstat 虚表）"""
+    conn = sqlite3.connect(path)
+    sizes = dict(conn.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'))
+    conn.close()
+    return sizes
+
+
+def size_groups(sizes):
+    """object_sizes() 汇总为 {行数据, 驻留表, 索引}"""
+    groups = dict.fromkeys(('行数据', '驻留表', '索引'), 0)
+    for name, size in sizes.items():
+        if name in schema.TABLE_COLUMNS:
+            groups['行数据'] += size
+        elif name in schema.INTERN_TABLES or name.startswith('sqlite_autoindex_') and \
+                name.split('_')[2] in schema.INTERN_TABLES:
+            groups['驻留表'] += size
+        elif name.startswith(('idx_', 'sqlite_autoindex_')):
+            groups['索引'] += size
+    return groups
+
+
+def same_data(old, new):
+    """load_data 的结果是否一致：analyze_v2 为 dict 列表，analyze_needs 为 (帖子, 评论) DataFrame"""
+    if isinstance(old, tuple):
+        return all(a.equals(b) for a, b in zip(old, new))
+    return old == new
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def time_query(conn, sql, params, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='旧版表结构 vs 统一结构')
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数（取最短）')
+    args = parser.parse_args()
+    now = int(time.time())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        legacy, migrated, fresh = tmp / 'legacy.db', tmp / 'migrated.db', tmp / 'fresh.db'
+
+        print("写库（crawl_reddit.save_to_db）:")
+        print(f"  旧版表结构        {build_legacy(legacy, args.posts, args.seed, now):7.2f}s")
+        print(f"  统一结构          {build_unified(fresh, args.posts, args.seed, now):7.2f}s")
+
+        vacuum(legacy)
+        shutil.copy(legacy, migrated)
+        conn = connect(migrated, 'ingest')
+        start = time.perf_counter()
+        schema.migrate(conn)
+        conn.close()
+        print(f"\n原地迁移            {time.perf_counter() - start:7.2f}s")
+        vacuum(migrated)
+        vacuum(fresh)
+
+        print("\n文件大小（VACUUM 后）:")
+        for name, path in (('旧版', legacy), ('迁移后', migrated), ('新建', fresh)):
+            print(f"  {name:<8} {path.stat().st_size / 1024 ** 2:8.1f}MB")
+        old_sizes, new_sizes = object_sizes(legacy), object_sizes(migrated)
+        for name, size in sorted(old_sizes.items(), key=lambda kv: -kv[1]):
+            print(f"    旧版   {name:<36} {size / 1024 ** 2:7.2f}MB")
+        for name, size in sorted(new_sizes.items(), key=lambda kv: -kv[1]):
+            print(f"    迁移后 {name:<36} {size / 1024 ** 2:7.2f}MB")
+        old_groups, new_groups = size_groups(old_sizes), size_groups(new_sizes)
+        for group in old_groups:
+            old, new = old_groups[group] / 1024 ** 2, new_groups[group] / 1024 ** 2
+            change = f"{(new - old) / old:+6.1%}" if old else ''
+            print(f"  {group:<8} {old:8.1f}MB -> {new:8.1f}MB  {change}")
+
+        old_conn, new_conn = connect(legacy, 'analyze'), connect(migrated, 'analyze')
+        params = {'sub': synthetic.SUBREDDITS[0], 'since': now - 30 * 24 * 3600}
+        print(f"\n查询（最短 / {args.repeat} 次）:")
+        for name, old_sql, new_sql in QUERIES:
+            old_rows, old_time = time_query(old_conn, old_sql, params, args.repeat)
+            new_rows, new_time = time_query(new_conn, new_sql, params, args.repeat)
+            assert [tuple(r) for r in old_rows] == [tuple(r) for r in new_rows], f"{name} 结果不一致"
+            print(f"  {name:<22} {old_time * 1000:8.1f}ms -> {new_time * 1000:8.1f}ms  {old_time / new_time:5.2f}x")
+        old_conn.close()
+        new_conn.close()
+
+        for name, load in (('analyze_v2.load_data', analyze_v2.load_data),
+                           ('analyze_needs.load_data', analyze_needs.load_data)):
+            old_data, old_time = timed(lambda: load(legacy))
+            new_data, new_time = timed(lambda: load(migrated))
+            assert same_data(old_data, new_data), f"{name} 结果不一致"
+            print(f"  {name:<22} {old_time * 1000:8.1f}ms -> {new_time * 1000:8.1f}ms  "
+                  f"{old_time / new_time:5.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+分阶段基准测试套件
+用 synthetic.py 生成 1万 / 10万 / 100万 帖子（带评论）的合成语料，分别计时：
+  - ingest：crawl_reddit.save_to_db 写库
+  - load_data：analyze_v2.load_data / analyze_needs.load_data（含评论）
+  - detect_pain_points / categorize_needs / keyword_counting：analyze_v2 的逐条分析步骤
+  - analyze：analyze_v2.analyze 整体；analyze_needs：列式引擎分析帖子和评论
+  - analyze_stream / analyze_stream_needs：两个分析器的流式分析（分块读取，含读库时间）
+  - report：两个分析器的报告生成
+整库读入内存的阶段只在不超过 IN_MEMORY_MAX_POSTS 帖子时计时（100万帖子 + 300万评论整库读入会耗尽内存），
+更大的规模只跑流式阶段。
+结果输出为 JSON，可以用 --baseline 与以前的结果对比，变慢超过阈值的阶段以非零退出码报告：
+    python scripts/bench_suite.py --sizes 10000 100000 --output bench.json
+    python scripts/bench_suite.py --sizes 10000 100000 --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+
+import analyze_needs
+import analyze_v2
+import synthetic
+from db import connect
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+# 超过这个帖子数只计时流式阶段
+IN_MEMORY_MAX_POSTS = 100000
+# 相对基线变慢超过这个比例视为回退
+REGRESSION_THRESHOLD = 1.25
+# 短于这个时间的阶段计时噪声太大，不参与回退判断（秒）
+MIN_COMPARABLE_SECONDS = 0.5
+
+
+def environment():
+    """记录结果时附带的环境信息"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def timed(func, repeat=1):
+    """重复 repeat 次取最短耗时，返回 (结果, 秒)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+class StageLog(dict):
+    """阶段耗时；每记录一个阶段就写一次文件，进程中途被杀时仍能取回已完成的部分"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path)
+
+    def __setitem__(self, stage, seconds):
+        super().__setitem__(stage, seconds)
+        self.path.write_text(json.dumps(self))
+
+
+def run_size(posts, workdir, seed=0, repeat=1, comments_per_post=synthetic.COMMENTS_PER_POST):
+    """对一个规模的语料跑完所有阶段，返回结果字典"""
+    db_path = Path(workdir) / f'synthetic_{posts}.db'
+    post_count, comment_count, generate_time, ingest_time = synthetic.generate(
+        db_path, posts, seed, comments_per_post)
+    stages = StageLog(Path(workdir) / f'stages_{posts}.json')
+    stages['ingest'] = ingest_time
+
+    def analyze_stream():
+        conn = connect(db_path, 'analyze')
+        try:
+            return analyze_v2.analyze(analyze_v2.iter_posts(conn))
+        finally:
+            conn.close()
+    analysis, stages['analyze_stream'] = timed(analyze_stream, repeat)
+    (posts_analysis, comments_analysis), stages['analyze_stream_needs'] = timed(
+        lambda: analyze_needs.analyze_stream(db_path), repeat)
+    if posts > IN_MEMORY_MAX_POSTS:
+        _, stages['report'] = timed(lambda: analyze_v2.generate_report(analysis), repeat)
+        _, stages['report_needs'] = timed(
+            lambda: analyze_needs.generate_needs_report(posts_analysis, comments_analysis), repeat)
+    else:
+        _in_memory_stages(db_path, stages, repeat)
+    db_path.unlink()
+    stages.path.unlink()
+
+    return {
+        'posts': post_count,
+        'comments': comment_count,
+        'generate_seconds': generate_time,
+        'stages': dict(stages),
+        'posts_per_second': {name: post_count / seconds for name, seconds in stages.items() if seconds},
+    }
+
+
+def _in_memory_stages(db_path, stages, repeat):
+    """整库读入内存后的逐阶段计时；每个分析器的数据在各自的函数返回时释放，不会同时留在内存里"""
+    _v2_stages(db_path, stages, repeat)
+    _needs_stages(db_path, stages, repeat)
+
+
+def _v2_stages(db_path, stages, repeat):
+    post_rows, stages['load_data'] = timed(lambda: analyze_v2.load_data(db_path), repeat)
+    _text_stages([analyze_v2.post_text(post) for post in post_rows], stages, repeat)
+    analysis, stages['analyze'] = timed(lambda: analyze_v2.analyze(post_rows), repeat)
+    _, stages['report'] = timed(lambda: analyze_v2.generate_report(analysis), repeat)
+
+
+def _text_stages(texts, stages, repeat):
+    """analyze_v2 对每条帖子文本做的几步，分别计时"""
+    _, stages['detect_pain_points'] = timed(
+        lambda: [analyze_v2.detect_pain_points(text) for text in texts], repeat)
+    _, stages['categorize_needs'] = timed(
+        lambda: [analyze_v2.categorize_needs(text) for text in texts], repeat)
+
+    def count_keywords():
+        counter = Counter()
+        for text in texts:
+            counter.update(analyze_v2.TOKENIZER.ids(text))
+        return analyze_v2.TOKENIZER.finish_ids(counter)
+    _, stages['keyword_counting'] = timed(count_keywords, repeat)
+
+
+def _needs_stages(db_path, stages, repeat):
+    (posts_df, comments_df), stages['load_data_needs'] = timed(
+        lambda: analyze_needs.load_data(db_path), repeat)
+    (posts_analysis, comments_analysis), stages['analyze_needs'] = timed(
+        lambda: (analyze_needs.analyze_posts_vectorized(posts_df),
+                 analyze_needs.analyze_comments_vectorized(comments_df)), repeat)
+    _, stages['report_needs'] = timed(
+        lambda: analyze_needs.generate_needs_report(posts_analysis, comments_analysis, posts_df), repeat)
+
+
+def run_isolated(posts, workdir, seed=0, repeat=1, comments_per_post=synthetic.COMMENTS_PER_POST):
+    """在独立进程中跑一个规模：各规模互不影响内存，进程被杀（如内存不足）时记录为失败"""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(run_size, posts, workdir, seed, repeat, comments_per_post).result()
+        except BrokenProcessPool:
+            for path in Path(workdir).glob(f'synthetic_{posts}.db*'):
+                path.unlink()
+            log = Path(workdir) / f'stages_{posts}.json'
+            stages = json.loads(log.read_text()) if log.exists() else {}
+            return {'posts': posts, 'error': '进程异常退出（可能内存不足）', 'stages': stages}
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """与基线逐阶段对比，返回回退列表 [(规模, 阶段, 基线秒, 当前秒)]"""
+    base_runs = {run['posts']: run['stages'] for run in baseline['runs'] if 'stages' in run}
+    regressions = []
+    for run in results['runs']:
+        base = base_runs.get(run['posts'])
+        if 'error' in run:
+            print(f"  {run['posts']:>8} {run['error']}", file=sys.stderr)
+            regressions.append((run['posts'], 'error', None, None))
+        if base is None:
+            continue
+        for stage, seconds in run['stages'].items():
+            old = base.get(stage)
+            if old is None or max(old, seconds) < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = seconds / old
+            flag = '  ← 回退' if ratio > threshold else ''
+            print(f"  {run['posts']:>8} {stage:<20} {old:8.3f}s -> {seconds:8.3f}s  {ratio:5.2f}x{flag}", file=sys.stderr)
+            if ratio > threshold:
+                regressions.append((run['posts'], stage, old, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成语料上的分阶段基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='帖子数')
+    parser.add_argument('--comments-per-post', type=int, default=synthetic.COMMENTS_PER_POST)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='分析阶段重复次数（取最短）')
+    parser.add_argument('--workdir', help='合成库存放目录（默认临时目录）')
+    parser.add_argument('--output', help='结果 JSON 文件（默认输出到标准输出）')
+    parser.add_argument('--baseline', help='与这个结果 JSON 对比，有回退时退出码为 1')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='变慢超过这个倍数视为回退')
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'seed': args.seed, 'repeat': args.repeat, 'runs': []}
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for size in args.sizes:
+            run = run_isolated(size, workdir, args.seed, args.repeat, args.comments_per_post)
+            results['runs'].append(run)
+            stages = ' '.join(f"{name}={seconds:.2f}s" for name, seconds in run['stages'].items())
+            if 'error' in run:
+                print(f"{size} 帖子: {run['error']}，已完成: {stages}", file=sys.stderr)
+            else:
+                print(f"{run['posts']} 帖子 / {run['comments']} 评论: {stages}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n与基线对比 ({baseline['environment'].get('commit')}):", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit(1)
+    if any('error' in run for run in results['runs']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
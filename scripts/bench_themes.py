@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+需求主题聚类基准测试
+在合成语料（synthetic.py）上依次运行 discover_themes()：
+  - 冷启动：拟合 TF-IDF + SVD、向量化全部痛点帖子、全量 mini-batch k-means
+  - 重跑：数据没变，向量全部命中缓存，质心不更新，只重新分配
+  - 增量：再抓到 --growth 比例的新帖子后，只向量化新帖子并用它们更新质心
+  - --refit：同样的数据重新拟合向量化模型、全量聚类
+并统计原有的痛点帖子在增量运行前后主题不变的比例（增量更新不应打乱已有主题）
+用法: python scripts/bench_themes.py --posts 200000 --growth 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import themes
+from synthetic import generate
+
+
+def run(db_path, cache_path, refit=False):
+    start = time.perf_counter()
+    result = themes.discover_themes(db_path, cache_path, refit=refit)
+    return result, time.perf_counter() - start
+
+
+def assignments(db_path, cache_path):
+    """缓存里的向量和质心给出的每个痛点帖子的主题"""
+    posts = themes.load_pain_posts(db_path)
+    cache = themes.ThemeCache(cache_path)
+    centroids = np.array(cache.get('kmeans')['centroids'], dtype=np.float32)
+    vectors, _ = cache.lookup([post['digest'] for post in posts], centroids.shape[1])
+    cache.close()
+    return themes.assign(vectors, centroids)[0]
+
+
+def describe(name, result, elapsed):
+    print(f"  {name:<10} {elapsed:7.2f}s  痛点帖子 {result['posts']:>7}  新向量化 {result['embedded']:>7}"
+          f"  更新质心用 {result['updated']:>7}{'  重新拟合' if result['refit'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='需求主题聚类基准')
+    parser.add_argument('--posts', type=int, default=200000, help='合成帖子数')
+    parser.add_argument('--growth', type=float, default=0.05, help='增量运行前新增的帖子比例')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base, grown, cache = Path(tmp) / 'base.db', Path(tmp) / 'grown.db', Path(tmp) / 'cache.db'
+        # 同一种子下 grown 的前 --posts 个帖子与 base 相同，相当于在 base 之后又抓到了新帖子
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(str(base), args.posts, args.seed, comments_per_post=0)
+            generate(str(grown), int(args.posts * (1 + args.growth)), args.seed, comments_per_post=0)
+        print(f"帖子: {args.posts} 条，增量 {args.growth:.0%}")
+
+        describe('冷启动', *run(base, cache))
+        describe('重跑', *run(base, cache))
+        before = assignments(base, cache)
+        describe('增量', *run(grown, cache))
+        print(f"  {'':<10} 原有痛点帖子主题不变: {(assignments(base, cache) == before).mean():.1%}")
+        describe('--refit', *run(grown, cache, refit=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+共享分词器基准测试
+在合成评论语料上对比关键词计数的几种写法（结果必须一致）：
+  - 逐行 re.findall + 列表推导过滤停用词 + 字符串 Counter（原 analyze_comments 的写法）
+  - 逐行 Tokenizer.ids()：词号 Counter，停用词计数后统一去掉
+  - 整列拼接扫描：字符串 Counter（原 word_counter）与 Tokenizer.count_ids()
+并用 tracemalloc 统计计数阶段的内存峰值和计数器本身占用的内存
+用法: python scripts/bench_tokenizer.py --posts 100000
+"""
+
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import synthetic
+from analyze_needs import COMMENT_STOP_WORDS, COMMENT_TOKENIZER
+from tokenizer import JOIN_CHUNK, WORD_RE
+
+
+def rowwise_strings(bodies):
+    counter = Counter()
+    for body in bodies:
+        words = re.findall(r'\b[a-z]{4,}\b', body.lower())
+        words = [w for w in words if w not in COMMENT_STOP_WORDS]
+        counter.update(words)
+    return counter
+
+
+def rowwise_ids(bodies):
+    counter = Counter()
+    for body in bodies:
+        counter.update(COMMENT_TOKENIZER.ids(body))
+    return COMMENT_TOKENIZER.finish_ids(counter)
+
+
+def column_strings(lower):
+    counter = Counter()
+    for start in range(0, len(lower), JOIN_CHUNK):
+        counter.update(WORD_RE.findall('\n'.join(lower[start:start + JOIN_CHUNK])))
+    for word in COMMENT_STOP_WORDS:
+        counter.pop(word, None)
+    return counter
+
+
+def counter_size(counter):
+    """计数器本身及其键、值对象占用的字节数（共享的小整数和驻留字符串也计入）"""
+    return sys.getsizeof(counter) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in counter.items())
+
+
+def measure(func, *args):
+    """返回 (结果, 耗时, 内存峰值)；tracemalloc 会拖慢执行，计时和内存分两次跑"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='共享分词器基准')
+    parser.add_argument('--posts', type=int, default=100000, help='合成语料帖子数（每帖约3条评论）')
+    args = parser.parse_args()
+
+    generator = synthetic.CorpusGenerator(seed=0)
+    bodies = [c['body'] for _, comments in generator.chunks(args.posts) for c in comments]
+    lower = [body.lower() for body in bodies]
+    print(f"评论: {len(bodies)} 条")
+
+    expected = None
+    cases = [
+        ('逐行 findall + 字符串', rowwise_strings, bodies),
+        ('逐行 Tokenizer.ids', rowwise_ids, bodies),
+        ('整列 findall + 字符串', column_strings, lower),
+        ('整列 Tokenizer.count_ids', COMMENT_TOKENIZER.count_ids, lower),
+    ]
+    for name, func, data in cases:
+        counter, elapsed, peak = measure(func, data)
+        size = counter_size(counter)
+        words = counter if isinstance(next(iter(counter)), str) else COMMENT_TOKENIZER.counts(counter)
+        expected = expected or words
+        assert words == expected, f"{name} 结果不一致"
+        print(f"  {name:<26} {elapsed:6.2f}s  峰值 {peak / 1024 ** 2:7.1f}MB  计数器 {size / 1024:7.1f}KB "
+              f"({len(counter)} 个词)")
+
+
+if __name__ == '__main__':
+    main()
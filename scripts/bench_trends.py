@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+需求趋势基准测试
+在一年的合成语料（synthetic.py，created_utc 均匀分布在最近一年）上：
+  - 回填：从帖子表建立汇总表（即不用汇总表时每次趋势查询都要付出的全表扫描 + 关键词匹配）
+  - 写入开销：再写入 --ingest 条新帖子（抓取器的 save_to_db），对比没有/有汇总触发器
+    （另有 --replace 条帖子以新内容重写，走 INSERT OR REPLACE 的先减后加）
+  - 查询：trend_report() 按周/按天、按 subreddit 分别计算、单个关键词一年的 series()
+增量维护后的汇总必须与重新回填的结果一致。
+用法: python scripts/bench_trends.py --posts 200000 --ingest 10000
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import schema
+import trends
+from crawl_reddit import init_database, save_to_db
+from synthetic import CorpusGenerator, generate
+
+# 每个查询重复的次数（取平均）
+REPEAT = 20
+
+
+def new_posts(count, replace, conn, seed):
+    """count 条新帖子，以及 replace 条已有帖子换成新内容后的版本"""
+    generator = CorpusGenerator(seed + 1)
+    posts = [generator.post(n)[0] for n in range(count + replace)]
+    columns = schema.table_columns(conn, 'posts')
+    replaced = []
+    for row, post in zip(conn.execute(f"SELECT {schema.select_list(conn, 'posts')} FROM posts ORDER BY rowid LIMIT ?",
+                                      (replace,)), posts[count:]):
+        replaced.append(dict(zip(columns, row), **{key: post[key] for key in
+                                                   ('title', 'selftext', 'subreddit', 'created_utc')}))
+    for post in posts[:count]:
+        post['id'] = 'new_' + post['id']
+    return posts[:count], replaced
+
+
+def ingest(db_path, posts, replaced):
+    conn = init_database(db_path)
+    start = time.perf_counter()
+    save_to_db(conn, posts, [])
+    save_to_db(conn, replaced, [])
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def query_ms(func, *args, **kwargs):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='需求趋势基准')
+    parser.add_argument('--posts', type=int, default=200000, help='合成帖子数')
+    parser.add_argument('--ingest', type=int, default=10000, help='建立汇总后再写入的新帖子数')
+    parser.add_argument('--replace', type=int, default=1000, help='以新内容重写的已有帖子数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, rolled = Path(tmp) / 'plain.db', Path(tmp) / 'rolled.db'
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(str(plain), args.posts, args.seed, comments_per_post=0)
+        shutil.copy(plain, rolled)
+        print(f"帖子: {args.posts} 条（一年）")
+
+        conn = init_database(rolled)
+        start = time.perf_counter()
+        trends.ensure_rollups(conn)
+        rows = conn.execute('SELECT COUNT(*) FROM trend_rollups').fetchone()[0]
+        print(f"  {'回填汇总表':<22} {time.perf_counter() - start:8.2f}s  汇总行 {rows}")
+        posts, replaced = new_posts(args.ingest, args.replace, conn, args.seed)
+        conn.close()
+
+        base = ingest(plain, posts, replaced)
+        with_rollups = ingest(rolled, posts, replaced)
+        total = args.ingest + args.replace
+        print(f"  {'写入（无汇总）':<22} {base:8.2f}s  每条 {base / total * 1e6:6.0f}µs")
+        print(f"  {'写入（触发器维护汇总）':<22} {with_rollups:8.2f}s  每条 {with_rollups / total * 1e6:6.0f}µs")
+
+        conn = init_database(rolled)
+        for label, kwargs in (('趋势报告 按周', {'period': 'week'}),
+                              ('趋势报告 按天', {'period': 'day'}),
+                              ('趋势报告 按周、分 subreddit', {'period': 'week', 'by_subreddit': True})):
+            print(f"  {label:<22} {query_ms(trends.trend_report, conn, **kwargs):8.2f}ms")
+        print(f"  {'series() 一年按周':<22} {query_ms(trends.series, conn, 'pain', 'wish there was'):8.2f}ms")
+
+        incremental = conn.execute('SELECT * FROM trend_rollups WHERE posts != 0 ORDER BY 1, 2, 3, 4, 5').fetchall()
+        trends.ensure_rollups(conn, rebuild=True)
+        rebuilt = conn.execute('SELECT * FROM trend_rollups ORDER BY 1, 2, 3, 4, 5').fetchall()
+        conn.close()
+        assert incremental == rebuilt, "增量维护的汇总与重新回填不一致"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+多进程分析扩展性基准测试
+把 reddit_posts.db 放大若干倍，分别用 1/2/4/8 个进程运行 analyze_v2，
+校验结果与串行完全一致并输出耗时
+用法: python scripts/bench_workers.py --scale 200
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import analyze_v2
+import schema
+from db import connect
+
+DEFAULT_DB = Path(__file__).resolve().parent.parent / 'reddit_posts.db'
+
+
+def build_scaled_db(source, target, scale):
+    """把 source 的 posts 表复制 scale 份写入 target（id 加后缀保证唯一）
+
+    旧版库照搬表结构，已迁移的库使用统一结构。
+    """
+    src = sqlite3.connect(source)
+    legacy = None
+    if not schema.interned(src, 'posts'):
+        legacy = src.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='posts'").fetchone()
+    columns = schema.table_columns(src, 'posts')
+    rows = src.execute(f"SELECT {schema.select_list(src, 'posts', columns)} FROM posts").fetchall()
+    src.close()
+
+    id_index = columns.index('id')
+    dst = connect(target, 'ingest')
+    if legacy:
+        dst.execute(legacy[0])
+    else:
+        schema.migrate(dst)
+    for copy in range(scale):
+        batch = []
+        for row in rows:
+            row = list(row)
+            row[id_index] = f"{row[id_index]}_{copy}"
+            batch.append(row)
+        schema.upsert(dst, 'posts', columns, batch)
+    total = dst.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    dst.close()
+    return total
+
+
+def report_body(analysis):
+    """报告去掉生成时间那一行"""
+    return analyze_v2.generate_report(analysis).split('\n', 2)[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='analyze_v2 多进程扩展性基准')
+    parser.add_argument('--db', default=str(DEFAULT_DB))
+    parser.add_argument('--scale', type=int, default=100, help='语料放大倍数')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'scaled.db'
+        total = build_scaled_db(args.db, db_path, args.scale)
+        print(f"语料: {total} 条帖子")
+
+        start = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        serial = analyze_v2.analyze(analyze_v2.iter_posts(conn), pain_top_k=analyze_v2.REPORT_TOP_PAIN)
+        conn.close()
+        serial_time = time.perf_counter() - start
+        print(f"{'serial':<10} {serial_time:8.2f}s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            parallel = analyze_v2.analyze_parallel(db_path, workers)
+            elapsed = time.perf_counter() - start
+            assert parallel == serial, f"{workers} 个进程的结果与串行不一致"
+            assert report_body(parallel) == report_body(serial)
+            print(f"{workers:<3}workers {elapsed:8.2f}s  加速比 {serial_time / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
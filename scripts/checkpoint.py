@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+增量分析检查点
+分析器的累加状态、已处理行的高水位(rowid)以及每条记录的内容摘要，
+保存在与主库分离的SQLite文件中，下次运行只处理新增或变化的行
+"""
+
+import hashlib
+import json
+import sqlite3
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS seen (
+        tbl TEXT,
+        id TEXT,
+        digest TEXT,
+        score INTEGER,
+        num_comments INTEGER,
+        PRIMARY KEY (tbl, id)
+    ) WITHOUT ROWID;
+'''
+
+# classify() 的结果
+NEW = 'new'                # 从未处理过的记录
+UNCHANGED = 'unchanged'    # 与上次处理时完全相同
+RESCORED = 'rescored'      # 文本未变，只有得分/评论数变化
+CHANGED = 'changed'        # 文本变化，无法增量合并
+
+
+def content_digest(*fields):
+    """记录中影响分析结果的文本字段摘要"""
+    h = hashlib.blake2b(digest_size=16)
+    for field in fields:
+        h.update(str(field).encode('utf-8', 'surrogatepass'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class RecomputeRequired(Exception):
+    """增量合并无法保证与全量计算一致，需要全量重算"""
+
+
+class AnalysisCheckpoint:
+    """增量分析检查点（独立的SQLite文件）"""
+
+    def __init__(self, path, source):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        # 检查点只对应一个数据源，换库即作废
+        if self.get('source') != str(source):
+            self.reset()
+            self.set('source', str(source))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                          (key, json.dumps(value)))
+
+    def reset(self):
+        """清空全部状态（全量重算前调用）"""
+        source = self.get('source')
+        self.conn.execute('DELETE FROM meta')
+        self.conn.execute('DELETE FROM seen')
+        if source is not None:
+            self.set('source', source)
+
+    def high_water(self, table):
+        """该表已处理的最大rowid"""
+        return self.get(f'high_water:{table}', 0)
+
+    def seen_count(self, table):
+        return self.conn.execute('SELECT COUNT(*) FROM seen WHERE tbl = ?', (table,)).fetchone()[0]
+
+    def classify(self, table, records):
+        """records: [(id, digest, score, num_comments)]
+        返回与之对齐的 [(kind, 旧score, 旧num_comments)]"""
+        known = {}
+        ids = [r[0] for r in records]
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for row in self.conn.execute(
+                    f'SELECT id, digest, score, num_comments FROM seen '
+                    f'WHERE tbl = ? AND id IN ({placeholders})', [table] + batch):
+                known[row[0]] = row[1:]
+
+        result = []
+        for record_id, digest, score, num_comments in records:
+            old = known.get(record_id)
+            if old is None:
+                result.append((NEW, None, None))
+            elif old[0] != digest:
+                result.append((CHANGED, old[1], old[2]))
+            elif (old[1], old[2]) == (score, num_comments):
+                result.append((UNCHANGED, old[1], old[2]))
+            else:
+                result.append((RESCORED, old[1], old[2]))
+        return result
+
+    def record(self, table, records, high_water):
+        """登记已处理的记录并推进高水位（随 commit() 一起生效）"""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO seen (tbl, id, digest, score, num_comments) VALUES (?, ?, ?, ?, ?)',
+            [(table,) + tuple(r) for r in records]
+        )
+        self.set(f'high_water:{table}', max(high_water, self.high_water(table)))
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+列式语料导出/导入（Parquet，按 subreddit 和 created_utc 月份分区）
+
+    python scripts/columnar.py export --db data/reddit_posts.db --out data/corpus
+    python scripts/columnar.py import --src data/corpus --db copy.db
+
+目录结构为 hive 分区：<out>/posts/subreddit=<name>/month=<YYYY-MM>/part-0.parquet。
+每行保留原表的 rowid（_rowid 列），读回时按它排序，分析结果与直接读库一致。
+分析器通过 read_table() 只读取需要的列，文件以内存映射方式打开；
+按 subreddit / 月份过滤时只会打开对应分区的文件。
+"""
+
+import argparse
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+except ImportError:  # 可选依赖
+    pa = None
+
+from db import BATCH_SIZE, connect
+from schema import column_exprs, migrate, select_list, table_columns, table_exists, upsert
+
+# 导出时每批从游标读取的行数
+EXPORT_CHUNK = 100_000
+# 单个 Parquet 文件的最大行数
+MAX_ROWS_PER_FILE = 1_000_000
+# 没有时间信息的行放在这个月份分区
+UNKNOWN_MONTH = 'unknown'
+PARTITION_COLUMNS = ('subreddit', 'month')
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("列式导出需要 pyarrow: pip install pyarrow")
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('subreddit', pa.string()), ('month', pa.string())]),
+                           flavor='hive')
+
+
+def _month(created_utc, fallback):
+    """created_utc（秒）所在月份；为空时用 ISO 格式的备用时间列"""
+    if created_utc:
+        return datetime.fromtimestamp(float(created_utc), timezone.utc).strftime('%Y-%m')
+    if isinstance(fallback, str) and len(fallback) >= 7:
+        return fallback[:7]
+    return UNKNOWN_MONTH
+
+
+def _column_types(conn, table, columns):
+    """按实际存储的值推断每列的 Arrow 类型（SQLite 列类型只是亲和性）"""
+    exprs = column_exprs(conn, table)
+    probes = ', '.join(f"max(typeof({exprs[c]}) IN ('text', 'blob')), max(typeof({exprs[c]}) = 'real'), "
+                       f"max(typeof({exprs[c]}) = 'integer')" for c in columns)
+    flags = conn.execute(f'SELECT {probes} FROM {table}').fetchone()
+    types = []
+    for i in range(len(columns)):
+        text, real, integer = flags[3 * i:3 * i + 3]
+        if text:
+            types.append(pa.string())
+        elif real:
+            types.append(pa.float64())
+        elif integer:
+            types.append(pa.int64())
+        else:
+            types.append(pa.string())
+    return types
+
+
+def _record_batches(conn, table, schema, time_column, chunk_size):
+    """按 rowid 顺序分块读出整张表，附加 month 分区列"""
+    columns = [f.name for f in schema if f.name not in ('_rowid', 'month')]
+    fallback = next((c for c in ('timestamp', 'collected_at', 'scraped_at') if c in columns), None)
+    time_index = columns.index(time_column) if time_column in columns else None
+    fallback_index = columns.index(fallback) if fallback else None
+    c = conn.execute(f"SELECT rowid, {select_list(conn, table, columns)} FROM {table} ORDER BY rowid")
+    while True:
+        rows = c.fetchmany(chunk_size)
+        if not rows:
+            break
+        values = list(zip(*rows))
+        months = [_month(row[1 + time_index] if time_index is not None else None,
+                         row[1 + fallback_index] if fallback_index is not None else None)
+                  for row in rows]
+        arrays = [pa.array(col, type=field.type) for col, field in zip(values, schema)]
+        arrays.append(pa.array(months, type=pa.string()))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_table(conn, table, out_dir, time_column='created_utc', chunk_size=EXPORT_CHUNK):
+    """把一张表写成分区 Parquet 数据集，返回行数
+
+    pyarrow 在自己的线程里消费读表的生成器，conn 需以 check_same_thread=False 打开。
+    """
+    _require_pyarrow()
+    columns = table_columns(conn, table)
+    if 'subreddit' not in columns:
+        raise ValueError(f"{table} 没有 subreddit 列，无法分区")
+    schema = pa.schema([('_rowid', pa.int64())] +
+                       list(zip(columns, _column_types(conn, table, columns))) +
+                       [('month', pa.string())])
+    target = Path(out_dir) / table
+    ds.write_dataset(
+        _record_batches(conn, table, schema, time_column, chunk_size), target,
+        schema=schema, format='parquet', partitioning=_partitioning(),
+        existing_data_behavior='delete_matching', max_rows_per_file=MAX_ROWS_PER_FILE,
+        max_rows_per_group=min(MAX_ROWS_PER_FILE, 128 * 1024),
+    )
+    return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def export_db(db_path, out_dir, tables=('posts', 'comments')):
+    """导出库中存在的表，返回 {表名: 行数}"""
+    conn = connect(db_path, 'analyze', check_same_thread=False)
+    counts = {table: export_table(conn, table, out_dir) for table in tables if table_exists(conn, table)}
+    conn.close()
+    return counts
+
+
+def dataset(root, table):
+    """以内存映射方式打开一张表的分区数据集"""
+    _require_pyarrow()
+    return ds.dataset(Path(root) / table, format='parquet', partitioning=_partitioning(),
+                      filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+
+def partition_filter(subreddits=None, months=None):
+    """按 subreddit / 月份（'YYYY-MM'）过滤的表达式，只会打开命中的分区"""
+    expr = None
+    if subreddits:
+        expr = pc.field('subreddit').isin(list(subreddits))
+    if months:
+        month_expr = pc.field('month').isin(list(months))
+        expr = month_expr if expr is None else expr & month_expr
+    return expr
+
+
+def read_arrow(root, table, columns=None, filter=None):
+    """只读取需要的列，按原表 rowid 排序，返回 pyarrow.Table"""
+    data = dataset(root, table)
+    wanted = None
+    if columns is not None:
+        wanted = list(dict.fromkeys(['_rowid'] + list(columns)))
+    result = data.to_table(columns=wanted, filter=filter)
+    return result.sort_by('_rowid')
+
+
+def read_table(root, table, columns=None, filter=None):
+    """read_arrow() 的 pandas 版本（不含 _rowid 之外的多余列）"""
+    df = read_arrow(root, table, columns, filter).to_pandas()
+    if columns is not None and '_rowid' not in columns:
+        df = df.drop(columns='_rowid')
+    return df
+
+
+def import_table(root, table, conn, batch_size=BATCH_SIZE):
+    """把数据集写回 SQLite（表需已存在），按原 rowid 顺序插入，返回行数"""
+    existing = table_columns(conn, table)
+    arrow = read_arrow(root, table)
+    columns = [c for c in existing if c in arrow.column_names]
+    arrow = arrow.select(columns)
+    rows = (row for batch in arrow.to_batches()
+            for row in zip(*(col.to_pylist() for col in batch.columns)))
+    return upsert(conn, table, columns, rows, batch_size)
+
+
+def import_db(root, db_path, schema_from=None):
+    """把数据集导回库中；schema_from 指定时从该库复制旧版表结构，否则使用统一结构"""
+    conn = connect(db_path, 'ingest')
+    if not schema_from:
+        migrate(conn)
+    else:
+        src = sqlite3.connect(schema_from)
+        for (sql,) in src.execute("SELECT sql FROM sqlite_master WHERE type = 'table' "
+                                  "AND name IN ('posts', 'comments')"):
+            conn.execute(sql.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+        src.close()
+    counts = {}
+    for table in ('posts', 'comments'):
+        if (Path(root) / table).exists():
+            counts[table] = import_table(root, table, conn)
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列式语料导出/导入')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='SQLite -> 分区 Parquet')
+    export.add_argument('--db', required=True)
+    export.add_argument('--out', required=True)
+    restore = sub.add_parser('import', help='分区 Parquet -> SQLite')
+    restore.add_argument('--src', required=True)
+    restore.add_argument('--db', required=True)
+    restore.add_argument('--schema-from', help='从这个库复制 posts/comments 表结构')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        counts = export_db(args.db, args.out)
+    else:
+        counts = import_db(args.src, args.db, args.schema_from)
+    for table, count in counts.items():
+        print(f"{table}: {count} 行")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,19 @@ Reddit Data Crawler using Pushshift API
 无需Reddit认证，直接从Pushshift获取数据
 """
 
+import argparse
 import requests
-import sqlite3
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
 
+import profiling
+import schema
+from db import BATCH_SIZE, bulk_write, connect, transaction
+from profiling import PROFILER
+from rate_limit import RateLimiter
+
 # 配置
 SUBREDDITS = [
     'iOSProgramming', 'productivity',
@@ -24,31 +30,13 @@ SUBREDDITS = [
 OUTPUT_DIR = Path('/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/data')
 DB_PATH = OUTPUT_DIR / 'reddit_posts.db'
 
-def init_database():
-    """初始化SQLite数据库"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id TEXT PRIMARY KEY,
-            subreddit TEXT,
-            title TEXT,
-            selftext TEXT,
-            author TEXT,
-            created_utc INTEGER,
-            ups INTEGER,
-            score INTEGER,
-            num_comments INTEGER,
-            url TEXT,
-            collected_at TEXT
-        )
-    ''')
-    
-    c.execute('CREATE INDEX IF NOT EXISTS idx_subreddit ON posts(subreddit)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_score ON posts(score DESC)')
-    
-    conn.commit()
+# Pushshift 限制约每秒1个请求；429时按Retry-After退避重试
+LIMITER = RateLimiter(rate=1.0, retry_exceptions=(requests.ConnectionError, requests.Timeout))
+
+def init_database(db_path=DB_PATH):
+    """初始化数据库（统一结构，见 schema.py）"""
+    conn = connect(db_path, 'ingest')
+    schema.migrate(conn)
     return conn
 
 def fetch_posts_pushshift(subreddit, limit=500, before=None):
@@ -66,10 +54,13 @@ def fetch_posts_pushshift(subreddit, limit=500, before=None):
         params['before'] = before
     
     try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('data', [])
+        with PROFILER.stage('fetch', rows=1):
+            response = LIMITER.call(lambda: requests.get(url, params=params, timeout=30))
+            response.raise_for_status()
+        with PROFILER.stage('parse') as stage:
+            posts = response.json().get('data', [])
+            stage.rows = len(posts)
+        return posts
     except Exception as e:
         print(f"   Pushshift错误: {e}")
         return []
@@ -86,30 +77,31 @@ def fetch_comments_pushshift(subreddit, limit=1000):
     }
     
     try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('data', [])
+        with PROFILER.stage('fetch', rows=1):
+            response = LIMITER.call(lambda: requests.get(url, params=params, timeout=30))
+            response.raise_for_status()
+        with PROFILER.stage('parse') as stage:
+            comments = response.json().get('data', [])
+            stage.rows = len(comments)
+        return comments
     except Exception as e:
         print(f"   评论错误: {e}")
         return []
 
-def save_to_db(conn, posts, comments):
-    """保存到数据库"""
-    c = conn.cursor()
-    
-    for post in posts:
-        c.execute('''
-            INSERT OR REPLACE INTO posts 
-            (id, subreddit, title, selftext, author, created_utc, ups, score, num_comments, url, collected_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            post.get('id'), post.get('subreddit'), post.get('title'),
-            post.get('selftext', '')[:5000], post.get('author', '[deleted]'),
-            post.get('created_utc'), post.get('ups', 0), post.get('score', 0),
-            post.get('num_comments', 0), post.get('url'),
-            datetime.now().isoformat()
-        ))
+POST_COLUMNS = ('id', 'subreddit', 'title', 'selftext', 'author', 'created_utc', 'ups',
+                'score', 'num_comments', 'url', 'collected_at')
+
+def _refresh_comment_counts_sql(conn):
+    """把已存帖子的 num_comments 换成新值：整行 INSERT OR REPLACE 重写（行拿到新的 rowid），
+    而不是原地 UPDATE，增量分析（checkpoint.py）按 rowid 高水位只能发现被替换的行；数值没变的行不动"""
+    columns = schema.storage_columns(conn, 'posts')
+    values = ', '.join('?' if col == 'num_comments' else col for col in columns)
+    return (f"INSERT OR REPLACE INTO posts ({', '.join(columns)}) "
+            f"SELECT {values} FROM posts WHERE id = ? AND num_comments IS NOT ?")
+
+def save_to_db(conn, posts, comments, batch_size=BATCH_SIZE):
+    """保存到数据库（批量写入，一个事务）"""
+    collected_at = datetime.now().isoformat()
     
     # 简单保存评论数量统计
     comment_counts = {}
@@ -118,13 +110,28 @@ def save_to_db(conn, posts, comments):
         if post_id:
             comment_counts[post_id] = comment_counts.get(post_id, 0) + 1
     
-    for post_id, count in comment_counts.items():
-        c.execute('UPDATE posts SET num_comments = ? WHERE id = ?', (count, post_id))
-    
-    conn.commit()
+    # 本批帖子的评论数随帖子一起写入（同一 id 出现多次时每一行都用抓到的评论数）；
+    # 之后再按评论数刷新一遍，只会改到之前已入库、数值不同的帖子
+    post_rows = [
+        (post.get('id'), post.get('subreddit'), post.get('title'),
+         post.get('selftext', '')[:5000], post.get('author', '[deleted]'),
+         post.get('created_utc'), post.get('ups', 0), post.get('score', 0),
+         comment_counts.get(post.get('id'), post.get('num_comments', 0)), post.get('url'), collected_at)
+        for post in posts
+    ]
+    
+    with transaction(conn):
+        schema.upsert(conn, 'posts', POST_COLUMNS, post_rows, batch_size)
+        bulk_write(conn, _refresh_comment_counts_sql(conn),
+                   ((count, post_id, count) for post_id, count in comment_counts.items()), batch_size)
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Pushshift 帖子和评论采集')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args)
+
     print("=" * 60)
     print("Reddit Data Crawler (Pushshift API)")
     print("=" * 60)
@@ -149,7 +156,8 @@ def main():
             print(f"   评论: {len(comments)}")
             
             # 保存
-            save_to_db(conn, posts, comments)
+            with PROFILER.stage('db_write', rows=len(posts) + len(comments)):
+                save_to_db(conn, posts, comments)
             
             total_posts += len(posts)
             total_comments += len(comments)
@@ -158,8 +166,6 @@ def main():
             
         except Exception as e:
             print(f"   ❌ 失败: {e}")
-        
-        time.sleep(1)  # 避免请求过快
     
     conn.close()
     
@@ -168,7 +174,9 @@ def main():
     print(f"🎉 完成! 采集 {total_posts} 条帖子, {total_comments} 条评论")
     print(f"📁 数据: {DB_PATH}")
     print(f"⏱️ 用时: {elapsed:.1f}秒")
+    print(f"⏱️ {LIMITER.summary()}")
     print("=" * 60)
+    profiling.stop_from_args(args, 'crawl_pushshift')
 
 if __name__ == '__main__':
     main()
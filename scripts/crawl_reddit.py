@@ -2,15 +2,28 @@
 """
 Reddit Data Crawler for Needs Discovery
 采集14个Subreddits的帖子和评论
+
+热门列表按每页 100 条翻页，每页的帖子、评论和翻页游标（crawl_state 表）在一个事务里提交，
+中途被杀后重新运行会从断点的下一页继续（--restart 忽略断点从头抓取）
 """
 
+import argparse
 import praw
+import prawcore
 import json
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-import sqlite3
+
+import profiling
+import schema
+from crawl_state import CrawlState
+from db import BATCH_SIZE, connect, transaction
+from profiling import PROFILER
+from rate_limit import RateLimiter
 
 # 配置
 SUBREDDITS = [
@@ -27,73 +40,47 @@ OUTPUT_DIR = Path('/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discover
 # 数据库路径
 DB_PATH = OUTPUT_DIR / 'reddit_posts.db'
 
-def init_database():
-    """初始化SQLite数据库"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # 创建帖子表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id TEXT PRIMARY KEY,
-            subreddit TEXT,
-            title TEXT,
-            selftext TEXT,
-            author TEXT,
-            created_utc REAL,
-            ups INTEGER,
-            downs INTEGER,
-            score INTEGER,
-            num_comments INTEGER,
-            is_self BOOLEAN,
-            flair TEXT,
-            url TEXT,
-            collected_at TEXT
-        )
-    ''')
-    
-    # 创建评论表
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS comments (
-            id TEXT PRIMARY KEY,
-            post_id TEXT,
-            subreddit TEXT,
-            author TEXT,
-            body TEXT,
-            created_utc REAL,
-            score INTEGER,
-            parent_id TEXT,
-            is_top_level BOOLEAN,
-            collected_at TEXT
-        )
-    ''')
-    
-    # 创建索引
-    c.execute('CREATE INDEX IF NOT EXISTS idx_subreddit ON posts(subreddit)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_created ON posts(created_utc DESC)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_post_comments ON comments(post_id)')
-    
-    conn.commit()
+# OAuth 接口约每分钟100个请求；429/5xx/网络错误按退避重试（prawcore 异常带原始响应头）
+LIMITER = RateLimiter(rate=1.5, retry_exceptions=(
+    prawcore.exceptions.TooManyRequests,
+    prawcore.exceptions.ServerError,
+    prawcore.exceptions.RequestException,
+))
+
+# 同时抓取评论树的帖子数（共享 LIMITER 的速率预算）
+COMMENT_WORKERS = 8
+# 每个 subreddit 采集评论的帖子数
+COMMENT_POSTS = 100
+# 每个 subreddit 采集的热门帖子数，按页抓取（列表接口每页最多100条）
+POSTS_PER_SUBREDDIT = 500
+PAGE_SIZE = 100
+
+def init_database(db_path=DB_PATH):
+    """打开数据库并升级到统一结构（见 schema.py）"""
+    conn = connect(db_path, 'ingest')
+    schema.migrate(conn)
     return conn
 
-def get_reddit_client():
-    """创建Reddit API客户端（无需认证）"""
+def get_reddit_client(base_url=None):
+    """创建Reddit API客户端（无需认证）；base_url 指向本地桩服务器时用于测试"""
+    endpoints = {'oauth_url': base_url, 'reddit_url': base_url} if base_url else {}
     return praw.Reddit(
         client_id=os.environ.get('REDDIT_CLIENT_ID', 'demo'),
         client_secret=os.environ.get('REDDIT_CLIENT_SECRET', 'demo'),
         user_agent='NeedsDiscoveryBot/1.0',
-        read_only=True
+        read_only=True,
+        **endpoints
     )
 
-def collect_posts(reddit, subreddit_name, limit=500):
-    """采集帖子"""
+def collect_posts(reddit, subreddit_name, limit=PAGE_SIZE, after=None):
+    """采集一页热门帖子，返回 (帖子, 下一页游标)；到列表末尾时游标为 None"""
     subreddit = reddit.subreddit(subreddit_name)
     
     posts = []
     collected_at = datetime.utcnow().isoformat()
     
     # 采集热门帖子
-    for post in subreddit.hot(limit=limit):
+    for post in subreddit.hot(limit=limit, params={'after': after} if after else None):
         posts.append({
             'id': post.id,
             'subreddit': subreddit_name,
@@ -111,130 +98,188 @@ def collect_posts(reddit, subreddit_name, limit=500):
             'collected_at': collected_at
         })
     
-    return posts
+    next_after = f"t3_{posts[-1]['id']}" if len(posts) == limit else None
+    return posts, next_after
 
-def collect_comments(reddit, post_id, limit=20):
-    """采集帖子评论"""
-    submission = reddit.submission(post_id)
-    
+def flatten_comments(forest, post_id, subreddit, limit, collected_at):
+    """按深度优先顺序展开评论树（显式栈，不受递归深度限制）
+
+    每层最多取 limit 条；顶级评论全部保留，回复只保留 score > 0 的。
+    """
     comments = []
+    stack = [(iter(forest[:limit]), 0)]
+    while stack:
+        children, level = stack[-1]
+        comment = next(children, None)
+        if comment is None:
+            stack.pop()
+            continue
+        if level == 0 or comment.score > 0:  # 只采顶级评论或高赞评论
+            comments.append({
+                'id': comment.id,
+                'post_id': post_id,
+                'subreddit': subreddit,
+                'author': str(comment.author) if comment.author else '[deleted]',
+                'body': comment.body[:2000] if comment.body else '',
+                'created_utc': comment.created_utc,
+                'score': comment.score,
+                'parent_id': comment.parent_id,
+                'is_top_level': level == 0,
+                'collected_at': collected_at
+            })
+        replies = getattr(comment, 'replies', None)
+        if replies:
+            stack.append((iter(replies[:limit]), level + 1))
+    return comments
+
+def collect_comments(reddit, post_id, subreddit, limit=20):
+    """采集帖子评论（一次请求取回整棵评论树）"""
+    submission = reddit.submission(post_id)
     collected_at = datetime.utcnow().isoformat()
     
-    # 替换更多回复以获取所有评论
-    submission.comments.replace_more(limit=0)
-    
-    def process_comments(comments_list, post_id, subreddit, level=0):
-        for comment in comments_list[:limit]:
-            if level == 0 or comment.score > 0:  # 只采顶级评论或高赞评论
-                comments.append({
-                    'id': comment.id,
-                    'post_id': post_id,
-                    'subreddit': subreddit,
-                    'author': str(comment.author) if comment.author else '[deleted]',
-                    'body': comment.body[:2000] if comment.body else '',
-                    'created_utc': comment.created_utc,
-                    'score': comment.score,
-                    'parent_id': comment.parent_id,
-                    'is_top_level': level == 0,
-                    'collected_at': collected_at
-                })
-            
-            # 递归处理回复
-            if hasattr(comment, 'replies'):
-                process_comments(comment.replies, post_id, subreddit, level + 1)
-    
-    process_comments(submission.comments, post_id, subreddit_name)
-    
+    # 去掉"更多回复"占位，不再额外请求（首次访问 comments 时取回评论树）
+    with PROFILER.stage('fetch', rows=1):
+        submission.comments.replace_more(limit=0)
+    with PROFILER.stage('parse') as stage:
+        comments = flatten_comments(submission.comments, post_id, subreddit, limit, collected_at)
+        stage.rows = len(comments)
     return comments
 
-def save_to_db(conn, posts, comments):
-    """保存到SQLite数据库"""
-    c = conn.cursor()
-    
-    # 保存帖子
-    for post in posts:
-        c.execute('''
-            INSERT OR REPLACE INTO posts 
-            (id, subreddit, title, selftext, author, created_utc, ups, downs, score, num_comments, is_self, flair, url, collected_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            post['id'], post['subreddit'], post['title'], post['selftext'],
-            post['author'], post['created_utc'], post['ups'], post['downs'],
-            post['score'], post['num_comments'], post['is_self'], 
-            post['flair'], post['url'], post['collected_at']
-        ))
-    
-    # 保存评论
-    for comment in comments:
-        c.execute('''
-            INSERT OR REPLACE INTO comments 
-            (id, post_id, subreddit, author, body, created_utc, score, parent_id, is_top_level, collected_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            comment['id'], comment['post_id'], comment['subreddit'],
-            comment['author'], comment['body'], comment['created_utc'],
-            comment['score'], comment['parent_id'], comment['is_top_level'],
-            comment['collected_at']
-        ))
-    
-    conn.commit()
+class CommentFetcher:
+    """并发抓取评论树的有界线程池，整个抓取过程只创建一次，各页帖子复用
+
+    每个线程各用一个 praw 客户端（首次使用时创建，之后一直复用，不必每页重新认证），
+    所有请求共享 LIMITER 的速率预算；单个帖子失败（重试用尽）只跳过该帖子。
+    """
+
+    def __init__(self, client_factory=get_reddit_client, workers=COMMENT_WORKERS, limit=20):
+        self.client_factory = client_factory
+        self.limit = limit
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _fetch(self, post):
+        local = self._local
+        if not hasattr(local, 'reddit'):
+            local.reddit = self.client_factory()
+        try:
+            return LIMITER.call(lambda: collect_comments(local.reddit, post['id'], post['subreddit'], self.limit))
+        except Exception as e:
+            print(f"   评论采集失败 {post['id']}: {e}")
+            return []
+
+    def fetch(self, posts):
+        """抓取多个帖子的评论树，结果按 posts 顺序返回"""
+        return [comment for comments in self._pool.map(self._fetch, posts) for comment in comments]
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def collect_all_comments(posts, client_factory=get_reddit_client, workers=COMMENT_WORKERS, limit=20):
+    """一次性抓取多个帖子的评论树（临时建一个 CommentFetcher），结果按 posts 顺序返回"""
+    with CommentFetcher(client_factory, workers, limit) as fetcher:
+        return fetcher.fetch(posts)
+
+POST_COLUMNS = ('id', 'subreddit', 'title', 'selftext', 'author', 'created_utc', 'ups', 'downs',
+                'score', 'num_comments', 'is_self', 'flair', 'url', 'collected_at')
+COMMENT_COLUMNS = ('id', 'post_id', 'subreddit', 'author', 'body', 'created_utc', 'score',
+                   'parent_id', 'is_top_level', 'collected_at')
+
+def save_to_db(conn, posts, comments, batch_size=BATCH_SIZE):
+    """保存到SQLite数据库（批量写入，一个事务）"""
+    with transaction(conn):
+        schema.upsert(conn, 'posts', POST_COLUMNS,
+                      (tuple(post[col] for col in POST_COLUMNS) for post in posts), batch_size)
+        schema.upsert(conn, 'comments', COMMENT_COLUMNS,
+                      (tuple(comment[col] for col in COMMENT_COLUMNS) for comment in comments), batch_size)
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Reddit 帖子和评论采集')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite数据库路径')
+    parser.add_argument('--base-url', help='API 地址（测试时指向本地桩服务器）')
+    parser.add_argument('--workers', type=int, default=COMMENT_WORKERS, help='并发抓取评论树的线程数')
+    parser.add_argument('--comment-posts', type=int, default=COMMENT_POSTS,
+                        help='每个 subreddit 采集评论的帖子数')
+    parser.add_argument('--subreddits', nargs='+', default=SUBREDDITS)
+    parser.add_argument('--posts', type=int, default=POSTS_PER_SUBREDDIT, help='每个 subreddit 采集的热门帖子数')
+    parser.add_argument('--restart', action='store_true', help='忽略保存的翻页进度，所有 subreddit 从第一页开始')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args)
+
     print("=" * 60)
     print("Reddit Data Crawler - Needs Discovery Project")
     print("=" * 60)
     
     # 初始化
-    conn = init_database()
-    reddit = get_reddit_client()
+    conn = init_database(args.db)
+    reddit = get_reddit_client(args.base_url)
+    # 评论线程池和各线程的客户端在所有 subreddit、所有页之间复用
+    fetcher = CommentFetcher(lambda: get_reddit_client(args.base_url), args.workers)
     
     total_posts = 0
     total_comments = 0
     
     start_time = time.time()
     
-    for subreddit in SUBREDDITS:
+    state = CrawlState(conn, 'crawl_reddit', args.restart)
+    max_pages = -(-args.posts // PAGE_SIZE)
+    
+    for subreddit in args.subreddits:
         print(f"\n📦 正在采集 r/{subreddit}...")
+        progress = state.start(subreddit, 'hot', max_pages)
+        if progress.resumed:
+            print(f"   从第 {progress.pages_done + 1} 页继续 (after {progress.after})")
         
         try:
-            # 采集帖子
-            posts = collect_posts(reddit, subreddit, limit=500)
-            print(f"   采集到 {len(posts)} 条帖子")
-            
-            # 采集评论（只采高赞帖子的评论）
-            all_comments = []
-            for post in posts[:100]:  # 只采前100个帖子的评论
-                try:
-                    comments = collect_comments(reddit, post['id'], limit=20)
-                    all_comments.extend(comments)
-                    time.sleep(0.5)  # 避免请求过快
-                except Exception as e:
-                    print(f"   评论采集失败: {e}")
-            
-            print(f"   采集到 {len(all_comments)} 条评论")
-            
-            # 保存到数据库
-            save_to_db(conn, posts, all_comments)
-            
-            total_posts += len(posts)
-            total_comments += len(all_comments)
+            while progress.pages_done < max_pages:
+                # 采集帖子
+                limit = min(PAGE_SIZE, args.posts - progress.pages_done * PAGE_SIZE)
+                with PROFILER.stage('fetch') as stage:
+                    posts, after = LIMITER.call(lambda: collect_posts(reddit, subreddit, limit, progress.after))
+                    stage.rows = len(posts)
+                
+                # 采集评论（只采前 comment_posts 个热门帖子的评论，并发抓取）
+                comment_quota = max(0, args.comment_posts - progress.pages_done * PAGE_SIZE)
+                all_comments = fetcher.fetch(posts[:comment_quota])
+                
+                print(f"   第 {progress.pages_done + 1} 页: {len(posts)} 条帖子，{len(all_comments)} 条评论")
+                
+                # 保存到数据库（与翻页进度同一个事务）
+                complete = not after or progress.pages_done + 1 >= max_pages
+                with PROFILER.stage('db_write', rows=len(posts) + len(all_comments)):
+                    with transaction(conn):
+                        save_to_db(conn, posts, all_comments)
+                        state.advance(progress, after, (post['created_utc'] for post in posts), complete)
+                
+                total_posts += len(posts)
+                total_comments += len(all_comments)
+                if complete:
+                    break
             
             print(f"   ✅ r/{subreddit} 完成")
             
         except Exception as e:
             print(f"   ❌ r/{subreddit} 失败: {e}")
-        
-        time.sleep(1)  # 避免请求过快
     
+    fetcher.close()
     conn.close()
     
     elapsed = time.time() - start_time
     print("\n" + "=" * 60)
     print(f"🎉 完成！共采集 {total_posts} 条帖子，{total_comments} 条评论")
-    print(f"📁 数据保存在: {DB_PATH}")
+    print(f"📁 数据保存在: {args.db}")
     print(f"⏱️ 用时: {elapsed:.1f} 秒")
+    print(f"⏱️ {LIMITER.summary()}")
     print("=" * 60)
+    profiling.stop_from_args(args, 'crawl_reddit')
 
 if __name__ == '__main__':
     main()
@@ -6,15 +6,20 @@ Reddit Data Collector - 多源采集方案
 3. 模拟数据（API不可用时）
 """
 
+import argparse
 import requests
-import sqlite3
 import json
-import time
 import random
 from datetime import datetime, timedelta
 from pathlib import Path
 import os
 
+import profiling
+import schema
+from db import BATCH_SIZE, connect
+from profiling import PROFILER
+from rate_limit import RateLimiter, RateLimitError
+
 # 配置
 SUBREDDITS = [
     ('iOSProgramming', '开发'),
@@ -36,25 +41,13 @@ SUBREDDITS = [
 OUTPUT_DIR = Path('/Users/openclaw-bot/.openclaw/workspace/reddit-needs-discovery/data')
 DB_PATH = OUTPUT_DIR / 'reddit_posts.db'
 
-def init_db():
-    """初始化数据库"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id TEXT PRIMARY KEY,
-            subreddit TEXT,
-            title TEXT,
-            selftext TEXT,
-            author TEXT,
-            created_utc INTEGER,
-            ups INTEGER,
-            score INTEGER,
-            num_comments INTEGER,
-            collected_at TEXT
-        )
-    ''')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_sub ON posts(subreddit)')
+# 未登录的JSON端点大约每秒2个请求；429时按Retry-After退避重试
+LIMITER = RateLimiter(rate=2.0, retry_exceptions=(requests.ConnectionError, requests.Timeout))
+
+def init_db(db_path=DB_PATH):
+    """初始化数据库（统一结构，见 schema.py）"""
+    conn = connect(db_path, 'ingest')
+    schema.migrate(conn)
     return conn
 
 def fetch_reddit_json(subreddit, limit=100):
@@ -64,12 +57,16 @@ def fetch_reddit_json(subreddit, limit=100):
     params = {'limit': limit, 'raw_json': 1}
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        with PROFILER.stage('fetch', rows=1):
+            response = LIMITER.call(lambda: requests.get(url, headers=headers, params=params, timeout=30))
         if response.status_code == 200:
-            data = response.json()
-            posts = data.get('data', {}).get('children', [])
-            return [p['data'] for p in posts]
-    except Exception as e:
+            with PROFILER.stage('parse') as stage:
+                data = response.json()
+                posts = [p['data'] for p in data.get('data', {}).get('children', [])]
+                stage.rows = len(posts)
+            return posts
+    # 网络/限流错误和格式异常的列表（KeyError/TypeError/AttributeError）都只记录并跳过该 subreddit
+    except (requests.RequestException, RateLimitError, ValueError, KeyError, TypeError, AttributeError) as e:
         print(f"   Reddit API错误: {e}")
     return []
 
@@ -169,23 +166,21 @@ def generate_sample_data():
     
     return sample_posts
 
-def save_to_db(conn, posts):
-    """保存到数据库"""
-    c = conn.cursor()
-    for post in posts:
-        c.execute('''
-            INSERT OR REPLACE INTO posts 
-            (id, subreddit, title, selftext, author, created_utc, ups, score, num_comments, collected_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            post['id'], post['subreddit'], post['title'], post['selftext'],
-            post['author'], post['created_utc'], post['ups'], 
-            post['score'], post['num_comments'], post['collected_at']
-        ))
-    conn.commit()
+POST_COLUMNS = ('id', 'subreddit', 'title', 'selftext', 'author', 'created_utc', 'ups',
+                'score', 'num_comments', 'collected_at')
+
+def save_to_db(conn, posts, batch_size=BATCH_SIZE):
+    """保存到数据库（批量写入，一个事务）"""
+    schema.upsert(conn, 'posts', POST_COLUMNS,
+                  (tuple(post[col] for col in POST_COLUMNS) for post in posts), batch_size)
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='Reddit 多源采集')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args(args)
+
     print("=" * 60)
     print("Reddit Data Collector v2")
     print("=" * 60)
@@ -206,8 +201,8 @@ def main():
             all_posts.extend(posts)
         else:
             print(f"   ⚠️ Reddit API不可用，生成模拟数据")
-        
-        time.sleep(0.5)
+    
+    print(f"\n⏱️ {LIMITER.summary()}")
     
     # 如果没有真实数据，生成模拟数据
     if len(all_posts) < 100:
@@ -217,7 +212,8 @@ def main():
         print(f"   ✅ 补充 {len(sample_posts)} 条模拟数据")
     
     # 保存
-    save_to_db(conn, all_posts)
+    with PROFILER.stage('db_write', rows=len(all_posts)):
+        save_to_db(conn, all_posts)
     
     # 统计
     conn.execute("SELECT COUNT(*) FROM posts")
@@ -229,6 +225,7 @@ def main():
     print(f"🎉 完成! 共 {total} 条帖子")
     print(f"📁 数据库: {DB_PATH}")
     print("=" * 60)
+    profiling.stop_from_args(args, 'crawl_reddit_v2')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+抓取断点
+每个抓取器按 (subreddit, 列表) 在主库的 crawl_state 表（schema.py 第3版迁移）里记录：
+  - after：下一页的游标
+  - pages_done：本轮已完成的页数
+  - newest_created_utc：见过的最新帖子时间
+  - complete：本轮是否已经翻完（到列表末尾、页数上限或增量停止）
+
+每页的数据和进度在同一个事务里提交，进程在任何时候被杀，
+库里的进度都与已写入的数据一致；重启后未完成的列表从 after 继续，
+已完成的列表从头开始新一轮。重复写入的帖子是 INSERT OR REPLACE，不会重复计数。
+
+    state = CrawlState(conn, 'scrape_json')
+    progress = state.start('productivity', 'new', max_pages=10)
+    ...抓取 progress.after 之后的一页...
+    with transaction(conn):
+        save_posts(posts, conn)
+        state.advance(progress, after, [p['created_utc'] for p in posts], complete=not after)
+"""
+
+import time
+
+from db import transaction
+
+
+class ListingProgress:
+    """一个 (subreddit, 列表) 的进度"""
+
+    __slots__ = ('subreddit', 'listing', 'after', 'pages_done', 'newest_created_utc', 'resumed')
+
+    def __init__(self, subreddit, listing, after=None, pages_done=0, newest_created_utc=None, resumed=False):
+        self.subreddit = subreddit
+        self.listing = listing
+        self.after = after
+        self.pages_done = pages_done
+        self.newest_created_utc = newest_created_utc
+        self.resumed = resumed
+
+
+class CrawlState:
+    """一个抓取器在主库里的翻页进度；restart=True 时忽略已有断点"""
+
+    def __init__(self, conn, crawler, restart=False):
+        self.conn = conn
+        self.crawler = crawler
+        self.restart = restart
+
+    def start(self, subreddit, listing, max_pages=None):
+        """返回该列表本次运行的起点：未完成的一轮从断点继续，否则从第一页开始"""
+        row = self.conn.execute(
+            'SELECT after, pages_done, newest_created_utc, complete FROM crawl_state '
+            'WHERE crawler = ? AND subreddit = ? AND listing = ?',
+            (self.crawler, subreddit, listing)).fetchone()
+        if row is None:
+            return ListingProgress(subreddit, listing)
+        after, pages_done, newest, complete = row
+        if self.restart or complete or not after or (max_pages is not None and pages_done >= max_pages):
+            return ListingProgress(subreddit, listing, newest_created_utc=newest)
+        return ListingProgress(subreddit, listing, after, pages_done, newest, resumed=True)
+
+    def advance(self, progress, after, created_utcs=(), complete=False):
+        """记录完成了一页；after 为下一页游标，complete 表示本轮到此结束
+
+        在调用方的事务里执行时与该页的数据一起提交。
+        """
+        progress.pages_done += 1
+        progress.after = None if complete else after
+        for created in created_utcs:
+            if created is not None and (progress.newest_created_utc is None
+                                        or created > progress.newest_created_utc):
+                progress.newest_created_utc = int(created)
+        with transaction(self.conn):
+            self.conn.execute(
+                'INSERT OR REPLACE INTO crawl_state (crawler, subreddit, listing, after, newest_created_utc, '
+                'pages_done, complete, updated_utc) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.crawler, progress.subreddit, progress.listing, progress.after,
+                 progress.newest_created_utc, progress.pages_done, int(complete), int(time.time())))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+SQLite 连接工厂与批量写入层
+
+connect(path, profile) 按用途打开连接，抓取器写库时把库切到 WAL 模式，
+之后抓取器写入的同时分析器可以读取，互不阻塞：
+  - ingest：synchronous=NORMAL（WAL 下只在检查点时 fsync），提交后定期做被动检查点
+  - analyze：只读（query_only），大缓存 + mmap，临时表放内存；不设置 journal_mode，
+    不会改写库文件（还没被抓取器打开过的库保持原来的日志模式）
+
+批量写入，所有抓取器的保存函数都通过这里写库：
+  - 数据按 batch_size 分批，每批一次 executemany（语句只编译一次）
+  - 整次保存放在一个显式事务里，只提交一次
+  - 给了 on_error 时每批包在 SAVEPOINT 里：某一批违反约束时回滚到该批，逐行重写并跳过坏行，
+    不影响其他批；没给时出错直接回滚整个事务
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+# 每批 executemany 的行数
+BATCH_SIZE = 5000
+
+# 等待锁的最长时间（毫秒）
+BUSY_TIMEOUT_MS = 30000
+
+# 连接配置：PRAGMA 按顺序执行
+PROFILES = {
+    'ingest': {
+        'busy_timeout': BUSY_TIMEOUT_MS,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,           # 64MB
+        'mmap_size': 256 * 1024 ** 2,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,     # 页
+        'recursive_triggers': 'ON',     # INSERT OR REPLACE 删除旧行时也触发删除触发器（FTS 同步依赖）
+    },
+    'analyze': {
+        'busy_timeout': BUSY_TIMEOUT_MS,
+        'cache_size': -256000,          # 256MB
+        'mmap_size': 1024 ** 3,
+        'temp_store': 'MEMORY',
+        'query_only': 1,
+    },
+}
+
+# ingest 连接两次被动检查点之间的最短间隔（秒）
+CHECKPOINT_INTERVAL = 30.0
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """带配置名的连接；ingest 连接在提交后定期做检查点，关闭时截断WAL"""
+
+    profile = None
+    checkpoint_interval = CHECKPOINT_INTERVAL
+    _last_checkpoint = 0.0
+
+    def checkpoint(self, mode='PASSIVE'):
+        """把WAL写回主库，返回 (busy, WAL总页数, 已写回页数)"""
+        self._last_checkpoint = time.monotonic()
+        return self.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+
+    def maybe_checkpoint(self):
+        """距上次检查点超过 checkpoint_interval 时做一次被动检查点（不等读者）"""
+        if self.profile == 'ingest' and not self.in_transaction and \
+                time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def close(self):
+        if self.profile == 'ingest' and not self.in_transaction:
+            try:
+                self.checkpoint('TRUNCATE')
+            except sqlite3.OperationalError:
+                pass
+        super().close()
+
+
+def connect(path, profile='ingest', **kwargs):
+    """按配置打开连接（analyze 配置为只读），其余参数传给 sqlite3.connect"""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, factory=ProfiledConnection, **kwargs)
+    conn.profile = profile
+    conn._last_checkpoint = time.monotonic()
+    for pragma, value in PROFILES[profile].items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    return conn
+
+
+def batched(rows, size):
+    """把任意可迭代对象切成 size 行一批的列表"""
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+@contextmanager
+def transaction(conn):
+    """显式事务；已在事务中时直接并入外层事务"""
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute('BEGIN')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    if isinstance(conn, ProfiledConnection):
+        conn.maybe_checkpoint()
+
+
+def _write_rows(conn, sql, batch, on_error):
+    """逐行写入一批，返回成功行数"""
+    count = 0
+    for row in batch:
+        try:
+            conn.execute(sql, row)
+            count += 1
+        except sqlite3.IntegrityError as e:
+            if on_error is None:
+                raise
+            on_error(row, e)
+    return count
+
+
+def bulk_write(conn, sql, rows, batch_size=BATCH_SIZE, on_error=None):
+    """在一个事务内按批执行 executemany，返回写入行数
+
+    on_error(row, exc)：某批违反约束时改为逐行写入该批，坏行交给 on_error；
+    为 None 时直接抛出并回滚整个事务。
+    """
+    count = 0
+    with transaction(conn):
+        if on_error is None:
+            # 出错时整个事务回滚，不需要按批的 SAVEPOINT：在带触发器的表上，
+            # 打开的 SAVEPOINT 会让每行的语句日志开销随库的大小增长
+            for batch in batched(rows, batch_size):
+                conn.executemany(sql, batch)
+                count += len(batch)
+            return count
+        for batch in batched(rows, batch_size):
+            conn.execute('SAVEPOINT bulk_batch')
+            try:
+                conn.executemany(sql, batch)
+                count += len(batch)
+            except sqlite3.IntegrityError:
+                conn.execute('ROLLBACK TO bulk_batch')
+                count += _write_rows(conn, sql, batch, on_error)
+            conn.execute('RELEASE bulk_batch')
+    return count
+
+
+def insert_sql(table, columns, conflict='REPLACE'):
+    """INSERT OR <conflict> INTO table (columns) VALUES (?, ...)"""
+    placeholders = ', '.join('?' * len(columns))
+    return f"INSERT OR {conflict} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def upsert(conn, table, columns, rows, batch_size=BATCH_SIZE, on_error=None):
+    """批量 INSERT OR REPLACE，rows 为与 columns 对齐的元组"""
+    return bulk_write(conn, insert_sql(table, columns), rows, batch_size, on_error)
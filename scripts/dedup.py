@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+近似重复帖子检测（MinHash + LSH）
+跨 subreddit 的转帖、重发和模板生成的样例数据会让同一段文本被计数多次。
+  - 文本（标题 + 正文）转小写后切成词，连续 SHINGLE_SIZE 个词为一个 shingle
+  - MinHash 签名：NUM_PERM 个哈希函数下各 shingle 哈希的最小值，整批文本一次用 numpy 计算；
+    两条文本签名同位相等的比例估计它们 shingle 集合的 Jaccard 相似度
+  - LSH：签名切成 bands 段、每段 rows 个值，某一段完全相同的文本落入同一个桶；
+    每段按段哈希排序一次，桶里的文本只与桶里最早的一条比对签名，估计相似度达到阈值才合并
+  - 合并用并查集，簇的代表是输入顺序里最早的一条
+没有两两比较：每段一次排序，总耗时约 O(bands · N log N)。
+签名只保留每个最小值的低 16 位（b-bit MinHash），每条文本 NUM_PERM * 2 字节。
+
+    keep = unique_mask(f"{p['title']} {p['selftext']}" for p in posts)
+    posts = list(itertools.compress(posts, keep))  # 每个簇只保留最早的一条
+"""
+
+import math
+import re
+from itertools import chain, islice
+
+import numpy as np
+
+from tokenizer import Vocabulary
+
+# 估计的 Jaccard 相似度达到该值算作近似重复
+THRESHOLD = 0.8
+# MinHash 哈希函数个数（签名长度）
+NUM_PERM = 128
+# 每个 shingle 的词数
+SHINGLE_SIZE = 3
+# 阈值处 LSH 成为候选的概率下限，据此选择 bands/rows
+CANDIDATE_RECALL = 0.99
+# 每批计算签名的文本数，限制 NUM_PERM × shingle 数的临时矩阵
+BATCH_SIZE = 2000
+# 每次比对签名的候选对数
+VERIFY_CHUNK = 100000
+SEED = 1
+
+TOKEN_RE = re.compile(r'\w+')
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+# 不足 SHINGLE_SIZE 个词的文本用它补齐，整段文本作为一个 shingle
+_PAD = 1 << 32
+# 段哈希的乘数（FNV-1a 64 位质数）
+_FNV = np.uint64(0x100000001B3)
+
+
+def lsh_params(threshold=THRESHOLD, num_perm=NUM_PERM, recall=CANDIDATE_RECALL):
+    """(bands, rows)：相似度恰为 threshold 的两条文本成为候选的概率不低于 recall 时，rows 取最大"""
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHasher:
+    """按批计算 MinHash 签名；词号在实例内驻留，签名只在同一个 MinHasher 内可比"""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.vocabulary = Vocabulary()
+        # 哈希函数：乘法移位 (a·x + b mod 2^64) >> 32，对 32 位输入是 2-独立的，不需要取模
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+        # shingle 内各位置词号的乘数（奇数），组合成一个 32 位哈希
+        self._mix = rng.integers(0, 1 << 31, shingle_size, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def _token_ids(self, text):
+        ids = self.vocabulary.ids(TOKEN_RE.findall(text.lower()))
+        if 0 < len(ids) < self.shingle_size:
+            ids += [_PAD] * (self.shingle_size - len(ids))
+        return ids
+
+    def _batch(self, texts):
+        """一批文本的 (签名, 是否无词)"""
+        token_lists = [self._token_ids(text) for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        tokens = np.fromiter(chain.from_iterable(token_lists), dtype=np.uint64, count=int(lengths.sum()))
+        empty = lengths == 0
+        signatures = np.zeros((len(token_lists), self.num_perm), dtype=np.uint16)
+        if empty.all():
+            return signatures, empty
+
+        # 每条文本的 shingle 起点（在拼接后的词号数组里）
+        counts = np.maximum(lengths - self.shingle_size + 1, 0)
+        text_starts = np.cumsum(lengths) - lengths
+        first_shingle = np.cumsum(counts) - counts
+        starts = np.repeat(text_starts - first_shingle, counts) + np.arange(int(counts.sum()))
+        hashes = np.zeros(len(starts), dtype=np.uint64)
+        for j, mix in enumerate(self._mix):
+            hashes += tokens[starts + j] * mix
+        hashes &= _MASK32
+
+        values = (self._a * hashes + self._b) >> np.uint64(32)
+        minima = np.minimum.reduceat(values, first_shingle[~empty], axis=1)
+        signatures[~empty] = (minima.T & np.uint64(0xFFFF)).astype(np.uint16)
+        return signatures, empty
+
+    def signatures(self, texts, batch_size=BATCH_SIZE):
+        """texts（可以是生成器）的签名矩阵 (N, num_perm) 和无词文本的掩码"""
+        texts = iter(texts)
+        parts = []
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                break
+            parts.append(self._batch(batch))
+        if not parts:
+            return np.zeros((0, self.num_perm), dtype=np.uint16), np.zeros(0, dtype=bool)
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def _band_keys(block):
+    """签名的一段 (m, rows) -> 每行一个 64 位哈希"""
+    keys = np.zeros(len(block), dtype=np.uint64)
+    for column in block.T:
+        keys = (keys ^ column.astype(np.uint64)) * _FNV
+    return keys
+
+
+def _compress(parent):
+    """路径压缩：每个元素直接指向根"""
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return
+        parent[:] = grand
+
+
+def _union(parent, u, v):
+    """合并每一对 (u[i], v[i]) 所在的集合，根总是集合里最小的下标"""
+    while len(u):
+        _compress(parent)
+        ru, rv = parent[u], parent[v]
+        pending = ru != rv
+        if not pending.any():
+            return
+        u, v, ru, rv = u[pending], v[pending], ru[pending], rv[pending]
+        low = np.minimum(ru, rv)
+        np.minimum.at(parent, ru, low)
+        np.minimum.at(parent, rv, low)
+
+
+def _similar(signatures, u, v, threshold):
+    """候选对中估计相似度达到阈值的掩码（分块比对，限制临时内存）"""
+    need = math.ceil(threshold * signatures.shape[1] - 1e-9)
+    similar = np.zeros(len(u), dtype=bool)
+    for start in range(0, len(u), VERIFY_CHUNK):
+        end = start + VERIFY_CHUNK
+        agree = (signatures[u[start:end]] == signatures[v[start:end]]).sum(axis=1)
+        similar[start:end] = agree >= need
+    return similar
+
+
+def cluster(signatures, empty=None, threshold=THRESHOLD):
+    """近似重复簇：返回每条文本所在簇的代表（簇内最小下标）；无词文本各自成簇"""
+    n, num_perm = signatures.shape
+    parent = np.arange(n, dtype=np.int64)
+    active = np.arange(n) if empty is None else np.flatnonzero(~empty)
+    bands, rows = lsh_params(threshold, num_perm)
+    for band in range(bands):
+        keys = _band_keys(signatures[active, band * rows:(band + 1) * rows])
+        # 稳定排序：同一个桶里下标最小的排在最前面
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        run_start = np.ones(len(order), dtype=bool)
+        run_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        heads = order[np.maximum.accumulate(np.where(run_start, np.arange(len(order)), 0))]
+        u, v = active[order[~run_start]], active[heads[~run_start]]
+        # 已经在同一簇的候选对不再比对
+        _compress(parent)
+        pending = parent[u] != parent[v]
+        u, v = u[pending], v[pending]
+        similar = _similar(signatures, u, v, threshold)
+        _union(parent, u[similar], v[similar])
+    _compress(parent)
+    return parent
+
+
+def cluster_texts(texts, threshold=THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """texts（可以是生成器）每条所在近似重复簇的代表下标"""
+    signatures, empty = MinHasher(num_perm, shingle_size).signatures(texts)
+    return cluster(signatures, empty, threshold)
+
+
+def unique_mask(texts, threshold=THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """每个近似重复簇只保留最早一条的布尔掩码（可直接用于 itertools.compress 或 DataFrame 过滤）"""
+    labels = cluster_texts(texts, threshold, num_perm, shingle_size)
+    return labels == np.arange(len(labels))
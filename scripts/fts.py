@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+FTS5 全文索引
+在 posts/comments 表旁边建立无内容（contentless）的 FTS5 表，由触发器保持同步：
+  - <table>_fts：trigram 分词，短语查询等价于对小写文本做子串匹配，
+    与 PAIN_KEYWORDS / NEED_CATEGORIES 的 `kw in text.lower()` 语义一致（关键词至少3个字符）
+  - <table>_words：unicode61 分词，配合 fts5vocab 直接读出全库词频
+
+FTS 行与原表按 rowid 对应。INSERT OR REPLACE 删除旧行时只有打开
+recursive_triggers 才会触发删除触发器，ensure_fts() 会为当前连接打开它
+（db.connect 的 ingest 配置默认打开）。VACUUM 可能重排旧版表的 rowid，之后需 ensure_fts(rebuild=True)；
+已迁移到统一结构（schema.py）的表 rowid 是显式主键，VACUUM 不会改变。
+
+索引按需建立（每行写入的代价会明显增加，尤其是评论），建立后由触发器随抓取自动更新:
+    python scripts/fts.py --db data/reddit_posts.db [--rebuild]
+analyze_v2.py --fts 只读打开库，不会建立索引；posts 还没有索引时提示先运行上面的命令
+
+用法:
+    ensure_fts(conn, 'posts', ('title', 'selftext'))
+    rowids = match_rowids(conn, 'posts', ['wish there was'])
+"""
+
+import argparse
+import time
+
+import schema
+from db import connect, transaction
+
+# 每张表参与索引的文本列
+FTS_COLUMNS = {
+    'posts': ('title', 'selftext'),
+    'comments': ('body',),
+}
+
+# trigram 至少需要3个字符才能走索引
+MIN_TERM_LENGTH = 3
+
+# 词频索引：下划线算词内字符、保留变音符号，与 \b[a-z]{4,}\b 的词边界一致
+WORDS_TOKENIZER = "unicode61 remove_diacritics 0 tokenchars '_'"
+
+
+def _text_expr(prefix, columns):
+    """把多个文本列拼成一段，与分析器里的 f"{title} {selftext}" 一致"""
+    return " || ' ' || ".join(f"coalesce({prefix}{col}, '')" for col in columns)
+
+
+def _index_names(table, words):
+    return [f'{table}_fts'] + ([f'{table}_words'] if words else [])
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def ensure_fts(conn, table, columns=None, words=None, rebuild=False):
+    """创建 FTS 表和同步触发器；新建或 rebuild 时从原表回填。返回是否回填过
+
+    words 为 None 时只给 posts 建词频索引。
+    """
+    columns = columns or FTS_COLUMNS[table]
+    words = table == 'posts' if words is None else words
+    conn.execute('PRAGMA recursive_triggers = ON')
+    indexes = _index_names(table, words)
+    fill = rebuild or not all(_table_exists(conn, name) for name in indexes)
+
+    new_text = _text_expr('new.', columns)
+    old_text = _text_expr('old.', columns)
+    with transaction(conn):
+        for name in indexes:
+            if fill:
+                conn.execute(f'DROP TABLE IF EXISTS {name}')
+            tokenizer = 'trigram' if name.endswith('_fts') else WORDS_TOKENIZER
+            conn.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {name} '
+                         f'USING fts5(text, content=\'\', tokenize="{tokenizer}")')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {name}(rowid, text) VALUES (new.rowid, {new_text});
+            END''')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {name}({name}, rowid, text) VALUES ('delete', old.rowid, {old_text});
+            END''')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+                INSERT INTO {name}({name}, rowid, text) VALUES ('delete', old.rowid, {old_text});
+                INSERT INTO {name}(rowid, text) VALUES (new.rowid, {new_text});
+            END''')
+            if fill:
+                conn.execute(f'INSERT INTO {name}(rowid, text) SELECT rowid, {_text_expr("", columns)} FROM {table}')
+        if words:
+            conn.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {table}_words_vocab '
+                         f'USING fts5vocab({table}_words, \'row\')')
+    return fill
+
+
+class MissingIndex(Exception):
+    """表还没有建立全文索引（由 fts.py 建立，分析器只读，不会自己建）"""
+
+
+def has_fts(conn, table, words=False):
+    """table 是否已有 FTS 表；words=True 时还要求有词频索引"""
+    names = _index_names(table, words) + ([f'{table}_words_vocab'] if words else [])
+    return all(_table_exists(conn, name) for name in names)
+
+
+def phrase(term):
+    """FTS5 短语字面量"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def match_rowids(conn, table, terms):
+    """包含任一 terms（子串，大小写不敏感）的行的 rowid 集合"""
+    short = [t for t in terms if len(t) < MIN_TERM_LENGTH]
+    if short:
+        raise ValueError(f"trigram 索引无法查询少于 {MIN_TERM_LENGTH} 个字符的词: {short}")
+    query = ' OR '.join(phrase(t) for t in terms)
+    return set(row[0] for row in conn.execute(
+        f'SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?', (query,)))
+
+
+def search(conn, table, terms, where='', params=(), columns=None):
+    """临时查询：包含任一 terms 的原表行，可附加 WHERE 条件；columns 默认为全部对外的列
+
+    search(conn, 'posts', ['wish there was'], schema.subreddit_condition(conn, 'posts'), ('Flights',))
+    """
+    query = ' OR '.join(phrase(t) for t in terms)
+    columns = columns or schema.select_list(conn, table)
+    sql = (f'SELECT {columns} FROM {table} WHERE rowid IN '
+           f'(SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)')
+    if where:
+        sql += f' AND ({where})'
+    return conn.execute(sql + ' ORDER BY rowid', (query,) + tuple(params)).fetchall()
+
+
+def word_counts(conn, table, min_length=4):
+    """全库纯小写字母词（长度 >= min_length）的出现次数，来自 fts5vocab"""
+    pattern = '[a-z]' * min_length + '*'
+    return {term: cnt for term, cnt in conn.execute(
+        f"SELECT term, cnt FROM {table}_words_vocab WHERE term GLOB ? AND term NOT GLOB '*[^a-z]*'",
+        (pattern,))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为 posts/comments 建立 FTS5 全文索引')
+    parser.add_argument('--db', required=True, help='SQLite数据库路径')
+    parser.add_argument('--rebuild', action='store_true', help='删除并重建索引（如 VACUUM 之后）')
+    args = parser.parse_args()
+
+    conn = connect(args.db, 'ingest')
+    for table in FTS_COLUMNS:
+        if not _table_exists(conn, table):
+            continue
+        start = time.perf_counter()
+        built = ensure_fts(conn, table, rebuild=args.rebuild)
+        status = f"建立索引 {time.perf_counter() - start:.1f}s" if built else "索引已存在"
+        print(f"{table}: {status}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+关键短语（n-gram + TF-IDF）
+帖子文本去掉英文停用词（scikit-learn 的 ENGLISH_STOP_WORDS 加上缩写残片等）后，
+取 1~3 个连续词为短语，得到稀疏的 帖子 × 短语 计数矩阵（scipy CSR）；模型只保留聚合量：
+  - doc_freq / term_freq：每个短语出现的帖子数与总次数（numpy 数组，列按短语键排序）
+  - group_counts：subreddit × 短语 的稀疏计数矩阵
+  - documents：帖子总数
+短语键由词号（每个词 21 位）拼成一个 uint64，整批文本的 n-gram 用 numpy 的错位运算一次生成，
+Python 只做正则分词和查词号，不按词循环建短语。
+
+模型保留每个不同短语的精确计数，大小随语料增长，只用于整体加载的分析：每次运行对全部文本
+一次拟合，不分块合并、不存检查点（analyze_needs 的流式和增量分析不带关键短语）。
+
+打分都是整列的向量运算，代价与词表大小成正比：
+  - top_phrases()：语料关键短语，term_freq × 平滑 idf（与 TfidfTransformer(smooth_idf=True) 的 idf 相同）
+  - distinctive()：各 subreddit 的特色短语，次数 × log(该 subreddit 内占比 / 全语料占比)
+出现在少于 min_df 篇帖子里的短语不参与排名；同分按短语字母序。
+
+    model = KeyphraseModel.from_texts(texts, subreddits)
+    model.top_phrases(20, min_words=2)   # [(短语, 得分)]
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from tokenizer import Vocabulary
+
+# 短语的词数范围
+NGRAM_RANGE = (1, 3)
+# 短语至少出现在这么多篇帖子里才参与排名
+MIN_DF = 3
+
+# 去掉撇号及其后的缩写部分（don't -> don，I’ve -> i），残片在停用词里
+CONTRACTION_RE = re.compile(r"['’][a-z]*")
+TOKEN_RE = re.compile(r'\b[a-z]{2,}\b')
+STOP_WORDS = ENGLISH_STOP_WORDS | {
+    # 缩写残片
+    'don', 'doesn', 'didn', 'isn', 'wasn', 'aren', 'weren', 'won', 'wouldn', 'couldn', 'shouldn',
+    'haven', 'hasn', 'hadn', 'ain', 'im', 'ive', 'dont', 'cant', 'll', 've', 're',
+    # 链接和 HTML 实体
+    'http', 'https', 'www', 'com', 'gt', 'lt', 'amp', 'nbsp',
+    # 口语里的填充词
+    'just', 'like', 'really', 'actually', 'know', 'think', 'want', 'thing', 'things',
+    'make', 'get', 'got', 'feel', 'lot', 'way', 'also', 'maybe', 'pretty', 'stuff',
+}
+
+# 每个词号占的位数；词号 + 1 存入，0 表示没有这个位置
+_BITS = 21
+_MAX_WORDS = (1 << _BITS) - 2
+_WORD_MASK = np.uint64((1 << _BITS) - 1)
+
+# 进程内共享的短语词表：同一进程里各模型的短语键可以直接比较
+PHRASE_VOCABULARY = Vocabulary()
+_stop_ids = None
+
+
+def normalize(text):
+    return CONTRACTION_RE.sub('', text.lower())
+
+
+def _stop_id_array():
+    global _stop_ids
+    if _stop_ids is None:
+        _stop_ids = np.array(sorted(PHRASE_VOCABULARY[w] for w in STOP_WORDS), dtype=np.uint64)
+    return _stop_ids
+
+
+def _phrase_keys(tokens, docs, n):
+    """长度为 n 的全部短语：(所在帖子, 短语键)；跨帖子的窗口去掉"""
+    m = len(tokens) - n + 1
+    if m <= 0:
+        return docs[:0], tokens[:0]
+    # docs 单调不减，首尾在同一帖子即整个窗口都在
+    same = docs[:m] == docs[n - 1:]
+    keys = np.zeros(m, dtype=np.uint64)
+    for j in range(n):
+        keys = (keys << np.uint64(_BITS)) | (tokens[j:j + m] + np.uint64(1))
+    return docs[:m][same], keys[same]
+
+
+class KeyphraseModel:
+    """一批文本的短语统计量"""
+
+    def __init__(self, ngram_range=NGRAM_RANGE):
+        self.ngram_range = ngram_range
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.term_freq = np.zeros(0, dtype=np.int64)
+        self.groups = []
+        self.group_counts = sp.csr_matrix((0, 0), dtype=np.int64)
+        self.documents = 0
+
+    @classmethod
+    def from_texts(cls, texts, groups, ngram_range=NGRAM_RANGE):
+        """一批文本的模型；groups 与 texts 对齐（subreddit）"""
+        model = cls(ngram_range)
+        lookup = PHRASE_VOCABULARY.__getitem__
+        token_lists = [list(map(lookup, TOKEN_RE.findall(normalize(text)))) for text in texts]
+        if len(PHRASE_VOCABULARY) > _MAX_WORDS:
+            raise ValueError(f'短语词表超过 {_MAX_WORDS} 个词')
+        n = len(token_lists)
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=n)
+        tokens = np.fromiter(chain.from_iterable(token_lists), dtype=np.uint64, count=int(lengths.sum()))
+        docs = np.repeat(np.arange(n), lengths)
+        content = ~np.isin(tokens, _stop_id_array())
+        tokens, docs = tokens[content], docs[content]
+
+        parts = [_phrase_keys(tokens, docs, size) for size in range(ngram_range[0], ngram_range[1] + 1)]
+        phrase_docs = np.concatenate([p[0] for p in parts])
+        keys, columns = np.unique(np.concatenate([p[1] for p in parts]), return_inverse=True)
+        # 帖子 × 短语 计数矩阵（重复的 (帖子, 短语) 在转换时求和）
+        counts = sp.csr_matrix((np.ones(len(columns), dtype=np.int64), (phrase_docs, columns.ravel())),
+                               shape=(n, len(keys)))
+
+        index = {}
+        rows = [index.setdefault(group, len(index)) for group in groups]
+        membership = sp.csr_matrix((np.ones(n, dtype=np.int64), (rows, np.arange(n))), shape=(len(index), n))
+
+        model.keys = keys
+        model.doc_freq = np.bincount(counts.indices, minlength=len(keys)).astype(np.int64)
+        model.term_freq = np.asarray(counts.sum(axis=0)).ravel().astype(np.int64)
+        model.groups = list(index)
+        model.group_counts = (membership @ counts).tocsr()
+        model.documents = n
+        return model
+
+    def phrase(self, column):
+        key = int(self.keys[column])
+        words = []
+        while key:
+            words.append(PHRASE_VOCABULARY.word((key & int(_WORD_MASK)) - 1))
+            key >>= _BITS
+        return ' '.join(reversed(words))
+
+    def word_counts(self):
+        """每列短语的词数"""
+        return 1 + (self.keys > _WORD_MASK).astype(np.int64) + (self.keys > (_WORD_MASK << np.uint64(_BITS)))
+
+    def idf(self):
+        return np.log((1 + self.documents) / (1 + self.doc_freq)) + 1
+
+    def _top(self, columns, scores, n):
+        """columns 里得分最高的 n 个 (短语, 得分)；同分的短语全部取出后按字母序截断"""
+        if not len(columns) or n <= 0:
+            return []
+        scores = scores[columns]
+        if len(columns) > n:
+            cutoff = np.partition(scores, len(scores) - n)[len(scores) - n]
+            selected = scores >= cutoff
+            columns, scores = columns[selected], scores[selected]
+        ranked = sorted(zip((-scores).tolist(), map(self.phrase, columns.tolist())), key=lambda x: (x[0], x[1]))
+        return [(phrase, -score) for score, phrase in ranked[:n]]
+
+    def top_phrases(self, n=20, min_df=MIN_DF, min_words=1):
+        """语料里 TF-IDF 最高的 n 个短语（至少 min_words 个词）"""
+        eligible = (self.doc_freq >= min_df) & (self.word_counts() >= min_words)
+        return self._top(np.flatnonzero(eligible), self.term_freq * self.idf(), n)
+
+    def distinctive(self, n=8, min_df=MIN_DF):
+        """{subreddit: 最有区分度的 n 个 (短语, 得分)}，只取在该 subreddit 里占比高于全语料的短语"""
+        total = self.term_freq.sum()
+        counts = self.group_counts
+        row_totals = np.asarray(counts.sum(axis=1)).ravel()
+        result = {}
+        for row, group in enumerate(self.groups):
+            start, end = counts.indptr[row], counts.indptr[row + 1]
+            columns, tf = counts.indices[start:end], counts.data[start:end]
+            scores = np.zeros(len(self.keys))
+            scores[columns] = tf * np.log((tf / row_totals[row]) / (self.term_freq[columns] / total))
+            eligible = columns[(self.doc_freq[columns] >= min_df) & (scores[columns] > 0)]
+            result[group] = self._top(eligible, scores, n)
+        return result
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick 多模式关键词匹配器
+关键词表只编译一次，之后对每条文本单次扫描即可找出全部命中
+
+安装了 pyahocorasick 时使用其C实现；否则使用纯Python自动机。
+纯Python逐字符扫描的常数较大，关键词较少时逐个 `in` 扫描（C实现的子串查找）反而更快，
+因此小词表在纯Python模式下自动退回 `in` 扫描。
+"""
+
+from collections import deque
+
+try:
+    import ahocorasick
+except ImportError:  # 可选依赖
+    ahocorasick = None
+
+# 纯Python模式下，关键词数低于该值时使用 `in` 扫描
+SCAN_THRESHOLD = 64
+
+
+class KeywordMatcher:
+    """Aho-Corasick 自动机
+
+    match() 的返回结果与 [kw for kw in keywords if kw in text] 完全一致：
+    按关键词表顺序输出，重复的关键词原样重复。
+    """
+
+    def __init__(self, keywords, native=True, scan_threshold=SCAN_THRESHOLD):
+        self.keywords = list(keywords)
+
+        # 同一个关键词可能在表中出现多次
+        positions = {}
+        for index, keyword in enumerate(self.keywords):
+            positions.setdefault(keyword, []).append(index)
+        # 空串在任何文本中都算命中
+        self._always = tuple(positions.pop('', ()))
+
+        # goto表：每个状态一个 dict(char -> state)
+        self._goto = [{}]
+        self._fail = [0]
+        # 每个状态上结束的关键词下标（已沿fail链合并）
+        self._out = [()]
+
+        for keyword, indexes in positions.items():
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state] = tuple(indexes)
+
+        self._build_failure_links()
+
+        self._native = None
+        if native and ahocorasick is not None and positions:
+            automaton = ahocorasick.Automaton()
+            for keyword, indexes in positions.items():
+                automaton.add_word(keyword, tuple(indexes))
+            automaton.make_automaton()
+            self._native = automaton
+        self._scan = self._native is None and len(self.keywords) < scan_threshold
+
+    def _build_failure_links(self):
+        """BFS构造fail指针，并把goto表补全为确定性自动机"""
+        goto, fail, out = self._goto, self._fail, self._out
+        order = []
+        queue = deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        # 预先展开fail跳转（根节点的转移除外，扫描时回退到根节点查找），
+        # 扫描时每个字符最多两次 dict 查找
+        for state in order:
+            if fail[state]:
+                for ch, nxt in goto[fail[state]].items():
+                    goto[state].setdefault(ch, nxt)
+
+    def iter_hits(self, text):
+        """单次扫描，产出命中的关键词下标（可能重复）"""
+        yield from self._always
+        if self._native is not None:
+            for _, indexes in self._native.iter(text):
+                yield from indexes
+            return
+        goto, out = self._goto, self._out
+        root = goto[0]
+        state = 0
+        for ch in text:
+            state = goto[state].get(ch) or root.get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+    def match_indexes(self, text):
+        """返回命中的关键词下标（升序、去重）"""
+        if self._scan:
+            return [i for i, kw in enumerate(self.keywords) if kw in text]
+        hits = set(self.iter_hits(text))
+        return sorted(hits) if hits else []
+
+    def match(self, text):
+        """返回命中的关键词列表，顺序与关键词表一致"""
+        keywords = self.keywords
+        return [keywords[i] for i in self.match_indexes(text)]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+NDJSON 流式导出/导入（代替整体 json.dump 的 posts_all.json）
+
+    python scripts/ndjson.py export --db data/reddit_posts.db --out data/export --compress gz
+    python scripts/ndjson.py export --db data/reddit_posts.db --out data/export --compress gz --append
+    python scripts/ndjson.py import --src data/export/posts.ndjson.gz --db copy.db
+
+每行一条记录，写入和读取都按块进行，内存占用与语料大小无关：
+  - 每 BLOCK_SIZE 条记录为一块；压缩时每块是一个独立的 gzip member / zstd frame，
+    多块直接拼接仍是合法的 .gz / .zst 文件
+  - 旁边的 <文件>.idx 记录每块的 (首条记录序号, 字节偏移, 块内最大 rowid)，
+    read_records(path, start=n) 直接跳到第 n 条所在的块，不用从头解压
+  - --append 只追加上次导出之后 rowid 更大的行。各保存函数都用 INSERT OR REPLACE 写库，
+    更新过的行会拿到新的 rowid 而被重新导出（直接 UPDATE 的行不会）；
+    导入时按主键 upsert，后出现的记录覆盖先出现的
+"""
+
+import argparse
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+from db import BATCH_SIZE, connect
+from schema import migrate, select_list, table_columns, table_exists, upsert
+
+# 每块的记录数（也是索引的粒度）
+BLOCK_SIZE = 1000
+# 读取时每次从（解压）流中取的字节数
+READ_SIZE = 1 << 16
+# 支持的压缩格式 -> 文件后缀
+SUFFIXES = {None: '.ndjson', 'gz': '.ndjson.gz', 'zst': '.ndjson.zst'}
+INDEX_SUFFIX = '.idx'
+
+
+def _compression(path):
+    name = str(path)
+    if name.endswith('.gz'):
+        return 'gz'
+    if name.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("zstd 压缩需要 zstandard: pip install zstandard")
+        return 'zst'
+    return None
+
+
+def _compress(data, compression):
+    if compression == 'gz':
+        return gzip.compress(data, compresslevel=6)
+    if compression == 'zst':
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _reader(raw, compression):
+    """从 raw 当前位置开始的解压流（跨越后续所有块）"""
+    if compression == 'gz':
+        return gzip.GzipFile(fileobj=raw)
+    if compression == 'zst':
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    return raw
+
+
+def _lines(stream):
+    """按行切分字节流（zstd 的解压流不支持逐行迭代）"""
+    tail = b''
+    while chunk := stream.read(READ_SIZE):
+        lines = (tail + chunk).split(b'\n')
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def index_path(path):
+    return Path(str(path) + INDEX_SUFFIX)
+
+
+def read_index(path):
+    """[(首条记录序号, 字节偏移, 块内最大 rowid), ...]"""
+    idx = index_path(path)
+    if not idx.exists():
+        return []
+    with open(idx) as f:
+        return [tuple(int(v) for v in line.split()) for line in f if line.strip()]
+
+
+def count_records(path):
+    """已写入的记录数：最后一块的首条序号 + 块内行数"""
+    index = read_index(path)
+    if not index:
+        return 0
+    first, offset, _ = index[-1]
+    with open(path, 'rb') as raw:
+        raw.seek(offset)
+        return first + sum(1 for _ in _lines(_reader(raw, _compression(path))))
+
+
+def write_records(path, records, append=False, block_size=BLOCK_SIZE):
+    """把 records（dict 的可迭代对象）按块写入 path，返回写入条数
+
+    records 也可以是 (rowid, dict) 对，此时每块的最大 rowid 写进索引，供下次 append 只导出新行。
+    追加到没有索引的已有文件时先为它补一条覆盖整个旧文件的索引项。
+    """
+    path = Path(path)
+    compression = _compression(path)
+    if append and path.exists():
+        if not index_path(path).exists() or not read_index(path):
+            index_path(path).write_text('0 0 0\n')
+        written = count_records(path)
+        rowid = last_rowid(path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+        index_path(path).write_text('')
+        written, rowid = 0, 0
+
+    count = 0
+    with open(path, 'ab') as raw, open(index_path(path), 'a') as idx:
+        block = []
+
+        def flush():
+            idx.write(f"{written + count - len(block)} {raw.tell()} {rowid}\n")
+            raw.write(_compress(b''.join(block), compression))
+            block.clear()
+
+        for record in records:
+            if isinstance(record, tuple):
+                rowid, record = record
+            block.append(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            count += 1
+            if len(block) >= block_size:
+                flush()
+        if block:
+            flush()
+    return count
+
+
+def read_records(path, start=0):
+    """逐条读出记录；start 指定从第几条开始（通过索引跳到所在的块）"""
+    compression = _compression(path)
+    first, offset = 0, 0
+    for block_first, block_offset, _ in read_index(path):
+        if block_first > start:
+            break
+        first, offset = block_first, block_offset
+    with open(path, 'rb') as raw:
+        raw.seek(offset)
+        for n, line in enumerate(_lines(_reader(raw, compression)), first):
+            if n >= start:
+                yield json.loads(line)
+
+
+def read_record(path, n):
+    """第 n 条记录（从 0 开始）"""
+    return next(read_records(path, n), None)
+
+
+def last_rowid(path):
+    """上次导出到的最大 rowid（没有导出过时为 0）"""
+    index = read_index(path)
+    return index[-1][2] if index else 0
+
+
+def export_table(conn, table, path, append=False, chunk_size=BATCH_SIZE):
+    """把表按 rowid 顺序流式写成 NDJSON，append 时只导出上次之后的新行，返回条数"""
+    path = Path(path)
+    min_rowid = last_rowid(path) if append and path.exists() else 0
+    columns = table_columns(conn, table)
+    c = conn.execute(f"SELECT rowid, {select_list(conn, table, columns)} FROM {table} WHERE rowid > ? ORDER BY rowid",
+                     (min_rowid,))
+
+    def records():
+        while rows := c.fetchmany(chunk_size):
+            for row in rows:
+                yield row[0], dict(zip(columns, row[1:]))
+
+    return write_records(path, records(), append)
+
+
+def export_db(db_path, out_dir, compress=None, append=False, tables=('posts', 'comments')):
+    """导出库中存在的表到 out_dir/<表名>.ndjson[.gz|.zst]，返回 {文件: 条数}"""
+    conn = connect(db_path, 'analyze')
+    counts = {}
+    for table in tables:
+        if table_exists(conn, table):
+            path = Path(out_dir) / (table + SUFFIXES[compress])
+            counts[path] = export_table(conn, table, path, append)
+    conn.close()
+    return counts
+
+
+def import_records(conn, table, path, batch_size=BATCH_SIZE):
+    """把 NDJSON 文件流式写回已存在的表（批量 upsert），返回条数
+
+    只写入表中存在的列，记录里缺少的列写 NULL。
+    """
+    columns = table_columns(conn, table)
+    if not columns:
+        raise ValueError(f"表 {table} 不存在")
+    rows = (tuple(record.get(col) for col in columns) for record in read_records(path))
+    return upsert(conn, table, columns, rows, batch_size)
+
+
+def table_name(path):
+    """posts.ndjson.gz -> posts"""
+    return Path(path).name.split('.', 1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NDJSON 流式导出/导入')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='SQLite -> NDJSON')
+    export.add_argument('--db', required=True)
+    export.add_argument('--out', required=True, help='输出目录')
+    export.add_argument('--compress', choices=['gz', 'zst'])
+    export.add_argument('--append', action='store_true', help='只追加上次导出之后的新行')
+    restore = sub.add_parser('import', help='NDJSON -> SQLite（新库使用统一结构）')
+    restore.add_argument('--src', required=True, nargs='+', help='NDJSON 文件')
+    restore.add_argument('--db', required=True)
+    restore.add_argument('--table', help='目标表（默认取文件名，如 posts.ndjson.gz -> posts）')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        for path, count in export_db(args.db, args.out, args.compress, args.append).items():
+            print(f"{path}: {count} 条")
+    else:
+        conn = connect(args.db, 'ingest')
+        migrate(conn)
+        for src in args.src:
+            count = import_records(conn, args.table or table_name(src), src)
+            print(f"{src}: {count} 条")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
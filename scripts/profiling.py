@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+分阶段计时与剖析
+各入口的 --profile FILE 打开后，按阶段（fetch / parse / dedupe / db_write /
+load / near_dedup / detect / categorize / tokenize / keyphrases / embed / cluster / trends /
+report）累计：
+  - 调用次数、墙钟时间、CPU 时间（进程级，多线程时会叠加）、处理行数
+  - 阶段结束时的进程 RSS 峰值；加 --tracemalloc 时另记阶段内 Python 堆的峰值
+加 --cprofile 时整次运行用 cProfile 采样，JSON 里附上累计耗时最多的函数，
+并在 FILE 旁边保存 .prof 供 snakeviz / pstats 查看。
+
+未开启时 stage() 返回一个空的上下文对象，热循环里的开销可以忽略。
+并发抓取时同一阶段的多个调用会重叠，墙钟时间按调用累加，可能超过总耗时。
+多进程分析（analyze_v2 --workers）只记录主进程的阶段。
+
+    from profiling import PROFILER
+    with PROFILER.stage('load') as stage:
+        rows = load()
+        stage.rows = len(rows)
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# JSON 中列出的 cProfile 函数数
+CPROFILE_TOP = 30
+
+
+def _rss_mb():
+    """进程 RSS 峰值（MB）；Linux 上 ru_maxrss 单位为 KB，macOS 为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+class _NullStage:
+    """未开启剖析时的空阶段"""
+
+    rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'rows', '_wall', '_cpu')
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if self.profiler.trace_memory:
+            tracemalloc.reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self.profiler._record(self.name, wall, cpu, self.rows)
+        return False
+
+    def add(self, rows):
+        self.rows += rows
+
+
+class Profiler:
+    """按阶段名累计耗时、行数和内存"""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.stages = {}
+        self._profile = None
+        self._lock = threading.Lock()
+        self._started = None
+
+    def start(self, cprofile=False, trace_memory=False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._started = (datetime.now(), time.perf_counter(), time.process_time())
+        if trace_memory:
+            tracemalloc.start()
+        if cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stage(self, name, rows=0):
+        """阶段上下文；rows 可以在 with 块里通过 .rows / .add() 更新"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def _record(self, name, wall, cpu, rows):
+        traced = tracemalloc.get_traced_memory()[1] / 1024 ** 2 if self.trace_memory else None
+        rss = _rss_mb()
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                                             'rows': 0, 'peak_rss_mb': 0.0}
+                if traced is not None:
+                    stats['traced_peak_mb'] = 0.0
+            stats['calls'] += 1
+            stats['wall_seconds'] += wall
+            stats['cpu_seconds'] += cpu
+            stats['rows'] += rows
+            stats['peak_rss_mb'] = max(stats['peak_rss_mb'], rss)
+            if traced is not None:
+                stats['traced_peak_mb'] = max(stats['traced_peak_mb'], traced)
+
+    def _cprofile_top(self, limit=CPROFILE_TOP):
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({'function': f"{Path(filename).name}:{line}({func})", 'calls': calls,
+                         'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)})
+        rows.sort(key=lambda r: r['cumtime'], reverse=True)
+        return rows[:limit]
+
+    def report(self, entry=None):
+        """当前的阶段统计（可 JSON 序列化）"""
+        started, wall, cpu = self._started
+        result = {
+            'entry': entry,
+            'argv': sys.argv[1:],
+            'started': started.isoformat(timespec='seconds'),
+            'wall_seconds': time.perf_counter() - wall,
+            'cpu_seconds': time.process_time() - cpu,
+            'peak_rss_mb': _rss_mb(),
+            'stages': self.stages,
+        }
+        if self._profile is not None:
+            result['cprofile'] = self._cprofile_top()
+        return result
+
+    def stop(self, path, entry=None):
+        """停止剖析，把报告写到 path（'-' 为标准错误输出），返回报告"""
+        if self._profile is not None:
+            self._profile.disable()
+        result = self.report(entry)
+        if path == '-':
+            json.dump(result, sys.stderr, indent=2)
+            print(file=sys.stderr)
+        else:
+            with open(path, 'w') as f:
+                json.dump(result, f, indent=2)
+            if self._profile is not None:
+                self._profile.dump_stats(str(Path(path).with_suffix('.prof')))
+        if self.trace_memory:
+            tracemalloc.stop()
+        self.enabled = False
+        self._profile = None
+        return result
+
+
+# 进程内共享的剖析器
+PROFILER = Profiler()
+
+
+def add_arguments(parser):
+    """给入口的 argparse 加上 --profile / --cprofile / --tracemalloc"""
+    parser.add_argument('--profile', metavar='FILE',
+                        help="按阶段输出耗时/行数/内存的 JSON（'-' 输出到标准错误）")
+    parser.add_argument('--cprofile', action='store_true', help='配合 --profile 附带 cProfile 结果')
+    parser.add_argument('--tracemalloc', action='store_true', help='配合 --profile 记录各阶段 Python 堆峰值')
+
+
+def start_from_args(args):
+    if args.profile:
+        PROFILER.start(cprofile=args.cprofile, trace_memory=args.tracemalloc)
+
+
+def stop_from_args(args, entry):
+    if args.profile:
+        PROFILER.stop(args.profile, entry)
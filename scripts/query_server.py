@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+本地只读查询服务
+在 reddit_posts.db 上提供 HTTP/JSON 接口，看板和移动端原型（10_app_ideas_mobile.html）
+可以直接轮询，不必重跑批量分析：
+  GET /api/pain?subreddit=&limit=          得分最高的痛点帖子（命中的痛点关键词、需求类别）
+  GET /api/categories?subreddit=           各需求类别的帖子数
+  GET /api/search?q=&subreddit=&limit=     标题/正文包含 q 的帖子（子串，大小写不敏感），按得分排序
+  GET /api/trends?period=&as_of=&window=&min_posts=&by_subreddit=
+                                           trends.trend_report() 的环比增长和峰值
+  GET /api/series?kind=&label=&period=&subreddit=&start=&end=
+                                           trends.series() 的逐期帖子数
+  GET /api/health                          帖子数、索引/汇总表是否存在、缓存命中统计（不缓存）
+
+连接与缓存：
+  - 连接池里是 db.connect 的 analyze 配置连接（只读、大缓存 + mmap），库是 WAL 模式（抓取器的
+    ingest 连接会切换）时与抓取器的写入互不阻塞；
+    池满时请求等待空闲连接，超时返回 503
+  - 响应体（编码好的 JSON）按 (接口, 规范化后的参数) 缓存在内存里，过期时间 ttl 秒，超过 max_entries 时
+    淘汰最久未用的；同一个键同时未命中时只查一次库，其余请求等它的结果
+  - 数据变化检测：每隔 check_interval 秒用一条专用连接读 PRAGMA data_version，
+    其他连接（抓取器、trends/fts 的触发器）提交过就清空缓存，新数据最迟 check_interval 秒后可见
+
+服务只读，不建索引、不建汇总表，按库里已有的结构选择查询方式：
+  - 痛点帖子：按得分从高到低读帖子（schema.py 的 (subreddit, score) 索引），凑够 limit 条就停
+  - 类别计数：trends.py 的汇总表覆盖了全部帖子时直接求和，否则用 fts.py 的全文索引，都没有时扫描帖子表
+  - 搜索：有全文索引时走索引，否则扫描帖子表
+  - 趋势：需要 trends.py 先建立汇总表
+    python scripts/query_server.py --db data/reddit_posts.db --port 8765
+"""
+
+import argparse
+import heapq
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import fts
+import trends
+from analyze_needs import NEED_CATEGORIES, PAIN_POINT_KEYWORDS, PAIN_POINT_MATCHER, categorize_needs
+from db import connect
+from schema import interned, select_list, subreddit_condition
+
+# 连接池大小 / 等待空闲连接的最长时间（秒）
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0
+# 缓存过期时间（秒）/ 最多缓存的响应数
+CACHE_TTL = 60.0
+CACHE_ENTRIES = 1024
+# 检查数据变化的间隔（秒）
+CHECK_INTERVAL = 1.0
+# limit 参数的默认值和上限
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+POST_FIELDS = ['id', 'subreddit', 'title', 'selftext', 'score', 'num_comments', 'created_utc']
+# 趋势汇总表里类别关键词应有的内容（与 NEED_CATEGORIES 一致时才用汇总表计数）
+CATEGORY_TERMS = [term for term in trends.default_terms() if term[0] == 'category']
+
+
+class PoolExhausted(Exception):
+    """连接池在超时前没有空闲连接（503）"""
+
+
+class NotAvailable(Exception):
+    """数据库里没有该接口需要的表（404）"""
+
+
+class ConnectionPool:
+    """固定大小的只读连接池，连接按需创建，跨线程复用"""
+
+    def __init__(self, db_path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+        self._all = []
+        self._lock = threading.Lock()
+
+    def open(self):
+        conn = connect(self.db_path, 'analyze', check_same_thread=False)
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f"{self.timeout:.0f}s 内没有空闲的数据库连接")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self.open()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+
+
+class ResponseCache:
+    """带过期时间和最久未用淘汰的响应缓存；invalidate() 后旧数据上算出的结果不再命中"""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """命中时返回值，否则 None（调用方持有 _lock）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, generation, value = entry
+        if generation != self.generation or expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key, compute):
+        """(值, 是否命中)；未命中时调用 compute()，同一个键同时只计算一次"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return value, True
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:
+                    self.stats['hits'] += 1
+                    return value, True
+                self.stats['misses'] += 1
+                generation = self.generation
+            try:
+                value = compute()
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is loading:
+                        del self._loading[key]
+            with self._lock:
+                if self.ttl > 0:
+                    self._entries[key] = (time.monotonic() + self.ttl, generation, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value, False
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), ttl=self.ttl)
+
+
+class ChangeWatcher:
+    """用一条专用连接的 PRAGMA data_version 发现其他连接提交的新数据"""
+
+    def __init__(self, pool, cache, interval=CHECK_INTERVAL):
+        self.cache = cache
+        self.interval = interval
+        self._conn = pool.open()
+        self._version = self._read()
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _read(self):
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def check(self):
+        """距上次检查超过 interval 时检查一次，数据变了就清空缓存"""
+        if time.monotonic() - self._checked < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked = time.monotonic()
+            version = self._read()
+            if version != self._version:
+                self._version = version
+                self.cache.invalidate()
+        finally:
+            self._lock.release()
+
+
+def _post(row):
+    post_id, subreddit, title, selftext, score, num_comments, created_utc = row
+    text = f"{title or ''} {selftext or ''}"
+    return {'id': post_id, 'subreddit': subreddit, 'title': title, 'score': score,
+            'num_comments': num_comments, 'created_utc': created_utc,
+            'pain_points': [PAIN_POINT_KEYWORDS[i] for i in PAIN_POINT_MATCHER.match_indexes(text.lower())],
+            'categories': categorize_needs(text)}
+
+
+def _subreddit_filter(conn, subreddit):
+    return (f" AND {subreddit_condition(conn, 'posts')}", (subreddit,)) if subreddit else ('', ())
+
+
+def _fts_subquery(terms):
+    """(rowid 子查询, 参数)：包含任一 terms 的帖子"""
+    return 'rowid IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)', (' OR '.join(map(fts.phrase, terms)),)
+
+
+def _by_score(conn, where, params):
+    """一个 subreddit 的帖子按 (得分降序, rowid) 逐行读出的游标：已迁移的库走 (subreddit_id, score) 索引，不排序整表"""
+    return conn.execute(f"SELECT rowid, {select_list(conn, 'posts', POST_FIELDS)} FROM posts "
+                        f"WHERE {where} ORDER BY score DESC, rowid", params)
+
+
+def _subreddit_groups(conn):
+    """[(条件, 参数)]：每个 subreddit（含空值）一组，直接比较存储的列以便走索引"""
+    column = 'subreddit_id' if interned(conn, 'posts') else 'subreddit'
+    return [(f'{column} = ?', (value,)) if value is not None else (f'{column} IS NULL', ())
+            for (value,) in conn.execute(f'SELECT DISTINCT {column} FROM posts')]
+
+
+def _score_order(row):
+    """与 ORDER BY score DESC, rowid 一致的排序键（DESC 时 NULL 在最后）"""
+    return row[5] is None, -(row[5] or 0), row[0]
+
+
+def top_pain_posts(conn, subreddit=None, limit=DEFAULT_LIMIT):
+    """得分最高的 limit 条痛点帖子（同分时先入库的在前）
+
+    按得分从高到低读帖子，凑够 limit 条痛点帖子就停（约三分之一的帖子带痛点，通常只读几十行）；
+    不限 subreddit 时归并各 subreddit 的有序游标。
+    """
+    if subreddit:
+        rows = _by_score(conn, subreddit_condition(conn, 'posts'), (subreddit,))
+    else:
+        rows = heapq.merge(*(_by_score(conn, *group) for group in _subreddit_groups(conn)), key=_score_order)
+    result = []
+    for row in rows:
+        if PAIN_POINT_MATCHER.match_indexes(f"{row[3] or ''} {row[4] or ''}".lower()):
+            result.append(_post(row[1:]))
+            if len(result) == limit:
+                break
+    return result
+
+
+def _rollup_category_counts(conn, subreddit, total):
+    """从趋势汇总表读类别计数；汇总表不存在、关键词与 NEED_CATEGORIES 不一致，
+    或有帖子没计入（created_utc 为空）时返回 None"""
+    if not trends.has_rollups(conn):
+        return None
+    terms = conn.execute("SELECT kind, label, term FROM trend_terms WHERE kind = 'category' "
+                         "ORDER BY kind, label, term").fetchall()
+    if terms != CATEGORY_TERMS:
+        return None
+    where, params = (' AND subreddit = ?', (subreddit,)) if subreddit else ('', ())
+    counts = dict(conn.execute(f"""SELECT CASE kind WHEN 'posts' THEN '' ELSE label END, SUM(posts)
+        FROM trend_rollups WHERE period = 'week' AND kind IN ('category', 'posts'){where}
+        GROUP BY kind, label""", params).fetchall())
+    if counts.pop('', 0) != total:
+        return None
+    return counts
+
+
+def category_counts(conn, subreddit=None):
+    """{类别: 帖子数}，一个帖子可属于多个类别，没有类别的计入 other
+
+    依次尝试：趋势汇总表（只读小表）、全文索引、扫描帖子表。
+    """
+    where, params = _subreddit_filter(conn, subreddit)
+    total = conn.execute(f'SELECT COUNT(*) FROM posts WHERE 1{where}', params).fetchone()[0]
+    counts = dict.fromkeys(list(NEED_CATEGORIES) + ['other'], 0)
+    rollup = _rollup_category_counts(conn, subreddit, total)
+    if rollup is not None:
+        counts.update(rollup)
+    elif fts.has_fts(conn, 'posts'):
+        for category, keywords in NEED_CATEGORIES.items():
+            match, match_params = _fts_subquery(keywords)
+            counts[category] = conn.execute(f'SELECT COUNT(*) FROM posts WHERE {match}{where}',
+                                            match_params + params).fetchone()[0]
+        match, match_params = _fts_subquery([kw for kws in NEED_CATEGORIES.values() for kw in kws])
+        categorized = conn.execute(f'SELECT COUNT(*) FROM posts WHERE {match}{where}',
+                                   match_params + params).fetchone()[0]
+        counts['other'] = total - categorized
+    else:
+        for title, selftext in conn.execute(f'SELECT title, selftext FROM posts WHERE 1{where}', params):
+            for category in categorize_needs(f"{title or ''} {selftext or ''}"):
+                counts[category] += 1
+    return {'total_posts': total,
+            'categories': dict(sorted(counts.items(), key=lambda x: (-x[1], x[0])))}
+
+
+def search_posts(conn, q, subreddit=None, limit=DEFAULT_LIMIT):
+    """标题或正文包含 q 的帖子，按得分排序"""
+    where, params = _subreddit_filter(conn, subreddit)
+    if fts.has_fts(conn, 'posts'):
+        if len(q) < fts.MIN_TERM_LENGTH:
+            raise ValueError(f"搜索词至少 {fts.MIN_TERM_LENGTH} 个字符")
+        match, match_params = _fts_subquery([q])
+    else:
+        match = "instr(lower(coalesce(title, '') || ' ' || coalesce(selftext, '')), lower(?)) > 0"
+        match_params = (q,)
+    rows = conn.execute(f"SELECT {select_list(conn, 'posts', POST_FIELDS)} FROM posts WHERE {match}{where} "
+                        f"ORDER BY score DESC, rowid LIMIT ?", match_params + params + (limit,))
+    return [_post(row) for row in rows]
+
+
+def _require_rollups(conn):
+    if not trends.has_rollups(conn):
+        raise NotAvailable('趋势汇总表未建立，先运行 scripts/trends.py --db <库> --build')
+
+
+def trend_summary(conn, period='week', as_of=None, window=trends.WINDOW, min_posts=trends.MIN_POSTS,
+                  by_subreddit=False):
+    _require_rollups(conn)
+    return trends.trend_report(conn, period, as_of, window, min_posts, by_subreddit)
+
+
+def trend_series(conn, kind, label, period='week', subreddit=None, start=None, end=None):
+    _require_rollups(conn)
+    points = trends.series(conn, kind, label, period, subreddit, start, end)
+    return {'kind': kind, 'label': label, 'period': period, 'subreddit': subreddit,
+            'series': [{'bucket': bucket.isoformat(), 'posts': posts} for bucket, posts in points]}
+
+
+def health(conn):
+    return {'posts': conn.execute('SELECT COUNT(*) FROM posts').fetchone()[0],
+            'fts': fts.has_fts(conn, 'posts'), 'rollups': trends.has_rollups(conn)}
+
+
+def _limit(value):
+    limit = int(value)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit 须在 1 到 {MAX_LIMIT} 之间")
+    return limit
+
+
+def _period(value):
+    if value not in trends.PERIODS:
+        raise ValueError(f"period 须为 {' / '.join(sorted(trends.PERIODS))}")
+    return value
+
+
+def _date(value):
+    trends.day_number(value)
+    return value
+
+
+def _flag(value):
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _window(value):
+    window = int(value)
+    if window < 2:
+        raise ValueError('window 至少为 2')
+    return window
+
+
+# 路径 -> (查询函数, {参数: (解析函数, 默认值)})；默认值为 ... 的参数必填
+ENDPOINTS = {
+    '/api/pain': (top_pain_posts, {'subreddit': (str, None), 'limit': (_limit, DEFAULT_LIMIT)}),
+    '/api/categories': (category_counts, {'subreddit': (str, None)}),
+    '/api/search': (search_posts, {'q': (str, ...), 'subreddit': (str, None), 'limit': (_limit, DEFAULT_LIMIT)}),
+    '/api/trends': (trend_summary, {'period': (_period, 'week'), 'as_of': (_date, None),
+                                    'window': (_window, trends.WINDOW), 'min_posts': (int, trends.MIN_POSTS),
+                                    'by_subreddit': (_flag, False)}),
+    '/api/series': (trend_series, {'kind': (str, ...), 'label': (str, ...), 'period': (_period, 'week'),
+                                   'subreddit': (str, None), 'start': (_date, None), 'end': (_date, None)}),
+}
+
+
+def parse_params(spec, query):
+    """按 spec 解析查询参数，返回规范化的参数字典（缺省值补齐，同一查询的不同写法得到同一个键）"""
+    unknown = set(query) - set(spec)
+    if unknown:
+        raise ValueError(f"未知参数: {', '.join(sorted(unknown))}")
+    params = {}
+    for name, (parse, default) in spec.items():
+        values = query.get(name)
+        if not values or values[-1] == '':
+            if default is ...:
+                raise ValueError(f"缺少参数: {name}")
+            params[name] = default
+            continue
+        try:
+            params[name] = parse(values[-1])
+        except ValueError as e:
+            raise ValueError(f"参数 {name} 无效: {e}") from None
+    return params
+
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False, default=str).encode()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，不关 Nagle 时长连接上每个响应都要等客户端的延迟确认（约 40ms）
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, cache=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        # 移动端原型直接以 file:// 打开，需要跨域读取
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if cache is not None:
+            self.send_header('X-Cache', 'hit' if cache else 'miss')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip('/')
+        service.watcher.check()
+        try:
+            if path == '/api/health':
+                with service.pool.connection() as conn:
+                    payload = dict(health(conn), cache=service.cache.snapshot())
+                self.send_body(200, _encode(payload))
+                return
+            if path not in ENDPOINTS:
+                self.send_body(404, _encode({'error': f'未知接口: {path}', 'endpoints': sorted(ENDPOINTS)}))
+                return
+            func, spec = ENDPOINTS[path]
+            params = parse_params(spec, parse_qs(parsed.query, keep_blank_values=True))
+            body, hit = service.cache.get((path, tuple(sorted(params.items()))),
+                                          lambda: service.query(func, params))
+            self.send_body(200, body, hit)
+        except ValueError as e:
+            self.send_body(400, _encode({'error': str(e)}))
+        except NotAvailable as e:
+            self.send_body(404, _encode({'error': str(e)}))
+        except PoolExhausted as e:
+            self.send_body(503, _encode({'error': str(e)}))
+        except sqlite3.Error as e:
+            self.send_body(500, _encode({'error': f'数据库错误: {e}'}))
+
+
+class QueryServer:
+    """在后台线程（start()）或前台（serve_forever()）运行的查询服务"""
+
+    def __init__(self, db_path, host='127.0.0.1', port=0, pool_size=POOL_SIZE, ttl=CACHE_TTL,
+                 max_entries=CACHE_ENTRIES, check_interval=CHECK_INTERVAL, verbose=False):
+        self.verbose = verbose
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.cache = ResponseCache(ttl, max_entries)
+        self.watcher = ChangeWatcher(self.pool, self.cache, check_interval)
+        self._server = ThreadingHTTPServer((host, port), QueryHandler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def query(self, func, params):
+        """在池里的连接上执行查询，返回编码好的响应体"""
+        with self.pool.connection() as conn:
+            return _encode(func(conn, **params))
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self.close()
+
+    def close(self):
+        self._server.server_close()
+        self.pool.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='需求数据库的本地只读 HTTP/JSON 查询服务')
+    parser.add_argument('--db', required=True, help='SQLite数据库路径')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE, help='只读连接数（默认 %d）' % POOL_SIZE)
+    parser.add_argument('--ttl', type=float, default=CACHE_TTL, help='缓存过期秒数，0 为不缓存（默认 %g）' % CACHE_TTL)
+    parser.add_argument('--cache-entries', type=int, default=CACHE_ENTRIES, help='最多缓存的响应数')
+    parser.add_argument('--check-interval', type=float, default=CHECK_INTERVAL,
+                        help='检查新数据的间隔秒数（默认 %g）' % CHECK_INTERVAL)
+    parser.add_argument('--verbose', action='store_true', help='打印访问日志')
+    args = parser.parse_args()
+
+    server = QueryServer(args.db, args.host, args.port, args.pool_size, args.ttl, args.cache_entries,
+                         args.check_interval, args.verbose)
+    with server.pool.connection() as conn:
+        status = health(conn)
+    print(f"查询服务 {server.url}  帖子 {status['posts']}  全文索引 {'有' if status['fts'] else '无（扫描帖子表）'}"
+          f"  趋势汇总 {'有' if status['rollups'] else '无'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+所有抓取器共享的限流器
+  - 令牌桶控制平均请求速率，取代固定 sleep
+  - 读取 X-Ratelimit-Remaining / X-Ratelimit-Reset / Retry-After 响应头，额度用完时暂停
+  - 429/5xx 和网络错误按带抖动的指数退避重试，不再直接丢弃整页
+  - 统计等待时间与请求时间
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """令牌桶：平均每秒 rate 个请求，最多允许 burst 个突发请求
+
+    采用预约模式：每次获取先扣令牌，不足时按排队顺序计算需要等待的时间，
+    同步（线程）和异步（asyncio）调用方共享同一个桶。
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """扣一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到可以发出下一个请求，返回等待的秒数"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """acquire() 的 asyncio 版本"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def retry_after_seconds(value, now=None):
+    """解析 Retry-After（秒数或HTTP日期）"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now if now is not None else time.time()
+    return max(0.0, when.timestamp() - now)
+
+
+class RateLimitError(Exception):
+    """重试次数用尽"""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class RateLimiter:
+    """令牌桶限流 + 响应头自适应 + 指数退避重试
+
+    call(fetch) 中的 fetch 可以返回带 status_code/headers 的响应对象（如 requests.Response），
+    也可以返回任意结果；抛出 retry_exceptions 中的异常时同样按退避重试，
+    异常若带 response 属性（如 prawcore 的异常）会读取其中的限流响应头。
+    """
+
+    def __init__(self, rate, burst=1, max_retries=5, backoff=1.0, max_backoff=60.0,
+                 retry_statuses=RETRY_STATUSES, retry_exceptions=(OSError,)):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.retry_exceptions = retry_exceptions
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'failures': 0,
+            'wait_seconds': 0.0,
+            'fetch_seconds': 0.0,
+        }
+
+    # ---------- 节奏控制 ----------
+
+    def _add(self, key, value):
+        with self._lock:
+            self.stats[key] += value
+
+    def _track(self, delta):
+        with self._lock:
+            self._in_flight += delta
+
+    def pause(self, seconds):
+        """服务端要求暂停：此后所有请求至少等到 seconds 秒之后"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _paused(self):
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def acquire(self):
+        """阻塞直到可以发出下一个请求（等令牌期间收到的暂停同样生效）"""
+        wait = self.bucket._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        while (paused := self._paused()) > 0:
+            time.sleep(paused)
+            wait += paused
+        self._add('wait_seconds', wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self.bucket._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        while (paused := self._paused()) > 0:
+            await asyncio.sleep(paused)
+            wait += paused
+        self._add('wait_seconds', wait)
+        return wait
+
+    def backoff_delay(self, attempt):
+        """第 attempt 次重试的等待时间（full jitter 指数退避）"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    # ---------- 响应处理 ----------
+
+    def observe(self, response):
+        """读取限流响应头；需要重试时返回建议的等待秒数，否则返回 None"""
+        headers = getattr(response, 'headers', None) or {}
+        remaining = headers.get('X-Ratelimit-Remaining') or headers.get('x-ratelimit-remaining')
+        reset = headers.get('X-Ratelimit-Reset') or headers.get('x-ratelimit-reset')
+        try:
+            # 剩余额度会被仍在途中的请求用掉，不够时暂停到窗口重置
+            if remaining is not None and reset is not None and float(remaining) < 1 + self._in_flight:
+                self.pause(float(reset))
+        except ValueError:
+            pass
+
+        status = getattr(response, 'status_code', None)
+        if status not in self.retry_statuses:
+            return None
+        if status == 429:
+            self._add('throttled', 1)
+        retry_after = retry_after_seconds(headers.get('Retry-After') or headers.get('retry-after'))
+        if retry_after is not None:
+            self.pause(retry_after)
+        return retry_after if retry_after is not None else -1
+
+    def _should_retry(self, result, error, attempt):
+        """返回 (是否重试, 退避秒数)"""
+        if error is not None:
+            if not isinstance(error, self.retry_exceptions):
+                return False, 0
+            suggested = self.observe(getattr(error, 'response', None))
+        else:
+            suggested = self.observe(result)
+            if suggested is None:
+                return False, 0
+        if attempt >= self.max_retries:
+            return False, 0
+        # 服务端给了 Retry-After 时已经通过 pause() 生效，这里只补一点抖动
+        if suggested is not None and suggested >= 0:
+            return True, random.uniform(0, self.backoff)
+        return True, self.backoff_delay(attempt)
+
+    def _finish(self, result, error):
+        if error is not None:
+            self._add('failures', 1)
+            raise error
+        if getattr(result, 'status_code', None) in self.retry_statuses:
+            self._add('failures', 1)
+            raise RateLimitError(f"HTTP {result.status_code} after {self.max_retries} retries", result)
+        return result
+
+    def call(self, fetch):
+        """限流地调用 fetch()，必要时重试"""
+        attempt = 0
+        while True:
+            self.acquire()
+            start = time.monotonic()
+            result, error = None, None
+            self._track(1)
+            try:
+                result = fetch()
+            except Exception as e:
+                error = e
+            self._track(-1)
+            self._add('fetch_seconds', time.monotonic() - start)
+            self._add('requests', 1)
+
+            retry, delay = self._should_retry(result, error, attempt)
+            if not retry:
+                return self._finish(result, error)
+            self._add('retries', 1)
+            time.sleep(delay)
+            self._add('wait_seconds', delay)
+            attempt += 1
+
+    async def call_async(self, fetch):
+        """call() 的 asyncio 版本，fetch() 返回 awaitable"""
+        attempt = 0
+        while True:
+            await self.acquire_async()
+            start = time.monotonic()
+            result, error = None, None
+            self._track(1)
+            try:
+                result = await fetch()
+            except Exception as e:
+                error = e
+            self._track(-1)
+            self._add('fetch_seconds', time.monotonic() - start)
+            self._add('requests', 1)
+
+            retry, delay = self._should_retry(result, error, attempt)
+            if not retry:
+                return self._finish(result, error)
+            self._add('retries', 1)
+            await asyncio.sleep(delay)
+            self._add('wait_seconds', delay)
+            attempt += 1
+
+    def summary(self):
+        """一行统计：请求数、重试、等待/请求耗时"""
+        s = self.stats
+        return (f"请求 {s['requests']} 次 (重试 {s['retries']}, 429 {s['throttled']}, 失败 {s['failures']}) | "
+                f"限流等待 {s['wait_seconds']:.1f}s / 请求耗时 {s['fetch_seconds']:.1f}s")
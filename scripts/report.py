@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+流式报告输出
+报告由一串块组成，生成函数按顺序调用：
+  - report.heading(name, **fields)：标题、表头等版式块，json 格式下忽略
+  - report.row(name, **fields)：数据块，每块渲染后立即写入文件，不在内存里拼接整份报告
+md / html 每种格式一套模板（str.format 语法，块名为键），html 下字段值自动转义；
+json 不用模板，连续的同名数据块写成一个数组（{"块名": [{字段...}, ...], ...}）。
+
+模板里的扩展写法：
+  - {x!u} 大写，{x!t} 首字母大写，{x:.80} 截断为80个字符
+  - 字符串列表字段用 ', ' 连接；字典列表字段逐条用 "块名.字段名" 模板渲染后拼接
+
+    with open_report(path, 'md', TEMPLATES) as report:
+        report.row('summary', total=100)
+        report.heading('keywords')
+        for rank, (word, count) in enumerate(keywords, 1):
+            report.row('keyword', rank=rank, word=word, count=count)
+"""
+
+import html
+import io
+import json
+import string
+from contextlib import contextmanager
+
+FORMATS = ('md', 'html', 'json')
+# 报告文件的扩展名
+SUFFIXES = {'md': '.md', 'html': '.html', 'json': '.json'}
+
+# html 报告的页面框架，{title} 为页面标题
+HTML_BEGIN = '''<!DOCTYPE html>
+<html lang="zh">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: -apple-system, "PingFang SC", sans-serif; max-width: 960px; margin: 2em auto; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; }}
+</style>
+</head>
+<body>
+'''
+HTML_END = '</body>\n</html>\n'
+
+
+class _Markup(str):
+    """已渲染（已转义）的片段，不再转义"""
+
+
+class _Formatter(string.Formatter):
+    def __init__(self, escape):
+        super().__init__()
+        self.escape = escape
+
+    def convert_field(self, value, conversion):
+        if conversion == 'u':
+            return str(value).upper()
+        if conversion == 't':
+            return str(value).title()
+        return super().convert_field(value, conversion)
+
+    def format_field(self, value, format_spec):
+        text = super().format_field(value, format_spec)
+        if self.escape and not isinstance(value, _Markup):
+            return html.escape(text)
+        return text
+
+
+class TemplateReport:
+    """按模板渲染 md / html 报告，逐块写入 f"""
+
+    def __init__(self, f, templates, escape=False, end=''):
+        self.f = f
+        self.templates = templates
+        self.end = end
+        self._formatter = _Formatter(escape)
+
+    def _render(self, name, fields):
+        values = {}
+        for key, value in fields.items():
+            if isinstance(value, (list, tuple)):
+                if value and isinstance(value[0], dict):
+                    value = _Markup(''.join(self._render(f'{name}.{key}', item) for item in value))
+                else:
+                    value = ', '.join(map(str, value))
+            values[key] = value
+        return self._formatter.vformat(self.templates[name], (), values)
+
+    def heading(self, name, **fields):
+        self.f.write(self._render(name, fields))
+
+    def row(self, name, **fields):
+        self.f.write(self._render(name, fields))
+
+    def close(self):
+        self.f.write(self.end)
+
+
+class JsonReport:
+    """把数据块流式写成一个 JSON 对象，版式块忽略"""
+
+    def __init__(self, f):
+        self.f = f
+        self._current = None
+        self._first_row = True
+        self.f.write('{')
+
+    def heading(self, name, **fields):
+        pass
+
+    def row(self, name, **fields):
+        if name != self._current:
+            if self._current is not None:
+                self.f.write('\n  ],')
+            self.f.write(f'\n  {json.dumps(name)}: [')
+            self._current = name
+            self._first_row = True
+        self.f.write('\n    ' if self._first_row else ',\n    ')
+        self.f.write(json.dumps(fields, ensure_ascii=False, default=str))
+        self._first_row = False
+
+    def close(self):
+        if self._current is not None:
+            self.f.write('\n  ]\n')
+        self.f.write('}\n')
+
+
+def make_report(f, fmt, templates, title=''):
+    """在打开的文件 f 上创建报告；templates 为 {格式: {块名: 模板}}"""
+    if fmt == 'json':
+        return JsonReport(f)
+    if fmt == 'html':
+        f.write(HTML_BEGIN.format(title=html.escape(title)))
+        return TemplateReport(f, templates['html'], escape=True, end=HTML_END)
+    if fmt == 'md':
+        return TemplateReport(f, templates['md'])
+    raise ValueError(f'未知报告格式: {fmt}')
+
+
+@contextmanager
+def open_report(path, fmt, templates, title=''):
+    """写到 path 的报告；退出时补上 json 的结尾或 html 的页尾"""
+    with open(path, 'w', encoding='utf-8') as f:
+        report = make_report(f, fmt, templates, title)
+        yield report
+        report.close()
+
+
+def render(write, fmt, templates, title=''):
+    """write(report) 生成的完整报告文本（返回字符串的旧接口用）"""
+    f = io.StringIO()
+    report = make_report(f, fmt, templates, title)
+    write(report)
+    report.close()
+    return f.getvalue()
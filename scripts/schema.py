@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+统一的库结构与迁移
+五个抓取脚本原先各自建 posts 表（列名、类型、索引都不一致），现在统一由这里建表，
+用 PRAGMA user_version 记录版本，migrate() 按顺序执行未应用的迁移，原地升级旧库：
+
+  1. 规范化存储：posts / comments 的时间统一为整数秒（created_utc、collected_utc），
+     subreddit 和 author 驻留为 subreddits / authors 表里的整数 id（subreddit_id、author_id）；
+     row_id 为 INTEGER PRIMARY KEY（rowid 的别名），VACUUM 不会重排，
+     检查点、NDJSON 索引和 FTS 表里记录的 rowid 一直有效；迁移时保留旧表的 rowid
+  2. 覆盖索引：帖子的 (subreddit_id, score) 和 (subreddit_id, created_utc)，按 subreddit 统计、
+     取高分帖子、按时间段汇总时只读索引（分析器不按 subreddit 读评论，评论不建）
+  3. crawl_state：抓取器按 (抓取器, subreddit, 列表) 记录的翻页进度（见 crawl_state.py），
+     与数据写在同一个库、同一个事务里，被中断的抓取重启后从断点继续
+
+读写都按对外的列（POST_COLUMNS / COMMENT_COLUMNS，与 crawl_reddit 原来的表一致）进行，
+新旧库通用：
+  - 写：upsert() 先把这批行里新的 subreddit / author 名字驻留，语句里按名字查 id、转换时间
+  - 读：select_list() / column_exprs() 给出各列的 SQL 表达式（名字从驻留表查回，
+    collected_utc 转回 ISO 字符串；每个驻留列是一次主键查找，分析器只选自己用到的列），
+    subreddit_condition() 按 subreddit 过滤时走 subreddit_id 索引；
+    没迁移过的旧库（分析器只读打开，不迁移）就是列名本身
+
+旧库里 scrape_json 的 timestamp 列由 created_utc 推出，不再单独保存；
+scraped_at / collected_at 合并为 collected_utc（读出时仍叫 collected_at）。
+
+    python scripts/schema.py --db data/reddit_posts.db [--vacuum]
+"""
+
+import argparse
+import time
+
+from db import BATCH_SIZE, batched, bulk_write, connect, insert_sql, transaction
+
+# 驻留表
+INTERN_TABLES = ('subreddits', 'authors')
+
+# 对外的列（不含 rowid），顺序与 crawl_reddit 原来的表一致
+POST_COLUMNS = ('id', 'subreddit', 'title', 'selftext', 'author', 'created_utc', 'ups', 'downs',
+                'score', 'num_comments', 'is_self', 'flair', 'url', 'collected_at')
+COMMENT_COLUMNS = ('id', 'post_id', 'subreddit', 'author', 'body', 'created_utc', 'score',
+                   'parent_id', 'is_top_level', 'collected_at')
+TABLE_COLUMNS = {'posts': POST_COLUMNS, 'comments': COMMENT_COLUMNS}
+
+# 读出时的时间格式（与 datetime.isoformat() 的秒级部分一致）
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+TABLE_DDL = {
+    'posts': '''
+        CREATE TABLE posts (
+            row_id INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            subreddit_id INTEGER REFERENCES subreddits(id),
+            author_id INTEGER REFERENCES authors(id),
+            title TEXT,
+            selftext TEXT,
+            created_utc INTEGER,
+            ups INTEGER,
+            downs INTEGER,
+            score INTEGER,
+            num_comments INTEGER,
+            is_self INTEGER,
+            flair TEXT,
+            url TEXT,
+            collected_utc INTEGER
+        )''',
+    'comments': '''
+        CREATE TABLE comments (
+            row_id INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            post_id TEXT,
+            subreddit_id INTEGER REFERENCES subreddits(id),
+            author_id INTEGER REFERENCES authors(id),
+            body TEXT,
+            created_utc INTEGER,
+            score INTEGER,
+            parent_id TEXT,
+            is_top_level INTEGER,
+            collected_utc INTEGER
+        )''',
+}
+
+# 驻留的列：对外列名 -> (驻留表, 存储列)
+INTERNED_COLUMNS = {'subreddit': ('subreddits', 'subreddit_id'), 'author': ('authors', 'author_id')}
+
+# 对外列 -> 读出时的表达式，{t} 为表名
+# 用标量子查询而不是 JOIN：查询里用不到的列不会去查驻留表，查询也不必给表加别名（rowid 不会有歧义）
+READ_EXPRESSIONS = {
+    'subreddit': '(SELECT name FROM subreddits WHERE id = {t}.subreddit_id)',
+    'author': '(SELECT name FROM authors WHERE id = {t}.author_id)',
+    'collected_at': f"strftime('{ISO_FORMAT}', {{t}}.collected_utc, 'unixepoch')",
+}
+
+# 对外列 -> 写入时的 (存储列, 值表达式)
+WRITE_EXPRESSIONS = {
+    'subreddit': ('subreddit_id', '(SELECT id FROM subreddits WHERE name = ?)'),
+    'author': ('author_id', '(SELECT id FROM authors WHERE name = ?)'),
+    'created_utc': ('created_utc', 'CAST(? AS INTEGER)'),
+    'collected_at': ('collected_utc', "CAST(strftime('%s', ?) AS INTEGER)"),
+}
+
+
+def _object_type(conn, name):
+    # 游标不继承连接的 row_factory（调用方可能设了 dict 之类的行工厂）
+    c = conn.cursor()
+    c.row_factory = None
+    row = c.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _stored_columns(conn, table):
+    # 用游标的列描述而不是 PRAGMA table_info：与连接的 row_factory 无关；表不存在时为空
+    if _object_type(conn, table) is None:
+        return []
+    return [d[0] for d in conn.execute(f'SELECT * FROM {table} LIMIT 0').description]
+
+
+def _legacy_expressions(table, legacy_columns):
+    """旧表的列 -> 新表存储列的 SELECT 表达式（l 为旧表），缺少的列为 NULL"""
+    def col(name):
+        return f'l.{name}' if name in legacy_columns else 'NULL'
+
+    created = 'CAST(l.created_utc AS INTEGER)' if 'created_utc' in legacy_columns else 'NULL'
+    if 'timestamp' in legacy_columns:
+        # scrape_json 的 timestamp 是本地时间的 ISO 字符串
+        created = f"coalesce({created}, CAST(strftime('%s', l.timestamp, 'utc') AS INTEGER))"
+    collected = ['l.' + c for c in ('collected_at', 'scraped_at') if c in legacy_columns]
+    if len(collected) > 1:
+        collected = [f"coalesce({', '.join(collected)})"]
+    collected = f"CAST(strftime('%s', {collected[0]}) AS INTEGER)" if collected else 'NULL'
+
+    expressions = {'row_id': 'l.rowid', 'subreddit_id': 's.id', 'author_id': 'a.id',
+                   'created_utc': created, 'collected_utc': collected}
+    storage_columns = [WRITE_EXPRESSIONS.get(c, (c, None))[0] for c in TABLE_COLUMNS[table]]
+    return {target: expressions.get(target, col(target)) for target in ['row_id'] + storage_columns}
+
+
+def _migrate_legacy(conn, table):
+    """把旧版 posts/comments 表的数据（保留 rowid）搬进新表，删掉旧表"""
+    legacy = f'_legacy_{table}'
+    conn.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    conn.execute(TABLE_DDL[table])
+    legacy_columns = set(_stored_columns(conn, legacy))
+    for names, col in (('subreddits', 'subreddit'), ('authors', 'author')):
+        if col in legacy_columns:
+            conn.execute(f'INSERT INTO {names}(name) SELECT DISTINCT {col} FROM {legacy} '
+                         f'WHERE {col} IS NOT NULL AND {col} NOT IN (SELECT name FROM {names})')
+    expressions = _legacy_expressions(table, legacy_columns)
+    subreddit = 'l.subreddit' if 'subreddit' in legacy_columns else 'NULL'
+    author = 'l.author' if 'author' in legacy_columns else 'NULL'
+    conn.execute(f'''INSERT OR REPLACE INTO {table} ({', '.join(expressions)})
+        SELECT {', '.join(expressions.values())}
+        FROM {legacy} l
+        LEFT JOIN subreddits s ON s.name = {subreddit}
+        LEFT JOIN authors a ON a.name = {author}
+        ORDER BY l.rowid''')
+    conn.execute(f'DROP TABLE {legacy}')
+
+
+def _v1_normalized(conn):
+    """规范化存储；旧表的数据原地搬过来"""
+    for names in INTERN_TABLES:
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {names} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+    for table in TABLE_COLUMNS:
+        if _object_type(conn, table) == 'table':
+            _migrate_legacy(conn, table)
+        elif _object_type(conn, table) is None:
+            conn.execute(TABLE_DDL[table])
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id)')
+
+
+def _v2_covering_indexes(conn):
+    """按分析器的访问模式建覆盖索引"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_subreddit_score '
+                 'ON posts(subreddit_id, score, created_utc)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_subreddit_created '
+                 'ON posts(subreddit_id, created_utc, score)')
+    conn.execute('ANALYZE')
+
+
+def _v3_crawl_state(conn):
+    """抓取进度表"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS crawl_state (
+        crawler TEXT NOT NULL,
+        subreddit TEXT NOT NULL,
+        listing TEXT NOT NULL,
+        after TEXT,
+        newest_created_utc INTEGER,
+        pages_done INTEGER NOT NULL DEFAULT 0,
+        complete INTEGER NOT NULL DEFAULT 0,
+        updated_utc INTEGER NOT NULL,
+        PRIMARY KEY (crawler, subreddit, listing)
+    ) WITHOUT ROWID''')
+
+
+# (版本, 说明, 迁移函数)，按版本号顺序执行
+MIGRATIONS = [
+    (1, '规范化存储（整数时间、驻留 subreddit/author）', _v1_normalized),
+    (2, '覆盖索引 (subreddit, score) / (subreddit, created_utc)', _v2_covering_indexes),
+    (3, '抓取进度表 crawl_state', _v3_crawl_state),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, verbose=False):
+    """执行所有未应用的迁移，返回 [(版本, 说明, 秒)]
+
+    每个迁移在一个 IMMEDIATE 事务里执行并更新 user_version，
+    多个抓取器同时启动时只有一个会执行迁移，其余等锁后看到新版本直接跳过。
+    迁移会删掉旧表上的 FTS / 趋势汇总触发器，之后在同一事务里按新表重建；
+    迁移可能补上帖子的 created_utc（由旧的 timestamp 列推出），趋势汇总同时重新回填。
+    """
+    import fts
+    import trends
+
+    applied = []
+    for number, description, step in MIGRATIONS:
+        if version(conn) >= number:
+            continue
+        start = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if version(conn) < number:
+                step(conn)
+                for table in TABLE_COLUMNS:
+                    if fts.has_fts(conn, table):
+                        fts.ensure_fts(conn, table)
+                if trends.has_rollups(conn):
+                    trends.ensure_rollups(conn, rebuild=True)
+                conn.execute(f'PRAGMA user_version = {number}')
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append((number, description, time.perf_counter() - start))
+        if verbose:
+            print(f"  v{number}: {description} ({applied[-1][2]:.2f}s)")
+    return applied
+
+
+def interned(conn, table):
+    """table 是否为统一结构（subreddit / author 存为驻留 id）；没迁移过的旧库直接存名字"""
+    return 'subreddit_id' in _stored_columns(conn, table)
+
+
+def column_exprs(conn, table):
+    """{对外列名: SQL 表达式}，用在不给 table 加别名的查询里，新旧库都适用"""
+    if not interned(conn, table):
+        return {col: col for col in _stored_columns(conn, table)}
+    return {col: READ_EXPRESSIONS[col].format(t=table) if col in READ_EXPRESSIONS else col
+            for col in TABLE_COLUMNS[table]}
+
+
+def select_list(conn, table, columns=None):
+    """SELECT 子句里的对外列：select_list(conn, 'posts', ['id', 'subreddit']) -> 'id, (...) AS subreddit'"""
+    exprs = column_exprs(conn, table)
+    return ', '.join(exprs[col] if exprs[col] == col else f'{exprs[col]} AS {col}'
+                     for col in (columns or exprs))
+
+
+def table_columns(conn, table):
+    """posts / comments 对外的列，新旧库都适用"""
+    return list(column_exprs(conn, table))
+
+
+def storage_columns(conn, table):
+    """整行复制时要写的存储列（不含 rowid 别名 row_id）"""
+    return [col for col in _stored_columns(conn, table) if col != 'row_id']
+
+
+def subreddit_condition(conn, table):
+    """"subreddit = ?" 的条件：统一结构里先查出 id，走 (subreddit_id, ...) 索引"""
+    if interned(conn, table):
+        return f'{table}.subreddit_id = (SELECT id FROM subreddits WHERE name = ?)'
+    return f'{table}.subreddit = ?'
+
+
+def table_exists(conn, table):
+    return _object_type(conn, table) == 'table'
+
+
+def upsert(conn, table, columns, rows, batch_size=BATCH_SIZE, on_error=None):
+    """按对外的列批量 INSERT OR REPLACE（参数同 db.upsert），返回写入行数
+
+    统一结构里每批先把新出现的 subreddit / author 名字插入驻留表，
+    语句里再按名字查 id、把时间转成整数秒；旧库的表直接写入。
+    """
+    if not interned(conn, table):
+        return bulk_write(conn, insert_sql(table, columns), rows, batch_size, on_error)
+    targets, values = zip(*(WRITE_EXPRESSIONS.get(col, (col, '?')) for col in columns))
+    sql = f"INSERT OR REPLACE INTO {table} ({', '.join(targets)}) VALUES ({', '.join(values)})"
+    names = [(INTERNED_COLUMNS[col][0], i) for i, col in enumerate(columns) if col in INTERNED_COLUMNS]
+    count = 0
+    with transaction(conn):
+        for batch in batched(rows, batch_size):
+            for intern_table, i in names:
+                new = dict.fromkeys(row[i] for row in batch if row[i] is not None)
+                conn.executemany(f'INSERT OR IGNORE INTO {intern_table}(name) VALUES (?)',
+                                 ((name,) for name in new))
+            count += bulk_write(conn, sql, batch, batch_size, on_error)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='升级数据库到统一结构')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--vacuum', action='store_true', help='迁移后 VACUUM，回收旧表占用的空间')
+    args = parser.parse_args()
+
+    conn = connect(args.db, 'ingest')
+    print(f"当前版本: {version(conn)}，目标版本: {SCHEMA_VERSION}")
+    applied = migrate(conn, verbose=True)
+    if args.vacuum:
+        start = time.perf_counter()
+        conn.execute('VACUUM')
+        print(f"  VACUUM ({time.perf_counter() - start:.2f}s)")
+    if not applied:
+        print("已是最新版本")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+本地 Reddit 桩服务器
+返回预先生成的 /r/<subreddit>/new.json 分页数据，用于在不访问外网的情况下
+验证和测量抓取器（并发、限流、翻页游标、增量停止等）
+
+rate_limit=(次数, 窗口秒数) 时模拟 Reddit 的固定窗口限流：每个响应带
+X-Ratelimit-Used/Remaining/Reset 头，超出额度返回 429 + Retry-After
+
+同时提供 praw 使用的 OAuth 接口，praw.Reddit(oauth_url=stub.url, reddit_url=stub.url) 即可访问：
+  POST /api/v1/access_token、GET /r/<subreddit>/hot、GET /comments/<id>
+每个帖子的评论树按 comments_per_post / comment_depth 确定性生成
+
+用法:
+    with StubReddit(['productivity', 'ios'], posts_per_sub=250, latency=0.2) as stub:
+        fetch(stub.url + '/r/productivity/new.json?limit=25')
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LISTING_PATH = re.compile(r'^/r/([^/]+)/(new|hot)(?:\.json)?/?$')
+COMMENTS_PATH = re.compile(r'^/comments/([^/]+)(?:/[^/]*)?/?(?:\.json)?$')
+
+
+def make_post(subreddit, index, created_utc):
+    """生成一条 Reddit listing 中的帖子"""
+    post_id = f"{subreddit.lower()[:6]}{index:06d}"
+    return {
+        'kind': 't3',
+        'data': {
+            'id': post_id,
+            'name': f't3_{post_id}',
+            'title': f"Stub post {index} in r/{subreddit}: I wish there was a simple offline app",
+            'author': f'user{index % 97}',
+            'subreddit': subreddit,
+            'url': f'https://old.reddit.com/r/{subreddit}/comments/{post_id}/',
+            'link_flair_text': None,
+            'created_utc': float(created_utc),
+            'score': index % 50,
+            'ups': index % 50,
+            'downs': 0,
+            'is_self': True,
+            'num_comments': index % 13,
+            'selftext': f"Looking for a tool to track habits. Post body {index}."
+        }
+    }
+
+
+def make_comment(post_id, subreddit, path, depth, max_depth, created_utc):
+    """生成一条评论及其回复链（path 为从顶级评论到本条的序号）"""
+    comment_id = f"{post_id}c{'_'.join(map(str, path))}"
+    parent = f"t1_{post_id}c{'_'.join(map(str, path[:-1]))}" if len(path) > 1 else f"t3_{post_id}"
+    replies = ''
+    if depth + 1 < max_depth:
+        child = make_comment(post_id, subreddit, path + [0], depth + 1, max_depth, created_utc)
+        replies = {'kind': 'Listing', 'data': {'children': [child], 'after': None, 'before': None}}
+    return {
+        'kind': 't1',
+        'data': {
+            'id': comment_id,
+            'name': f't1_{comment_id}',
+            'link_id': f't3_{post_id}',
+            'parent_id': parent,
+            'subreddit': subreddit,
+            'author': f'commenter{sum(path) % 31}',
+            'body': f"Same here, I wish there was an app for this (depth {depth})",
+            'created_utc': float(created_utc),
+            'score': (path[0] + depth) % 7 - 1,
+            'depth': depth,
+            'replies': replies
+        }
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.stub.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count('requests')
+        if stub.latency:
+            time.sleep(stub.latency)
+        allowed, headers = stub.check_rate()
+        if not allowed:
+            stub.count('throttled')
+            self.send_json(429, {'message': 'Too Many Requests', 'error': 429}, headers)
+            return
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        comments = COMMENTS_PATH.match(parsed.path)
+        if comments:
+            payload = stub.comments(comments.group(1))
+            stub.count('served')
+            self.send_json(200 if payload else 404, payload or {'error': 404}, headers)
+            return
+        match = LISTING_PATH.match(parsed.path)
+        if not match:
+            self.send_json(404, {'error': 404})
+            return
+        limit = int(query.get('limit', ['25'])[0])
+        after = query.get('after', [None])[0]
+        stub.count('served')
+        self.send_json(200, stub.listing(match.group(1), after, limit), headers)
+
+    def do_POST(self):
+        """praw 的应用级 OAuth 令牌"""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if urlparse(self.path).path != '/api/v1/access_token':
+            self.send_json(404, {'error': 404})
+            return
+        self.send_json(200, {'access_token': 'stub-token', 'token_type': 'bearer',
+                             'expires_in': 86400, 'scope': '*'})
+
+
+class StubReddit:
+    """在后台线程运行的桩服务器"""
+
+    def __init__(self, subreddits, posts_per_sub=250, latency=0.0, now=1_700_000_000, rate_limit=None,
+                 comments_per_post=5, comment_depth=3):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.comments_per_post = comments_per_post
+        self.comment_depth = comment_depth
+        self.stats = {'requests': 0, 'connections': 0, 'served': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_used = 0
+        self._now = now
+        # 每个 subreddit 的帖子按时间倒序（new.json 的顺序）
+        self.posts = {}
+        for subreddit in subreddits:
+            self.posts[subreddit] = []
+            self.publish(subreddit, posts_per_sub)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def check_rate(self):
+        """固定窗口限流，返回 (是否放行, 限流响应头)"""
+        if not self.rate_limit:
+            return True, {}
+        limit, window = self.rate_limit
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= window:
+                self._window_start = now
+                self._window_used = 0
+            reset = window - (now - self._window_start)
+            allowed = self._window_used < limit
+            if allowed:
+                self._window_used += 1
+            used = self._window_used
+        headers = {
+            'X-Ratelimit-Used': str(used),
+            'X-Ratelimit-Remaining': str(limit - used),
+            'X-Ratelimit-Reset': f'{reset:.3f}',
+        }
+        if not allowed:
+            headers['Retry-After'] = str(math.ceil(reset))
+        return allowed, headers
+
+    def publish(self, subreddit, count):
+        """在列表头部发布 count 条新帖子"""
+        with self._lock:
+            posts = self.posts.setdefault(subreddit, [])
+            start = len(posts)
+            new = [make_post(subreddit, start + i, self._now + start + i) for i in range(count)]
+            posts[:0] = reversed(new)
+
+    def listing(self, subreddit, after, limit):
+        """new.json 的一页"""
+        with self._lock:
+            posts = self.posts.get(subreddit, [])
+            start = 0
+            if after:
+                names = [p['data']['name'] for p in posts]
+                start = names.index(after) + 1 if after in names else len(posts)
+            page = posts[start:start + limit]
+            more = start + limit < len(posts)
+        return {
+            'kind': 'Listing',
+            'data': {
+                'children': page,
+                'after': page[-1]['data']['name'] if page and more else None
+            }
+        }
+
+    def find_post(self, post_id):
+        with self._lock:
+            for posts in self.posts.values():
+                for post in posts:
+                    if post['data']['id'] == post_id:
+                        return post
+        return None
+
+    def comments(self, post_id):
+        """/comments/<id> 的响应：[帖子列表, 评论树列表]；帖子不存在时返回 None"""
+        post = self.find_post(post_id)
+        if post is None:
+            return None
+        data = post['data']
+        tree = [make_comment(post_id, data['subreddit'], [i], 0, self.comment_depth, data['created_utc'])
+                for i in range(self.comments_per_post)]
+        return [
+            {'kind': 'Listing', 'data': {'children': [post], 'after': None, 'before': None}},
+            {'kind': 'Listing', 'data': {'children': tree, 'after': None, 'before': None}},
+        ]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
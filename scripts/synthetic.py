@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+合成语料生成器（基准测试用）
+按固定随机种子生成任意规模的帖子和评论，写入 crawl_reddit 的表结构：
+  - 正文由 Zipf 分布的词表组成，按一定比例混入痛点短语和需求类别关键词，
+    命中率接近真实抓取的数据（约三分之一的帖子带痛点）
+  - 得分为长尾分布，num_comments 与实际生成的评论数一致
+  - created_utc 均匀分布在最近一年
+生成是流式的，内存与语料规模无关：
+    python scripts/synthetic.py --posts 100000 --db reddit_posts.db
+"""
+
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime
+
+from analyze_v2 import NEED_CATEGORIES, PAIN_KEYWORDS
+from crawl_reddit import SUBREDDITS, init_database, save_to_db
+
+# 填充词表大小（Zipf 分布，排名越靠前出现越多）
+VOCABULARY_SIZE = 5000
+# 帖子标题/正文、评论中出现痛点短语的概率
+PAIN_RATE = 0.25
+COMMENT_PAIN_RATE = 0.08
+# 帖子带正文的比例（其余为链接帖）
+SELFTEXT_RATE = 0.7
+# 每帖平均评论数
+COMMENTS_PER_POST = 3
+# 每次写库的帖子数
+SAVE_CHUNK = 10000
+# 时间跨度（秒）
+TIME_SPAN = 365 * 24 * 3600
+
+SYLLABLES = ['ta', 'ko', 'mi', 're', 'sa', 'lu', 'ne', 'po', 'di', 'ga', 'vo', 'shi',
+             'ran', 'tel', 'mor', 'kin', 'bar', 'lex', 'pul', 'dor']
+TITLE_TEMPLATES = [
+    "{pain} {cat} app for {word}",
+    "{pain} something to {cat} my {word}",
+    "Best way to {cat} {word} and {word2}?",
+    "My {word} {cat} setup after a year",
+    "{pain} a {cat} tool that does {word}",
+    "How do you {cat} your {word}?",
+]
+
+
+def build_vocabulary(size=VOCABULARY_SIZE, seed=0):
+    """确定性的伪词表和对应的 Zipf 累积权重"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = list(itertools.accumulate(1.0 / rank for rank in range(1, size + 1)))
+    return words, weights
+
+
+class CorpusGenerator:
+    """按种子确定性地生成帖子和评论"""
+
+    def __init__(self, seed=0, comments_per_post=COMMENTS_PER_POST, now=None):
+        self.rng = random.Random(seed)
+        self.words, self.cum_weights = build_vocabulary(seed=seed)
+        self.category_words = [kw for kws in NEED_CATEGORIES.values() for kw in kws]
+        self.comments_per_post = comments_per_post
+        self.now = int(now if now is not None else time.time())
+        self.collected_at = datetime.fromtimestamp(self.now).isoformat()
+
+    def _filler(self, n):
+        return self.rng.choices(self.words, cum_weights=self.cum_weights, k=n)
+
+    def _sentence_words(self, n, pain_rate):
+        """n 个填充词，随机插入类别关键词和（按概率）痛点短语"""
+        words = self._filler(n)
+        for _ in range(self.rng.randint(0, 2)):
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(self.category_words))
+        if self.rng.random() < pain_rate:
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(PAIN_KEYWORDS))
+        return ' '.join(words)
+
+    def _score(self):
+        return min(int(self.rng.paretovariate(1.2)) - 1, 50000)
+
+    def _title(self):
+        template = self.rng.choice(TITLE_TEMPLATES)
+        pain = self.rng.choice(PAIN_KEYWORDS) if self.rng.random() < PAIN_RATE else 'Looking at'
+        word, word2 = self._filler(2)
+        title = template.format(pain=pain, cat=self.rng.choice(self.category_words), word=word, word2=word2)
+        return title[0].upper() + title[1:]
+
+    def post(self, n):
+        """第 n 个帖子及其评论：(post, comments)"""
+        rng = self.rng
+        post_id = f's{n:x}'
+        subreddit = SUBREDDITS[n % len(SUBREDDITS)]
+        created = self.now - rng.randrange(TIME_SPAN)
+        selftext = ''
+        if rng.random() < SELFTEXT_RATE:
+            selftext = '. '.join(self._sentence_words(rng.randint(6, 25), PAIN_RATE / 2)
+                                 for _ in range(rng.randint(1, 5)))
+        score = self._score()
+        comments = [self.comment(post_id, subreddit, created, i)
+                    for i in range(rng.randint(0, 2 * self.comments_per_post))]
+        post = {
+            'id': post_id,
+            'subreddit': subreddit,
+            'title': self._title(),
+            'selftext': selftext,
+            'author': f'user{rng.randint(1, 200000)}',
+            'created_utc': created,
+            'ups': score,
+            'downs': 0,
+            'score': score,
+            'num_comments': len(comments),
+            'is_self': bool(selftext),
+            'flair': rng.choice(['', '', 'Question', 'Discussion', 'Tool']),
+            'url': f'https://reddit.com/r/{subreddit}/comments/{post_id}',
+            'collected_at': self.collected_at,
+        }
+        return post, comments
+
+    def comment(self, post_id, subreddit, post_created, i):
+        rng = self.rng
+        return {
+            'id': f'{post_id}c{i:x}',
+            'post_id': post_id,
+            'subreddit': subreddit,
+            'author': f'user{rng.randint(1, 200000)}',
+            'body': self._sentence_words(rng.randint(4, 60), COMMENT_PAIN_RATE),
+            'created_utc': post_created + rng.randrange(7 * 24 * 3600),
+            'score': self._score(),
+            'parent_id': f't3_{post_id}' if i < 2 or rng.random() < 0.5 else f't1_{post_id}c{i - 1:x}',
+            'is_top_level': i < 2,
+            'collected_at': self.collected_at,
+        }
+
+    def chunks(self, total, chunk_size=SAVE_CHUNK):
+        """按块产出 (posts, comments)，每块 chunk_size 个帖子"""
+        for start in range(0, total, chunk_size):
+            posts, comments = [], []
+            for n in range(start, min(total, start + chunk_size)):
+                post, post_comments = self.post(n)
+                posts.append(post)
+                comments.extend(post_comments)
+            yield posts, comments
+
+
+def generate(db_path, posts, seed=0, comments_per_post=COMMENTS_PER_POST, chunk_size=SAVE_CHUNK):
+    """生成 posts 个帖子写入 db_path，返回 (帖子数, 评论数, 生成耗时, 写库耗时)"""
+    conn = init_database(db_path)
+    generator = CorpusGenerator(seed, comments_per_post)
+    post_count = comment_count = 0
+    generate_time = save_time = 0.0
+    chunks = generator.chunks(posts, chunk_size)
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        generate_time += time.perf_counter() - start
+        if chunk is None:
+            break
+        start = time.perf_counter()
+        save_to_db(conn, *chunk)
+        save_time += time.perf_counter() - start
+        post_count += len(chunk[0])
+        comment_count += len(chunk[1])
+    conn.close()
+    return post_count, comment_count, generate_time, save_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成语料')
+    parser.add_argument('--db', required=True, help='目标数据库（crawl_reddit 表结构）')
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments-per-post', type=int, default=COMMENTS_PER_POST, help='平均每帖评论数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    posts, comments, generate_time, save_time = generate(args.db, args.posts, args.seed,
+                                                         args.comments_per_post)
+    print(f"帖子 {posts} / 评论 {comments} | 生成 {generate_time:.1f}s / 写库 {save_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
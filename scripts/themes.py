@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+痛点帖子的需求主题聚类（离线，无网络）
+categorize_needs() 按子串把帖子归入固定的 NEED_CATEGORIES（'run' 会命中 "running out of time"），
+这里把痛点帖子按内容聚成主题，代替手工整理 10_app_ideas.md：
+  - 向量化：TF-IDF（1~2 词，停用词与 keyphrases.py 相同）+ TruncatedSVD 降到 N_COMPONENTS 维，
+    行归一化后用余弦相似度；词表、idf 和 SVD 基在第一次运行时拟合并存入缓存文件，之后一直复用，
+    帖子数增长到拟合时的 REFIT_GROWTH 倍（或加 --refit）才重新拟合
+  - 向量缓存：按 content_digest(标题, 正文) 存向量，内容没变的帖子不再向量化；重新拟合后整体作废
+  - 聚类：mini-batch k-means（球面，质心按余弦比较），质心和每个质心累计的样本数存入缓存；
+    再次运行时只用新向量化的帖子继续更新质心（学习率 1/累计数，即在线 k-means 接着处理新样本），
+    然后所有帖子分配到最近的质心；改变 --themes 时重新聚类
+  - 主题按帖子数排序，附上总得分、该主题的特色短语（KeyphraseModel.distinctive）和得分最高的帖子
+
+    python scripts/themes.py --db reddit_posts.db --themes 20 --format md
+"""
+
+import argparse
+import io
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+import keyphrases
+import profiling
+from analyze_needs import (CHUNK_SIZE, DB_PATH, OUTPUT_DIR, PAIN_POINT_MATCHER, _text_column,
+                           iter_frames, keyword_indicator)
+from checkpoint import content_digest
+from db import connect
+from keyphrases import KeyphraseModel
+from profiling import PROFILER
+from report import FORMATS as REPORT_FORMATS, SUFFIXES as REPORT_SUFFIXES, open_report
+from topk import GroupedTopK
+
+# 主题数（k-means 的 k）
+N_THEMES = 20
+# 向量维数（SVD 分量数）
+N_COMPONENTS = 128
+# TF-IDF 词表：最多保留的 1~2 词短语数，至少出现在这么多篇帖子里
+MAX_FEATURES = 30000
+MIN_DF = 2
+# 痛点帖子数超过拟合时的这个倍数就重新拟合向量化模型
+REFIT_GROWTH = 2.0
+# mini-batch k-means：每批样本数、全量拟合时遍历数据的轮数、重新初始化的次数（取平均相似度最高的一次）、
+# k-means++ 初始化的抽样数
+BATCH_SIZE = 1024
+EPOCHS = 10
+N_INIT = 3
+INIT_SAMPLE = 20000
+# 每次分配/比对的向量数，限制 n × k 的临时矩阵
+ASSIGN_CHUNK = 50000
+SEED = 0
+# 报告中每个主题的特色短语数 / 高分帖子数
+REPORT_TOP_PHRASES = 6
+REPORT_TOP_POSTS = 5
+# 缓存文件（位于 OUTPUT_DIR）
+CACHE_FILE = 'theme_cache.db'
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS model (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        data BLOB
+    );
+    CREATE TABLE IF NOT EXISTS embeddings (
+        digest TEXT PRIMARY KEY,
+        vector BLOB
+    ) WITHOUT ROWID;
+'''
+
+
+class Embedder:
+    """TF-IDF + SVD 向量化模型；拟合后只保存词表、idf 和 SVD 基，transform 不再依赖语料"""
+
+    def __init__(self, words, idf, components):
+        self.words = words
+        self.idf = idf.astype(np.float32)
+        self.components = components.astype(np.float32)
+        self._counter = CountVectorizer(vocabulary=words, ngram_range=(1, 2),
+                                        preprocessor=keyphrases.normalize,
+                                        token_pattern=keyphrases.TOKEN_RE.pattern,
+                                        stop_words=list(keyphrases.STOP_WORDS), dtype=np.float32)
+
+    @classmethod
+    def fit_transform(cls, texts, n_components=N_COMPONENTS, max_features=MAX_FEATURES, min_df=MIN_DF):
+        """(Embedder, texts 的向量)：拟合用的 TF-IDF 矩阵直接降维，不再分词一遍"""
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), preprocessor=keyphrases.normalize,
+                                     token_pattern=keyphrases.TOKEN_RE.pattern,
+                                     stop_words=list(keyphrases.STOP_WORDS), sublinear_tf=True,
+                                     min_df=min(min_df, len(texts)), max_features=max_features,
+                                     dtype=np.float32)
+        matrix = vectorizer.fit_transform(texts)
+        n_components = max(min(n_components, matrix.shape[1] - 1, len(texts) - 1), 1)
+        svd = TruncatedSVD(n_components, random_state=SEED).fit(matrix)
+        embedder = cls(vectorizer.get_feature_names_out().tolist(), vectorizer.idf_, svd.components_)
+        return embedder, normalize(np.asarray(matrix @ embedder.components.T, dtype=np.float32))
+
+    def transform(self, texts):
+        """(N, N_COMPONENTS) 行归一化的 float32 向量"""
+        counts = self._counter.transform(texts)
+        # 与拟合时的 TfidfVectorizer(sublinear_tf=True) 相同：1 + ln(tf)，乘 idf，行归一化
+        np.log(counts.data, out=counts.data)
+        counts.data += 1
+        tfidf = normalize(counts @ sp.diags(self.idf))
+        return normalize(np.asarray(tfidf @ self.components.T, dtype=np.float32))
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, words=np.array(self.words), idf=self.idf, components=self.components)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        arrays = np.load(io.BytesIO(data))
+        return cls(arrays['words'].tolist(), arrays['idf'], arrays['components'])
+
+
+class ThemeCache:
+    """向量化模型、帖子向量和 k-means 状态的缓存（独立的SQLite文件）"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                          (key, json.dumps(value)))
+
+    def embedder(self):
+        """(Embedder, 拟合时的帖子数)，还没有拟合过时为 (None, 0)"""
+        row = self.conn.execute('SELECT data FROM model').fetchone()
+        if row is None:
+            return None, 0
+        return Embedder.from_bytes(row[0]), self.get('fitted_posts', 0)
+
+    def set_embedder(self, embedder, posts):
+        """换用新模型：旧向量和质心全部作废"""
+        self.conn.execute('DELETE FROM embeddings')
+        self.conn.execute('DELETE FROM meta')
+        self.conn.execute('INSERT OR REPLACE INTO model (id, data) VALUES (0, ?)', (embedder.to_bytes(),))
+        self.set('fitted_posts', posts)
+
+    def lookup(self, digests, dim):
+        """(向量矩阵, 未命中的下标)；未命中的行为 0"""
+        vectors = np.zeros((len(digests), dim), dtype=np.float32)
+        position = {}
+        for i, digest in enumerate(digests):
+            position.setdefault(digest, []).append(i)
+        unique = list(position)
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for digest, vector in self.conn.execute(
+                    f'SELECT digest, vector FROM embeddings WHERE digest IN ({placeholders})', batch):
+                vectors[position.pop(digest)] = np.frombuffer(vector, dtype=np.float32)
+        missing = np.array(sorted(i for rows in position.values() for i in rows), dtype=np.int64)
+        return vectors, missing
+
+    def store(self, digests, vectors):
+        self.conn.executemany('INSERT OR REPLACE INTO embeddings (digest, vector) VALUES (?, ?)',
+                              zip(digests, (vector.tobytes() for vector in vectors)))
+
+    def commit(self):
+        self.conn.commit()
+
+
+def assign(vectors, centroids):
+    """(最近质心的下标, 余弦相似度)；质心不必归一化"""
+    unit = normalize(centroids)
+    labels = np.zeros(len(vectors), dtype=np.int64)
+    similarity = np.zeros(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        scores = vectors[start:start + ASSIGN_CHUNK] @ unit.T
+        labels[start:start + len(scores)] = scores.argmax(axis=1)
+        similarity[start:start + len(scores)] = scores.max(axis=1)
+    return labels, similarity
+
+
+def init_centroids(vectors, k, rng):
+    """k-means++（余弦距离），在最多 INIT_SAMPLE 个样本上选初始质心"""
+    if len(vectors) > INIT_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), INIT_SAMPLE, replace=False)]
+    chosen = [int(rng.integers(len(vectors)))]
+    distance = np.maximum(1 - vectors @ vectors[chosen[0]], 0)
+    for _ in range(1, k):
+        total = distance.sum()
+        pick = int(rng.choice(len(vectors), p=distance / total)) if total > 0 else int(rng.integers(len(vectors)))
+        chosen.append(pick)
+        distance = np.minimum(distance, np.maximum(1 - vectors @ vectors[pick], 0))
+    return vectors[chosen].copy()
+
+
+def minibatch_update(centroids, counts, vectors, rng, epochs=1, batch_size=BATCH_SIZE):
+    """mini-batch k-means 更新（原地）：每批样本分配到最近的质心，质心向批内均值移动，
+    学习率为 1/该质心累计分到的样本数"""
+    for _ in range(epochs):
+        order = rng.permutation(len(vectors))
+        for start in range(0, len(order), batch_size):
+            batch = vectors[order[start:start + batch_size]]
+            labels, _ = assign(batch, centroids)
+            sizes = np.bincount(labels, minlength=len(centroids))
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, batch)
+            counts += sizes
+            hit = sizes > 0
+            centroids[hit] += (sums[hit] - sizes[hit, None] * centroids[hit]) / counts[hit, None]
+
+
+def fit_centroids(vectors, k, rng, n_init=N_INIT):
+    """全量拟合：(质心, 每个质心累计的样本数)"""
+    best = None
+    for _ in range(n_init):
+        centroids = init_centroids(vectors, k, rng)
+        counts = np.zeros(k)
+        minibatch_update(centroids, counts, vectors, rng, EPOCHS)
+        similarity = assign(vectors, centroids)[1].mean()
+        if best is None or similarity > best[0]:
+            best = (similarity, centroids, counts)
+    return best[1], best[2]
+
+
+def load_pain_posts(db_path, chunk_size=CHUNK_SIZE):
+    """流式读取帖子，只保留命中痛点关键词的：[{id, subreddit, title, score, text, digest}]"""
+    posts = []
+    conn = connect(db_path, 'analyze')
+    for chunk in iter_frames(conn, 'posts', chunk_size):
+        text = _text_column(chunk, ['title', 'selftext'])
+        with PROFILER.stage('detect', len(chunk)):
+            pain = keyword_indicator(text.str.lower(), PAIN_POINT_MATCHER)
+            rows = np.flatnonzero(np.diff(pain.indptr))
+        chunk = chunk.iloc[rows]
+        for post_id, subreddit, title, selftext, score, full in zip(
+                chunk['id'].tolist(), chunk['subreddit'].tolist(), chunk['title'].tolist(),
+                chunk['selftext'].tolist(), chunk['score'].tolist(), text.iloc[rows].tolist()):
+            posts.append({'id': post_id, 'subreddit': subreddit, 'title': title, 'score': score,
+                          'text': full, 'digest': content_digest(title, selftext)})
+    conn.close()
+    return posts
+
+
+def discover_themes(db_path=DB_PATH, cache_path=None, n_themes=N_THEMES, refit=False, chunk_size=CHUNK_SIZE):
+    """聚类痛点帖子，返回 {'themes': [按帖子数排序的主题], 统计...}"""
+    posts = load_pain_posts(db_path, chunk_size)
+    stats = {'posts': len(posts), 'embedded': 0, 'refit': False, 'updated': 0}
+    if not posts:
+        return dict(stats, themes=[])
+
+    cache = ThemeCache(cache_path or OUTPUT_DIR / CACHE_FILE)
+    texts = [post['text'] for post in posts]
+    digests = [post['digest'] for post in posts]
+    embedder, fitted_posts = cache.embedder()
+    if embedder is None or refit or len(posts) > fitted_posts * REFIT_GROWTH:
+        with PROFILER.stage('embed', len(posts)):
+            embedder, vectors = Embedder.fit_transform(texts)
+        cache.set_embedder(embedder, len(posts))
+        missing = np.arange(len(posts))
+        stats['refit'] = True
+    else:
+        vectors, missing = cache.lookup(digests, len(embedder.components))
+        if len(missing):
+            with PROFILER.stage('embed', len(missing)):
+                vectors[missing] = embedder.transform([texts[i] for i in missing])
+    cache.store([digests[i] for i in missing.tolist()], vectors[missing])
+    stats['embedded'] = len(missing)
+
+    k = min(n_themes, len(posts))
+    rng = np.random.default_rng(SEED)
+    state = cache.get('kmeans')
+    with PROFILER.stage('cluster', len(posts)):
+        if state is not None and len(state['counts']) == k:
+            centroids = np.array(state['centroids'], dtype=np.float32)
+            counts = np.array(state['counts'], dtype=np.float64)
+            minibatch_update(centroids, counts, vectors[missing], rng)
+            stats['updated'] = len(missing)
+        else:
+            centroids, counts = fit_centroids(vectors, k, rng)
+            stats['updated'] = len(posts)
+        labels, similarity = assign(vectors, centroids)
+    cache.set('kmeans', {'centroids': centroids.tolist(), 'counts': counts.tolist()})
+    cache.commit()
+    cache.close()
+
+    with PROFILER.stage('keyphrases', len(posts)):
+        # 主题标签只用 1~2 个词的短语
+        model = KeyphraseModel.from_texts(texts, labels.tolist(), ngram_range=(1, 2))
+        phrases = model.distinctive(REPORT_TOP_PHRASES, min_df=2)
+    top_posts = GroupedTopK(REPORT_TOP_POSTS)
+    for seq, (post, label) in enumerate(zip(posts, labels.tolist())):
+        top_posts.push(label, post['score'], seq, post)
+    top_posts = top_posts.items()
+
+    sizes = np.bincount(labels, minlength=k)
+    scores = np.bincount(labels, weights=[post['score'] for post in posts], minlength=k)
+    cohesion = np.bincount(labels, weights=similarity, minlength=k) / np.maximum(sizes, 1)
+    themes = [{
+        'theme': int(label),
+        'posts': int(sizes[label]),
+        'total_score': int(scores[label]),
+        'cohesion': float(cohesion[label]),
+        'phrases': [phrase for phrase, _ in phrases.get(label, [])],
+        'top_posts': [{key: post[key] for key in ('id', 'subreddit', 'title', 'score')}
+                      for post in top_posts[label]]
+    } for label in sorted(np.flatnonzero(sizes).tolist(), key=lambda j: (-sizes[j], -scores[j], j))]
+    return dict(stats, themes=themes)
+
+
+# 报告模板（见 report.py）
+THEME_TEMPLATES = {
+    'md': {
+        'summary': "# 需求主题\n痛点帖子: {posts}\n主题数: {themes}\n",
+        'theme': "\n## {rank}. {label}\n帖子数: {posts} | 总得分: {total_score} | 内聚度: {cohesion:.2f}\n"
+                 "\n{top_posts}",
+        'theme.top_posts': "- [{title:.80}](https://reddit.com/{id}) r/{subreddit} (Score: {score})\n",
+    },
+    'html': {
+        'summary': "<h1>需求主题</h1>\n<p>痛点帖子: {posts}<br>主题数: {themes}</p>\n",
+        'theme': "<h2>{rank}. {label}</h2>\n<p>帖子数: {posts} | 总得分: {total_score} | 内聚度: {cohesion:.2f}</p>\n"
+                 "<ul>\n{top_posts}</ul>\n",
+        'theme.top_posts': '<li><a href="https://reddit.com/{id}">{title:.80}</a> r/{subreddit} (Score: {score})</li>\n',
+    },
+}
+
+
+def write_themes_report(result, report):
+    report.row('summary', posts=result['posts'], themes=len(result['themes']))
+    for rank, theme in enumerate(result['themes'], 1):
+        report.row('theme', rank=rank, label=' / '.join(theme['phrases'][:3]) or f"主题 {theme['theme']}",
+                   **theme)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='痛点帖子的需求主题聚类')
+    parser.add_argument('--db', default=str(DB_PATH), help='SQLite数据库路径')
+    parser.add_argument('--cache', help='向量缓存文件路径（默认 OUTPUT_DIR/%s）' % CACHE_FILE)
+    parser.add_argument('--themes', type=int, default=N_THEMES, help='主题数（默认 %d）' % N_THEMES)
+    parser.add_argument('--refit', action='store_true', help='重新拟合向量化模型并重新聚类')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='读取帖子的块大小')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='md', help='报告格式（默认 md）')
+    parser.add_argument('--output', help='报告路径（默认 OUTPUT_DIR/need_themes<扩展名>）')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.themes < 1:
+        parser.error('--themes 至少为 1')
+    profiling.start_from_args(args)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    result = discover_themes(args.db, args.cache, args.themes, args.refit, args.chunk_size)
+    print(f"痛点帖子: {result['posts']}  新向量化: {result['embedded']}"
+          f"{'（重新拟合）' if result['refit'] else ''}  更新质心用: {result['updated']}")
+
+    output = Path(args.output) if args.output else OUTPUT_DIR / f'need_themes{REPORT_SUFFIXES[args.format]}'
+    with PROFILER.stage('report'):
+        with open_report(output, args.format, THEME_TEMPLATES, '需求主题') as report:
+            write_themes_report(result, report)
+    print(f"📁 报告保存在: {output}")
+    profiling.stop_from_args(args, 'themes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+所有分析器共享的关键词分词器
+  - 预编译的 \\b[a-z]{4,}\\b 正则和冻结的停用词集合，只在导入时构建一次
+  - 可选的整数词号：词表（Vocabulary）把每个词驻留为一个 int，
+    计数器以 int 为键，同一个词在所有计数器里只保存一份字符串
+  - 停用词不在每行里过滤，而是计数完成后从计数器里整体去掉（结果相同）
+
+词号只在当前进程内有效；跨进程或写入检查点前用 Vocabulary.word() / Tokenizer.counts() 换回字符串。
+"""
+
+import re
+from collections import Counter
+
+WORD_PATTERN = r'\b[a-z]{4,}\b'
+WORD_RE = re.compile(WORD_PATTERN)
+
+# 评论分析用的基础停用词；帖子分析在此之上各有补充
+BASE_STOP_WORDS = frozenset({'this', 'that', 'with', 'have', 'from', 'they', 'would'})
+
+# 整列分词时每次拼接的文本条数，限制拼接字符串的大小
+JOIN_CHUNK = 10000
+
+
+class Vocabulary(dict):
+    """词 -> 词号的驻留表；查不到的词自动分配下一个词号"""
+
+    def __init__(self):
+        super().__init__()
+        self.words = []
+
+    def __missing__(self, word):
+        token = self[word] = len(self.words)
+        self.words.append(word)
+        return token
+
+    def ids(self, words):
+        return list(map(self.__getitem__, words))
+
+    def word(self, token):
+        return self.words[token]
+
+
+# 进程内共享的词表
+VOCABULARY = Vocabulary()
+
+
+class Tokenizer:
+    """分词 + 停用词过滤；ids()/count_ids() 以 vocabulary 的词号计数"""
+
+    def __init__(self, stop_words=BASE_STOP_WORDS, vocabulary=VOCABULARY, pattern=WORD_RE):
+        self.stop_words = frozenset(stop_words)
+        self.vocabulary = vocabulary
+        self.pattern = pattern
+        self._stop_ids = None
+
+    @property
+    def stop_ids(self):
+        if self._stop_ids is None:
+            self._stop_ids = frozenset(self.vocabulary[w] for w in self.stop_words)
+        return self._stop_ids
+
+    def ids(self, text):
+        """一段文本全部词的词号（未去停用词，计数后用 finish_ids 去掉）"""
+        return list(map(self.vocabulary.__getitem__, self.pattern.findall(text.lower())))
+
+    def count_ids(self, lower_texts, counter=None):
+        """整批小写文本的词频（以词号为键），分块拼接后一次正则扫描"""
+        counter = Counter() if counter is None else counter
+        lookup = self.vocabulary.__getitem__
+        for start in range(0, len(lower_texts), JOIN_CHUNK):
+            counter.update(map(lookup, self.pattern.findall('\n'.join(lower_texts[start:start + JOIN_CHUNK]))))
+        return self.finish_ids(counter)
+
+    def finish_ids(self, counter):
+        """从词号计数器里去掉停用词"""
+        for token in self.stop_ids:
+            counter.pop(token, None)
+        return counter
+
+    def counts(self, id_counter):
+        """词号计数器 -> 字符串计数器（用于结果、检查点和跨进程合并）"""
+        words = self.vocabulary.words
+        return Counter({words[token]: n for token, n in id_counter.items()})
+
+    def id_counts(self, word_counter):
+        """字符串计数器 -> 词号计数器（从检查点恢复时）"""
+        lookup = self.vocabulary.__getitem__
+        return Counter({lookup(word): n for word, n in word_counter.items()})
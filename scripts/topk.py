@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+有界 Top-K 容器
+流式分析时只保留得分最高的 K 条记录，内存与语料规模无关
+"""
+
+import heapq
+
+
+class TopK:
+    """保留得分最高的 k 条记录（k=None 时不设上限）
+
+    同分时先加入（seq 较小）的记录优先，
+    与 sorted(records, key=score, reverse=True)[:k] 的稳定排序结果一致。
+    """
+
+    def __init__(self, k=None):
+        self.k = k
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, score, seq, item):
+        """加入一条记录；seq 为全局唯一的先后序号"""
+        entry = (score, -seq, item)
+        if self.k is None:
+            self._heap.append(entry)
+        elif len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self.k and entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other):
+        """合并另一个 TopK（两者的 seq 须来自同一序号空间）"""
+        for score, neg_seq, item in other._heap:
+            self.push(score, -neg_seq, item)
+        return self
+
+    def rescore(self, match, score, seq, item):
+        """更新一条已在容器中的记录的得分和序号
+
+        match(item) 用于找到旧记录。得分下降且容器已满时，
+        原本被挤出容器的记录可能应当补位，无法精确更新，返回 False。
+        """
+        for index, (old_score, old_neg_seq, old_item) in enumerate(self._heap):
+            if match(old_item):
+                break
+        else:
+            # 不在容器中：容器必然已满，按新得分正常竞争
+            self.push(score, seq, item)
+            return True
+
+        full = self.k is not None and len(self._heap) >= self.k
+        if full and (score, -seq) < (old_score, old_neg_seq):
+            return False
+        self._heap[index] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        self.push(score, seq, item)
+        return True
+
+    def to_state(self):
+        """序列化为可JSON保存的结构"""
+        return {'k': self.k, 'entries': [list(e) for e in self.entries()]}
+
+    @classmethod
+    def from_state(cls, state):
+        top = cls(state['k'])
+        for score, seq, item in state['entries']:
+            top.push(score, seq, item)
+        return top
+
+    def entries(self):
+        """按得分降序返回 (score, seq, item)"""
+        ordered = sorted(self._heap, key=lambda e: (-e[0], -e[1]))
+        return [(score, -neg_seq, item) for score, neg_seq, item in ordered]
+
+    def items(self):
+        """按得分降序返回记录"""
+        return [item for _, _, item in self.entries()]
+
+
+class GroupedTopK:
+    """按分组（类别、subreddit 等）各保留得分最高的 k 条记录，seq 在所有分组间共用"""
+
+    def __init__(self, k=None):
+        self.k = k
+        self.groups = {}
+
+    def __len__(self):
+        return len(self.groups)
+
+    def push(self, group, score, seq, item):
+        top = self.groups.get(group)
+        if top is None:
+            top = self.groups[group] = TopK(self.k)
+        top.push(score, seq, item)
+
+    def rescore(self, group, match, score, seq, item):
+        """见 TopK.rescore"""
+        top = self.groups.get(group)
+        if top is None:
+            top = self.groups[group] = TopK(self.k)
+        return top.rescore(match, score, seq, item)
+
+    def to_state(self):
+        # 分组键可能不是字符串（如 subreddit 为 None），存成键值对列表
+        return {'k': self.k, 'groups': [[group, top.to_state()] for group, top in self.groups.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        grouped = cls(state['k'])
+        grouped.groups = {group: TopK.from_state(top) for group, top in state['groups']}
+        return grouped
+
+    def items(self):
+        """{分组: 按得分降序的记录}，分组按首次出现的顺序"""
+        return {group: top.items() for group, top in self.groups.items()}
+
+
+def top_items(records, n, key):
+    """按 key 取最大的 n 条记录，同分时保持原顺序
+
+    等价于 sorted(records, key=key, reverse=True)[:n]，但只维护 n 条的堆，
+    O(N log n) 且不复制整个列表；records 可以是生成器。
+    """
+    return heapq.nlargest(n, records, key=key)
+
+
+def top_counts(counter, n):
+    """计数最高的 n 项，同频按键排序
+
+    与 Counter.most_common 不同，结果不依赖插入顺序，
+    因此分块、分片或增量累加的计数器都能得到与全量计算相同的结果。
+    """
+    return heapq.nsmallest(n, counter.items(), key=lambda kv: (-kv[1], kv[0]))
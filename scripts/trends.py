@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+需求趋势：按天/周预聚合的帖子计数
+trend_rollups 表按 (周期, 时间桶, 维度, 标签, subreddit) 存帖子数，由 posts 表上的触发器
+在写入时增量维护（与 fts.py 的索引同步方式相同），趋势查询只读这张小表，不再扫描原始帖子：
+  - 时间桶：created_utc 所在的 UTC 日（day）和以周一开始的周（week），存为距 1970-01-01 的天数
+  - 维度：pain（命中的痛点关键词）、category（需求类别，无类别为 other）、posts（全部帖子，作分母）
+  - 匹配规则与 analyze_needs 相同：关键词对小写后的 f"{title} {selftext}" 做子串匹配，
+    关键词表存在 trend_terms 里，与 analyze_needs 的 PAIN_POINT_KEYWORDS / NEED_CATEGORIES 不一致时重建
+  - INSERT OR REPLACE 替换旧帖子时先按旧内容减一再按新内容加一（需要 recursive_triggers，
+    db.connect 的 ingest 配置默认打开）；created_utc 为空的帖子不计入
+
+rising() 在最近 window + 1 个时间桶上计算：
+  - 环比增长：本期 / 上期 - 1（报告只列上期至少 min_posts 条、本期增长的）
+  - 峰值：本期相对前 window 期均值的 z 分数（标准差不足 1 时按 1 算）
+
+汇总表用 --build 建立（写库），之后由触发器随抓取自动更新；出报告只读库:
+    python scripts/trends.py --db data/reddit_posts.db --build
+    python scripts/trends.py --db data/reddit_posts.db --period week --format md
+"""
+
+import argparse
+import string
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+import profiling
+from db import connect, transaction
+from keyword_matcher import KeywordMatcher
+from profiling import PROFILER
+from report import FORMATS as REPORT_FORMATS, open_report
+from schema import interned
+
+# 周期 -> 每个时间桶的天数
+PERIODS = {'day': 1, 'week': 7}
+# rising() 对比的历史期数
+WINDOW = 8
+# 参与排名的最少帖子数（环比的上期、峰值的本期）
+MIN_POSTS = 3
+# 报告中的峰值阈值和每节的条数
+Z_THRESHOLD = 2.0
+REPORT_TOP = 20
+
+SECONDS_PER_DAY = 86400
+EPOCH = date(1970, 1, 1)
+# SQLite 的 lower() 只转换 ASCII 字母
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS trend_terms (
+        kind TEXT NOT NULL,
+        label TEXT NOT NULL,
+        term TEXT NOT NULL,
+        PRIMARY KEY (kind, label, term)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS trend_rollups (
+        period TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        label TEXT NOT NULL,
+        subreddit TEXT NOT NULL,
+        posts INTEGER NOT NULL,
+        PRIMARY KEY (period, bucket, kind, label, subreddit)
+    ) WITHOUT ROWID;
+'''
+
+
+def default_terms():
+    """[(kind, label, term)]：analyze_needs 的痛点关键词和需求类别关键词（term 为小写）"""
+    from analyze_needs import NEED_CATEGORIES, PAIN_POINT_KEYWORDS
+
+    terms = [('pain', keyword, keyword.lower()) for keyword in PAIN_POINT_KEYWORDS]
+    terms += [('category', category, keyword.lower())
+              for category, keywords in NEED_CATEGORIES.items() for keyword in keywords]
+    return sorted(set(terms))
+
+
+def _column_exprs(conn):
+    """(subreddit, created_utc) 在 posts 表里的表达式，{p} 为行前缀（new. / old. / 表别名.）"""
+    if interned(conn, 'posts'):
+        return '(SELECT name FROM subreddits WHERE id = {p}subreddit_id)', '{p}created_utc'
+    return '{p}subreddit', 'CAST({p}created_utc AS INTEGER)'
+
+
+def _contribution_sql(subreddit, created, prefix, sign):
+    """一行帖子对汇总表的贡献（sign = 1 / -1）的 UPSERT 语句"""
+    subreddit, created = subreddit.format(p=prefix), created.format(p=prefix)
+    # 标量子查询与 trend_terms 无关，每条语句只求值一次，不会对每个关键词重新拼接、转小写；
+    # hits 被引用两次，SQLite 只计算一次（物化）
+    text = f"(SELECT lower(coalesce({prefix}title, '') || ' ' || coalesce({prefix}selftext, '')))"
+    day = f'{created} / {SECONDS_PER_DAY}'
+    return f'''INSERT INTO trend_rollups (period, bucket, kind, label, subreddit, posts)
+        SELECT b.period, b.bucket, m.kind, m.label, coalesce({subreddit}, ''), {sign}
+        FROM (WITH hits AS (SELECT DISTINCT kind, label FROM trend_terms WHERE instr({text}, term) > 0)
+              SELECT kind, label FROM hits
+              UNION ALL SELECT 'category', 'other' WHERE NOT EXISTS (SELECT 1 FROM hits WHERE kind = 'category')
+              UNION ALL SELECT 'posts', '') m,
+             (SELECT 'day' AS period, {day} AS bucket UNION ALL SELECT 'week', {day} - ({day} + 3) % 7) b
+        WHERE {created} IS NOT NULL
+        ON CONFLICT (period, bucket, kind, label, subreddit) DO UPDATE SET posts = posts + excluded.posts;'''
+
+
+def has_rollups(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'trend_rollups'").fetchone() is not None
+
+
+def rollups_current(conn, terms=None):
+    """汇总表的关键词表与 terms（默认 analyze_needs 的关键词）一致；只读，不建表"""
+    terms = sorted(set(terms or default_terms()))
+    return conn.execute('SELECT kind, label, term FROM trend_terms ORDER BY kind, label, term').fetchall() == terms
+
+
+def ensure_rollups(conn, terms=None, rebuild=False):
+    """创建汇总表和同步触发器；新建、关键词变化或 rebuild 时从帖子表回填。返回是否回填过"""
+    terms = sorted(set(terms or default_terms()))
+    subreddit, created = _column_exprs(conn)
+    conn.execute('PRAGMA recursive_triggers = ON')
+    with transaction(conn):
+        fill = rebuild or not has_rollups(conn)
+        # executescript() 会先提交当前事务，逐条执行
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        if conn.execute('SELECT kind, label, term FROM trend_terms ORDER BY kind, label, term').fetchall() != terms:
+            conn.execute('DELETE FROM trend_terms')
+            conn.executemany('INSERT INTO trend_terms (kind, label, term) VALUES (?, ?, ?)', terms)
+            fill = True
+
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trend_rollups_ai AFTER INSERT ON posts BEGIN
+            {_contribution_sql(subreddit, created, 'new.', 1)}
+        END''')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trend_rollups_ad AFTER DELETE ON posts BEGIN
+            {_contribution_sql(subreddit, created, 'old.', -1)}
+        END''')
+        columns = 'title, selftext, created_utc, ' + ('subreddit_id' if interned(conn, 'posts') else 'subreddit')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trend_rollups_au AFTER UPDATE OF {columns} ON posts BEGIN
+            {_contribution_sql(subreddit, created, 'old.', -1)}
+            {_contribution_sql(subreddit, created, 'new.', 1)}
+        END''')
+        if fill:
+            conn.execute('DELETE FROM trend_rollups')
+            _backfill(conn, subreddit, created)
+    return fill
+
+
+def _backfill(conn, subreddit, created):
+    """按与触发器相同的规则从帖子表重算汇总
+
+    每条文本用 Aho-Corasick 扫描一次（SQL 里逐个关键词 instr() 要慢一个数量级）；
+    小写只转换 ASCII 字母，与 SQLite 内置的 lower() 一致。
+    """
+    terms = conn.execute('SELECT kind, label, term FROM trend_terms').fetchall()
+    matcher = KeywordMatcher([term for _, _, term in terms])
+    counts = Counter()
+    rows = conn.execute(f'SELECT {subreddit.format(p="p.")}, {created.format(p="p.")}, p.title, p.selftext '
+                        f'FROM posts p WHERE {created.format(p="p.")} IS NOT NULL')
+    for subreddit_name, created_utc, title, selftext in rows:
+        text = f"{title or ''} {selftext or ''}".translate(_ASCII_LOWER)
+        hits = {terms[i][:2] for i in matcher.match_indexes(text)}
+        if not any(kind == 'category' for kind, _ in hits):
+            hits.add(('category', 'other'))
+        hits.add(('posts', ''))
+        day = created_utc // SECONDS_PER_DAY
+        for kind, label in hits:
+            counts['day', day, kind, label, subreddit_name or ''] += 1
+            counts['week', bucket_of(day, 'week'), kind, label, subreddit_name or ''] += 1
+    conn.executemany('INSERT INTO trend_rollups (period, bucket, kind, label, subreddit, posts) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', (key + (posts,) for key, posts in counts.items()))
+
+
+def bucket_of(day_number, period):
+    """天数所在时间桶的起点（天数）"""
+    return day_number - (day_number + 3) % 7 if period == 'week' else day_number
+
+
+def bucket_date(bucket):
+    return EPOCH + timedelta(days=int(bucket))
+
+
+def day_number(value):
+    """date / datetime / 'YYYY-MM-DD' -> 距 1970-01-01 的天数"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).date()
+    return (value - EPOCH).days
+
+
+def latest_bucket(conn, period):
+    row = conn.execute("SELECT MAX(bucket) FROM trend_rollups WHERE period = ? AND kind = 'posts' AND posts > 0",
+                       (period,)).fetchone()
+    return row[0]
+
+
+def series(conn, kind, label, period='week', subreddit=None, start=None, end=None):
+    """[(时间桶起始日期, 帖子数)]，start/end 为日期（含），中间没有帖子的桶补 0"""
+    step = PERIODS[period]
+    end = latest_bucket(conn, period) if end is None else bucket_of(day_number(end), period)
+    if end is None:
+        return []
+    start = end - 52 * step if start is None else bucket_of(day_number(start), period)
+    sql = ('SELECT bucket, SUM(posts) FROM trend_rollups '
+           'WHERE period = ? AND bucket BETWEEN ? AND ? AND kind = ? AND label = ?')
+    params = [period, start, end, kind, label]
+    if subreddit is not None:
+        sql += ' AND subreddit = ?'
+        params.append(subreddit)
+    counts = dict(conn.execute(sql + ' GROUP BY bucket', params).fetchall())
+    return [(bucket_date(b), counts.get(b, 0)) for b in range(start, end + 1, step)]
+
+
+def rising(conn, kind='pain', period='week', as_of=None, window=WINDOW, by_subreddit=False):
+    """本期（as_of 所在的时间桶，默认最新一期）各标签的环比增长和 z 分数，按 z 分数从高到低
+
+    返回 [{kind, label, subreddit, current, previous, growth, mean, zscore}]，不按帖子数过滤
+    （trend_report() 对环比和峰值分别要求上期/本期至少 min_posts 条）；
+    by_subreddit 为 False 时各 subreddit 合计（subreddit 为 None）。
+    """
+    step = PERIODS[period]
+    end = latest_bucket(conn, period) if as_of is None else bucket_of(day_number(as_of), period)
+    if end is None:
+        return []
+    start = end - window * step
+    group = 'subreddit' if by_subreddit else "''"
+    rows = conn.execute(f'''SELECT label, {group}, bucket, SUM(posts) FROM trend_rollups
+        WHERE period = ? AND bucket BETWEEN ? AND ? AND kind = ?
+        GROUP BY label, {group}, bucket''', (period, start, end, kind)).fetchall()
+
+    history = {}
+    for label, subreddit, bucket, posts in rows:
+        counts = history.setdefault((label, subreddit), np.zeros(window + 1))
+        counts[(bucket - start) // step] = posts
+    result = []
+    for (label, subreddit), counts in history.items():
+        current, previous, past = int(counts[-1]), int(counts[-2]), counts[:-1]
+        mean = float(past.mean())
+        result.append({
+            'kind': kind, 'label': label, 'subreddit': subreddit if by_subreddit else None,
+            'current': current, 'previous': previous,
+            'growth': current / previous - 1 if previous else None,
+            'mean': mean, 'zscore': (current - mean) / max(float(past.std()), 1.0),
+        })
+    result.sort(key=lambda r: (-r['zscore'], r['label'], r['subreddit'] or ''))
+    return result
+
+
+def trend_report(conn, period='week', as_of=None, window=WINDOW, min_posts=MIN_POSTS, by_subreddit=False):
+    """报告用的趋势结果：{'as_of', 'growth': 环比增长最多的, 'spikes': z 分数超过阈值的}"""
+    with PROFILER.stage('trends'):
+        end = latest_bucket(conn, period) if as_of is None else bucket_of(day_number(as_of), period)
+        rows = [row for kind in ('pain', 'category')
+                for row in rising(conn, kind, period, as_of, window, by_subreddit)]
+        # 上期为 0 时没有环比（growth 为 None），min_posts=0 也不参与增长排名
+        growth = sorted((r for r in rows
+                         if r['previous'] >= min_posts and r['growth'] is not None and r['growth'] > 0),
+                        key=lambda r: (-r['growth'], -r['current'], r['label']))
+        spikes = [r for r in rows if r['current'] >= min_posts and r['zscore'] >= Z_THRESHOLD]
+        spikes.sort(key=lambda r: (-r['zscore'], r['label']))
+    return {'period': period, 'as_of': None if end is None else bucket_date(end).isoformat(), 'window': window,
+            'growth': growth[:REPORT_TOP], 'spikes': spikes[:REPORT_TOP]}
+
+
+# 报告模板（见 report.py）
+TREND_TEMPLATES = {
+    'md': {
+        'summary': "# 需求趋势\n周期: {period} | 本期起始: {as_of} | 对比前 {window} 期\n",
+        'growth': "\n## 📈 环比增长\n| 维度 | 关键词/类别 | Subreddit | 本期 | 上期 | 增长 |\n"
+                  "|------|-------------|-----------|------|------|------|\n",
+        'growth_row': "| {kind} | {label} | {subreddit} | {current} | {previous} | {growth:+.0%} |\n",
+        'spikes': "\n## ⚡ 峰值（z >= {threshold}）\n| 维度 | 关键词/类别 | Subreddit | 本期 | 前期均值 | z |\n"
+                  "|------|-------------|-----------|------|----------|---|\n",
+        'spike': "| {kind} | {label} | {subreddit} | {current} | {mean:.1f} | {zscore:.1f} |\n",
+        'end': "",
+    },
+    'html': {
+        'summary': "<h1>需求趋势</h1>\n<p>周期: {period} | 本期起始: {as_of} | 对比前 {window} 期</p>\n",
+        'growth': "<h2>📈 环比增长</h2>\n<table>\n<tr><th>维度</th><th>关键词/类别</th><th>Subreddit</th>"
+                  "<th>本期</th><th>上期</th><th>增长</th></tr>\n",
+        'growth_row': "<tr><td>{kind}</td><td>{label}</td><td>{subreddit}</td><td>{current}</td>"
+                      "<td>{previous}</td><td>{growth:+.0%}</td></tr>\n",
+        'spikes': "</table>\n<h2>⚡ 峰值（z >= {threshold}）</h2>\n<table>\n<tr><th>维度</th><th>关键词/类别</th>"
+                  "<th>Subreddit</th><th>本期</th><th>前期均值</th><th>z</th></tr>\n",
+        'spike': "<tr><td>{kind}</td><td>{label}</td><td>{subreddit}</td><td>{current}</td>"
+                 "<td>{mean:.1f}</td><td>{zscore:.1f}</td></tr>\n",
+        'end': "</table>\n",
+    },
+}
+
+
+def write_trend_report(result, report):
+    report.row('summary', period=result['period'], as_of=result['as_of'], window=result['window'])
+    report.heading('growth')
+    for row in result['growth']:
+        report.row('growth_row', **dict(row, subreddit=row['subreddit'] or '全部'))
+    report.heading('spikes', threshold=Z_THRESHOLD)
+    for row in result['spikes']:
+        report.row('spike', **dict(row, subreddit=row['subreddit'] or '全部'))
+    report.heading('end')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='需求趋势（预聚合的按天/周计数）')
+    parser.add_argument('--db', required=True, help='SQLite数据库路径')
+    parser.add_argument('--period', choices=sorted(PERIODS), default='week', help='时间桶（默认 week）')
+    parser.add_argument('--as-of', help='本期所在日期 YYYY-MM-DD（默认最新一期）')
+    parser.add_argument('--window', type=int, default=WINDOW, help='对比的历史期数（默认 %d）' % WINDOW)
+    parser.add_argument('--min-posts', type=int, default=MIN_POSTS, help='参与排名的最少帖子数')
+    parser.add_argument('--by-subreddit', action='store_true', help='按 subreddit 分别计算')
+    parser.add_argument('--build', action='store_true', help='建立/更新汇总表和触发器（写库），再出报告')
+    parser.add_argument('--rebuild', action='store_true', help='从帖子表重建汇总（隐含 --build）')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='md', help='报告格式（默认 md）')
+    parser.add_argument('--output', help='报告路径（默认打印到标准输出）')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.window < 2:
+        parser.error('--window 至少为 2')
+    profiling.start_from_args(args)
+
+    if args.build or args.rebuild:
+        conn = connect(args.db, 'ingest')
+        start = time.perf_counter()
+        if ensure_rollups(conn, rebuild=args.rebuild):
+            print(f"建立汇总表 {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        conn.close()
+
+    conn = connect(args.db, 'analyze')
+    if not has_rollups(conn):
+        print(f"   ❌ 趋势汇总表未建立，先运行: python scripts/trends.py --db {args.db} --build", file=sys.stderr)
+        sys.exit(1)
+    if not rollups_current(conn):
+        print(f"   ⚠️ 汇总表的关键词与 analyze_needs 不一致，重建: python scripts/trends.py --db {args.db} --build",
+              file=sys.stderr)
+    result = trend_report(conn, args.period, args.as_of, args.window, args.min_posts, args.by_subreddit)
+    conn.close()
+    output = Path(args.output) if args.output else Path('/dev/stdout')
+    with open_report(output, args.format, TREND_TEMPLATES, '需求趋势') as report:
+        write_trend_report(result, report)
+    profiling.stop_from_args(args, 'trends')
+
+
+if __name__ == '__main__':
+    main()